@@ -8,6 +8,7 @@ from managers.data_management import DataManagement
 from menus.chain_selector import ChainSelector
 from models.chain_constants import SelectedChain
 from token_info.token_watchlist import TokenWatchlist
+from utils import to_checksum_address
 
 
 async def main():
@@ -25,43 +26,29 @@ async def main():
 
     watchlist = TokenWatchlist(9, bot_controller.blockchain_manager)
 
-    pool_instance = None
+    pool = None
 
-    while not pool_instance:
+    while not pool:
         print("Enter token address:")
         user_token_address = input()
 
-        print("Enter pool fee:")
-        user_pool_fee = int(input())
+        token_address = to_checksum_address(user_token_address)
 
-        token_address = (
-            bot_controller.blockchain_manager.web3_instance.to_checksum_address(
-                user_token_address
-            )
-        )
-
-        pool_instance = bot_controller.protocol_manager.get_pool_instance(
+        # all fee tiers are checked at once and the deepest pool is used
+        pool = await bot_controller.protocol_manager.get_pool(
             bot_controller.blockchain_manager.current_native_token_address,
             token_address,
-            user_pool_fee,
         )
 
-        if not pool_instance:
-            pool_instance = bot_controller.protocol_manager.get_pool_instance(
-                token_address,
-                bot_controller.blockchain_manager.current_native_token_address,
-                user_pool_fee,
-            )
-
-        if pool_instance:
-            break
-        else:
+        if not pool:
             print("No pool found! Try again.")
 
-    pool_address = pool_instance.address
+    pool_address = pool["address"]
+    user_pool_fee = pool["fee"]
+    print(f"Using pool {pool_address} with fee {user_pool_fee}")
 
     token_trade_amount = int(
-        bot_controller.wallet_manager.get_native_token_balance_percentage(
+        await bot_controller.wallet_manager.get_native_token_balance_percentage(
             bot_controller.data_manager.config["trade_amount_percentage"]
         )
     )
@@ -0,0 +1,57 @@
+"""
+Micro-benchmark of the per-call overhead saved by ContractRegistry and the
+memoized to_checksum_address. No RPC is made, only object construction and
+address checksumming are timed.
+
+Run from the project root: python -m benchmarks.contract_cache_benchmark
+"""
+import json
+import timeit
+
+from web3 import AsyncWeb3, Web3
+
+from managers.contract_registry import ContractRegistry
+from utils import to_checksum_address
+
+ITERATIONS = 20000
+TOKEN_COUNT = 200
+
+
+def main():
+    with open("abi/erc20_abi.json", "r") as json_file:
+        erc20_abi = json.load(json_file)
+    async_web3_instance = AsyncWeb3()
+    registry = ContractRegistry(async_web3_instance)
+    token_addresses = [f"0x{index:040x}" for index in range(1, TOKEN_COUNT + 1)]
+
+    def uncached():
+        for address in token_addresses:
+            async_web3_instance.eth.contract(
+                address=Web3.to_checksum_address(address), abi=erc20_abi
+            )
+
+    def cached():
+        for address in token_addresses:
+            registry.get_contract("ethereum_mainnet", address, "erc20", erc20_abi)
+
+    def checksum_uncached():
+        for address in token_addresses:
+            Web3.to_checksum_address(address)
+
+    def checksum_cached():
+        for address in token_addresses:
+            to_checksum_address(address)
+
+    rounds = ITERATIONS // TOKEN_COUNT
+    results = {
+        "contract (new per call)": timeit.timeit(uncached, number=rounds),
+        "contract (registry)": timeit.timeit(cached, number=rounds),
+        "checksum (Web3)": timeit.timeit(checksum_uncached, number=rounds),
+        "checksum (memoized)": timeit.timeit(checksum_cached, number=rounds),
+    }
+    for name, seconds in results.items():
+        print(f"{name:<25} {seconds / ITERATIONS * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
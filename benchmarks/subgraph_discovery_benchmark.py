@@ -0,0 +1,110 @@
+"""
+Discovery throughput and latency of SubgraphManager against the offline
+GraphQL stand-in (simulation/graphql_stand_in.py) at 1k, 10k and 100k pools.
+For each size it times a full native-pair search, buffered and streamed,
+and a get_pools_many lookup of POOL_LOOKUPS pools. Every run starts with a
+cold response cache.
+
+Run from the project root: python -m benchmarks.subgraph_discovery_benchmark
+"""
+import asyncio
+import statistics
+import time
+
+from managers.subgraph_manager import SubgraphManager
+from models.dextrade_chain_data import DexTradeChainData
+from simulation.graphql_stand_in import GraphQLStandIn, generate_pools
+
+SIZES = (1000, 10000, 100000)
+SUBGRAPH_TYPES = ("uniswap_v3_eth", "messari")
+NATIVE_TOKEN_ADDRESS = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+POOL_LOOKUPS = 1000
+
+
+class StandInBlockchainManager:
+    def __init__(self, chain):
+        self.chain = chain
+
+    def get_current_chain(self):
+        return self.chain
+
+
+async def time_search(blockchain_manager, stream_responses):
+    subgraph_manager = SubgraphManager(blockchain_manager, stream_responses)
+    pool_count = 0
+    first_pool_at = None
+    gaps = []
+    started = last = time.perf_counter()
+    async for pools in subgraph_manager.stream_pools_with_native_token():
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+        if first_pool_at is None:
+            first_pool_at = now - started
+        pool_count += len(pools)
+    total = time.perf_counter() - started
+    await subgraph_manager.graphql_client.close()
+    return pool_count, total, first_pool_at, gaps
+
+
+async def time_lookups(blockchain_manager, pool_ids):
+    subgraph_manager = SubgraphManager(blockchain_manager)
+    started = time.perf_counter()
+    pools = await subgraph_manager.get_pools_many(pool_ids)
+    total = time.perf_counter() - started
+    await subgraph_manager.graphql_client.close()
+    assert len(pools) == len(pool_ids)
+    return total
+
+
+async def run(subgraph_type, size):
+    records = generate_pools(subgraph_type, size, NATIVE_TOKEN_ADDRESS)
+    stand_in = GraphQLStandIn(subgraph_type, records)
+    url = await stand_in.start()
+    chain = DexTradeChainData(
+        name="stand_in",
+        display_name="GraphQL stand-in",
+        short_name="stand_in",
+        rpc_url="",
+        graph_url=url,
+        graph_type=subgraph_type,
+        factory_address="",
+        native_token_name="WETH",
+        native_token_address=NATIVE_TOKEN_ADDRESS,
+        supported_dex="uniswap",
+        multicall_address="",
+        pool_deployer_address="",
+        pool_init_code_hash="",
+    )
+    blockchain_manager = StandInBlockchainManager(chain)
+    try:
+        for mode, stream_responses in (("buffered", False), ("streaming", True)):
+            pool_count, total, first_pool_at, gaps = await time_search(
+                blockchain_manager, stream_responses
+            )
+            assert pool_count == size, f"found {pool_count} of {size} pools"
+            print(
+                f"{subgraph_type:<15} {size:>7} search {mode:<9}"
+                f" {total:7.2f} s  {pool_count / total:9.0f} pools/s"
+                f"  first pools {first_pool_at * 1000:8.1f} ms"
+                f"  median gap {statistics.median(gaps) * 1000:7.1f} ms"
+            )
+
+        pool_ids = [record["id"] for record in records[:POOL_LOOKUPS]]
+        total = await time_lookups(blockchain_manager, pool_ids)
+        print(
+            f"{subgraph_type:<15} {size:>7} get_pools_many({len(pool_ids)})"
+            f" {total * 1000:8.1f} ms"
+        )
+    finally:
+        await stand_in.stop()
+
+
+async def main():
+    for subgraph_type in SUBGRAPH_TYPES:
+        for size in SIZES:
+            await run(subgraph_type, size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
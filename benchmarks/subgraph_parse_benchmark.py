@@ -0,0 +1,107 @@
+"""
+Compares parsing a search response after the whole body arrived (json.loads
+then parse_uniswap_v3) with parsing it while it streams in, through
+GraphQLStreamParser. The body is a synthetic poolsWithToken0/poolsWithToken1
+page fed in 64 KiB chunks, as aiohttp would hand them over; no request is
+made. Reports time to the first Pool, total time and peak memory.
+
+Run from the project root: python -m benchmarks.subgraph_parse_benchmark
+"""
+import json
+import time
+import tracemalloc
+
+from managers.graphql_client import GraphQLClient
+from managers.graphql_stream_parser import GraphQLStreamParser
+from managers.subgraph_manager import SubgraphManager
+
+POOLS_PER_FIELD = 1000  # a full page of each alias, 2000 pools
+ROUNDS = 5
+
+
+def make_body():
+    def pool_data(index):
+        return {
+            "id": f"0x{index:040x}",
+            "token0": {"id": f"0x{index:040x}", "symbol": "TKN", "name": "Token"},
+            "token1": {"id": "0x" + "c0" * 20, "symbol": "WETH", "name": "Ether"},
+            "feeTier": "3000",
+            "createdAtTimestamp": "1690000000",
+            "untrackedVolumeUSD": "123456.789",
+            "liquidity": "1000000000000000000",
+            "sqrtPrice": "79228162514264337593543950336",
+            "tick": "0",
+        }
+
+    response = {
+        "data": {
+            "poolsWithToken0": [pool_data(i) for i in range(POOLS_PER_FIELD)],
+            "poolsWithToken1": [
+                pool_data(POOLS_PER_FIELD + i) for i in range(POOLS_PER_FIELD)
+            ],
+        }
+    }
+    body = json.dumps(response).encode()
+    chunk_size = GraphQLClient.STREAM_CHUNK_SIZE
+    return [
+        body[start : start + chunk_size] for start in range(0, len(body), chunk_size)
+    ]
+
+
+def parse_whole_body(subgraph_manager, chunks):
+    started = time.perf_counter()
+    body = b"".join(chunks)  # what response.read() accumulates
+    pools = subgraph_manager.parse_uniswap_v3(json.loads(body)["data"])
+    first_pool_at = time.perf_counter() - started
+    return pools, first_pool_at
+
+
+def parse_streaming(subgraph_manager, chunks):
+    started = time.perf_counter()
+    first_pool_at = None
+    parser = GraphQLStreamParser()
+    pools = []
+    for chunk in chunks:
+        for _, pool_data in parser.feed(chunk):
+            pools.append(subgraph_manager.parse_uniswap_v3_pool(pool_data))
+            if first_pool_at is None:
+                first_pool_at = time.perf_counter() - started
+    parser.close()
+    return pools, first_pool_at
+
+
+def measure(parse, subgraph_manager, chunks):
+    first_pool_times = []
+    total_times = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        pools, first_pool_at = parse(subgraph_manager, chunks)
+        total_times.append(time.perf_counter() - started)
+        first_pool_times.append(first_pool_at)
+    assert len(pools) == 2 * POOLS_PER_FIELD
+
+    tracemalloc.start()
+    parse(subgraph_manager, chunks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(first_pool_times), min(total_times), peak
+
+
+def main():
+    subgraph_manager = SubgraphManager(None)
+    chunks = make_body()
+    body_size = sum(len(chunk) for chunk in chunks)
+    print(f"{2 * POOLS_PER_FIELD} pools, {body_size / 1024:.0f} KiB body")
+    for name, parse in (
+        ("whole body", parse_whole_body),
+        ("streaming", parse_streaming),
+    ):
+        first_pool, total, peak = measure(parse, subgraph_manager, chunks)
+        print(
+            f"{name:<12} first pool {first_pool * 1000:7.2f} ms"
+            f"  total {total * 1000:7.2f} ms  peak memory {peak / 1024:8.0f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Per-token Decimal evaluation of buy thresholds and ROI targets against the
+vectorized BatchTradeEvaluator, at POSITIONS watchlist tokens and POSITIONS
+monitored tokens. Both sides get the same quotes, including failed quotes
+and rows sitting exactly on a threshold, and the benchmark fails unless
+they decide the same actions. No RPC is made.
+
+Run from the project root: python -m benchmarks.trade_evaluation_benchmark
+"""
+import random
+import timeit
+from decimal import Decimal
+
+from managers.batch_trade_evaluator import BatchTradeEvaluator
+from managers.data_management import DataManagement
+from managers.trade_evaluator import TradeEvaluator
+
+POSITIONS = 10000
+ITERATIONS = 5
+FEES = (100, 500, 3000, 10000)
+TOTAL_GAS_COST = 2 * 30 * 10**9 * 150000  # a buy and a sell at 30 gwei
+
+
+def make_buy_positions(trade_evaluator, rng):
+    current_token_amounts = []
+    token_base_values = []
+    for index in range(POSITIONS):
+        token_base_value = rng.randint(10**15, 10**27)
+        if index % 100 == 0:
+            current_token_amount = -1  # failed quote
+        elif index % 100 == 1:
+            # exactly on the increase threshold
+            (
+                increased_threshold_token_amount,
+                _,
+            ) = trade_evaluator.calculate_buy_thresholds(token_base_value)
+            current_token_amount = int(increased_threshold_token_amount)
+        else:
+            current_token_amount = int(token_base_value * rng.uniform(0.9, 1.1))
+        current_token_amounts.append(current_token_amount)
+        token_base_values.append(token_base_value)
+    return current_token_amounts, token_base_values
+
+
+def make_sell_positions(trade_evaluator, rng):
+    expected_amounts = []
+    current_token_amounts = []
+    token_base_values = []
+    original_investments = []
+    fees = []
+    for index in range(POSITIONS):
+        original_investment = rng.randint(10**16, 10**18)
+        fee = rng.choice(FEES)
+        if index % 100 == 0:
+            expected_amount = -1  # failed quote
+        elif index % 100 == 1:
+            # exactly on the ROI target
+            expected_amount = int(
+                trade_evaluator.calculate_roi_multiplier_for_gas(
+                    original_investment, fee, TOTAL_GAS_COST
+                )
+                * original_investment
+            )
+        else:
+            expected_amount = int(original_investment * rng.uniform(0.3, 2.5))
+        token_base_value = rng.randint(10**15, 10**27)
+        if index % 100 == 2:
+            current_token_amount = -1  # failed buy side quote
+        else:
+            current_token_amount = int(token_base_value * rng.uniform(0.3, 2.5))
+        expected_amounts.append(expected_amount)
+        current_token_amounts.append(current_token_amount)
+        token_base_values.append(token_base_value)
+        original_investments.append(original_investment)
+        fees.append(fee)
+    return (
+        expected_amounts,
+        current_token_amounts,
+        token_base_values,
+        original_investments,
+        fees,
+    )
+
+
+def evaluate_buys_per_token(trade_evaluator, current_token_amounts, token_base_values):
+    return [
+        trade_evaluator.evaluate_buy(current_token_amount, token_base_value)
+        for current_token_amount, token_base_value in zip(
+            current_token_amounts, token_base_values
+        )
+    ]
+
+
+def evaluate_sells_per_token(
+    trade_evaluator,
+    expected_amounts,
+    current_token_amounts,
+    token_base_values,
+    original_investments,
+    fees,
+):
+    price_decrease_threshold = trade_evaluator.data_manager.config[
+        "price_decrease_threshold"
+    ]
+    sells = []
+    for (
+        expected_amount,
+        current_token_amount,
+        token_base_value,
+        original_investment,
+        fee,
+    ) in zip(
+        expected_amounts,
+        current_token_amounts,
+        token_base_values,
+        original_investments,
+        fees,
+    ):
+        if expected_amount < 0 or current_token_amount < 0:
+            sells.append(False)
+            continue
+        current_roi_multiplier = (
+            float(expected_amount) / float(original_investment)
+            if token_base_value > 0
+            else 0
+        )
+        expected_roi_multiplier = trade_evaluator.calculate_roi_multiplier_for_gas(
+            original_investment, fee, TOTAL_GAS_COST
+        )
+        sells.append(
+            (current_roi_multiplier >= expected_roi_multiplier)
+            or (current_roi_multiplier < price_decrease_threshold)
+        )
+    return sells
+
+
+def main():
+    data_manager = DataManagement()
+    trade_evaluator = TradeEvaluator(
+        None,
+        data_manager,
+        None,
+        None,
+        Decimal(str(data_manager.config["profit_margin"])),
+    )
+    batch_trade_evaluator = BatchTradeEvaluator(trade_evaluator)
+    rng = random.Random(1)
+    buy_positions = make_buy_positions(trade_evaluator, rng)
+    sell_positions = make_sell_positions(trade_evaluator, rng)
+
+    buy_evaluation = batch_trade_evaluator.evaluate_buys(*buy_positions)
+    expected_buys = evaluate_buys_per_token(trade_evaluator, *buy_positions)
+    assert [
+        (bool(buy), bool(keep_watching))
+        for buy, keep_watching in zip(buy_evaluation.buy, buy_evaluation.keep_watching)
+    ] == expected_buys, "batch buy actions differ from per token evaluation"
+
+    sell_evaluation = batch_trade_evaluator.evaluate_sells(
+        *sell_positions, TOTAL_GAS_COST
+    )
+    expected_sells = evaluate_sells_per_token(trade_evaluator, *sell_positions)
+    assert [
+        bool(sell) for sell in sell_evaluation.sell
+    ] == expected_sells, "batch sell actions differ from per token evaluation"
+
+    timings = {
+        "buys per token": lambda: evaluate_buys_per_token(
+            trade_evaluator, *buy_positions
+        ),
+        "buys batched": lambda: batch_trade_evaluator.evaluate_buys(*buy_positions),
+        "sells per token": lambda: evaluate_sells_per_token(
+            trade_evaluator, *sell_positions
+        ),
+        "sells batched": lambda: batch_trade_evaluator.evaluate_sells(
+            *sell_positions, TOTAL_GAS_COST
+        ),
+    }
+    for name, evaluate in timings.items():
+        seconds = min(timeit.repeat(evaluate, number=1, repeat=ITERATIONS))
+        print(f"{name:<16} {POSITIONS} positions {seconds * 1000:8.2f} ms")
+    print(
+        f"buys: {sum(buy for buy, _ in expected_buys)} to buy, "
+        f"{buy_evaluation.rechecked} rechecked; "
+        f"sells: {sum(expected_sells)} to sell, "
+        f"{sell_evaluation.rechecked} rechecked"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -29,11 +29,23 @@ class BotController:
 
         self.simulate_pump_mode = self.data_manager.config["simulate_pump_mode"]
 
+        self.local_quoting = self.data_manager.config["local_quoting"]
+
+        self.stream_subgraph_responses = self.data_manager.config[
+            "stream_subgraph_responses"
+        ]
+
         self.blockchain_manager: BlockchainManager = BlockchainManager(
-            user_selected_chain
+            user_selected_chain,
+            self.data_manager.config["rpc_max_concurrency"],
+            self.data_manager.config["gas_refresh_interval"],
         )
         self.protocol_manager: ProtocolManager = ProtocolManager(
-            self.blockchain_manager, self.demo_mode, self.simulate_pump_mode
+            self.blockchain_manager,
+            self.demo_mode,
+            self.simulate_pump_mode,
+            self.local_quoting,
+            self.stream_subgraph_responses,
         )
 
         self.wallet_manager: WalletManager = WalletManager(
@@ -42,6 +54,7 @@ class BotController:
             self.demo_mode,
             reset_userdata_on_load,
         )
+        self.protocol_manager.set_wallet_manager(self.wallet_manager)
 
         self.token_monitor = TokenMonitor(
             self.blockchain_manager.get_current_chain().name,
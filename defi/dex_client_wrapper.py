@@ -3,13 +3,19 @@ from concurrent.futures import ThreadPoolExecutor
 
 from retrying import retry
 
+from defi.multicall import Multicall
+from defi.quote_batcher import QuoteBatcher
+from defi.quote_cache import QuoteCache
 from logger_config import logger
+from pancakeswap import Pancakeswap
 
 
 class DexClientWrapper:
-    def __init__(self, client):
+    def __init__(self, client, blockchain_manager):
         self.client = client
         self.executor = ThreadPoolExecutor(max_workers=5)
+        self.quote_batcher = QuoteBatcher(Multicall(blockchain_manager))
+        self.quote_cache = QuoteCache(blockchain_manager)
 
     # Decorator that will make the function retry on exceptions
     def retry_if_exception(self, exception):
@@ -23,15 +29,14 @@ class DexClientWrapper:
         wait_exponential_max=10000,
     )
     async def get_price_input(self, token_in, token_out, token_trade_amount, fee):
-        loop = asyncio.get_running_loop()
         try:
-            price = await loop.run_in_executor(
-                self.executor,
-                self.client.get_price_input,
-                token_in,
-                token_out,
-                token_trade_amount,
-                fee,
+            price = await self.quote_cache.get(
+                ("input", token_in.lower(), token_out.lower(), token_trade_amount, fee),
+                lambda: self.quote_batcher.quote(
+                    self.get_price_input_call(
+                        token_in, token_out, token_trade_amount, fee
+                    )
+                ),
             )
             return price
         except Exception as e:
@@ -45,16 +50,20 @@ class DexClientWrapper:
         wait_exponential_max=10000,
     )
     async def get_price_output(self, token_in, token_out, token_trade_amount, fee):
-        loop = asyncio.get_running_loop()
-
         try:
-            price = await loop.run_in_executor(
-                self.executor,
-                self.client.get_price_output,
-                token_in,
-                token_out,
-                token_trade_amount,
-                fee,
+            price = await self.quote_cache.get(
+                (
+                    "output",
+                    token_in.lower(),
+                    token_out.lower(),
+                    token_trade_amount,
+                    fee,
+                ),
+                lambda: self.quote_batcher.quote(
+                    self.get_price_output_call(
+                        token_in, token_out, token_trade_amount, fee
+                    )
+                ),
             )
             return price
         except Exception as e:
@@ -63,8 +72,45 @@ class DexClientWrapper:
             )
             raise  # To trigger retry we need to re-raise the exception
 
-    def make_trade(self, token_address, native_token_address, trade_amount, fee):
-        self.client.make_trade(
+    def is_price_input_exact_input(self):
+        # Pancakeswap quotes get_price_input as an exact output and
+        # get_price_output as an exact input, the reverse of Uniswap
+        return not isinstance(self.client, Pancakeswap)
+
+    # Quoter calls are built here but executed by the quote batcher, so that all
+    # quotes requested in the same window share one multicall round-trip
+    def get_price_input_call(self, token_in, token_out, token_trade_amount, fee):
+        if isinstance(self.client, Pancakeswap):
+            return self.client.get_price_input_call(
+                token_in, token_out, token_trade_amount, fee
+            )
+        return self.client.quoter.functions.quoteExactInputSingle(
+            token_in, token_out, fee, token_trade_amount, 0
+        )
+
+    def get_price_output_call(self, token_in, token_out, token_trade_amount, fee):
+        if isinstance(self.client, Pancakeswap):
+            return self.client.get_price_output_call(
+                token_in, token_out, token_trade_amount, fee
+            )
+        return self.client.quoter.functions.quoteExactOutputSingle(
+            token_in, token_out, fee, token_trade_amount, 0
+        )
+
+    async def make_trade(self, token_address, native_token_address, trade_amount, fee):
+        if isinstance(self.client, Pancakeswap):
+            # returns a PendingTransaction without waiting for it to be mined
+            return await self.client.make_trade(
+                token_address,
+                native_token_address,
+                trade_amount,
+                fee,
+            )
+        # uniswap-python only has a blocking web3 client, keep it off the loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self.executor,
+            self.client.make_trade,
             token_address,
             native_token_address,
             trade_amount,
@@ -72,9 +118,14 @@ class DexClientWrapper:
             fee,
         )
 
-    def make_trade_output(self, token_address, native_token_address, trade_amount):
-        self.client.make_trade_output(token_address, native_token_address, trade_amount)
-
-    def get_pool_instance(self, token_0, token_1, fee):
-        pool_instance = self.client.get_pool_instance(token_0, token_1, fee)
-        return pool_instance
+    async def make_trade_output(
+        self, token_address, native_token_address, trade_amount
+    ):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self.executor,
+            self.client.make_trade_output,
+            token_address,
+            native_token_address,
+            trade_amount,
+        )
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+
+from defi.multicall import Multicall, MulticallError
+from defi.v3_pool_math import InsufficientPoolStateError, simulate_swap
+from logger_config import logger
+from models.pool_state import PoolState
+
+
+class LocalQuoter:
+    """
+    Quotes V3 swaps in-process from pool slot0, liquidity and nearby initialized
+    ticks instead of running a simulated swap through the Quoter contract.
+
+    get_price_input and get_price_output quote in the direction the Quoter
+    calls of the wrapped DexClientWrapper do: an exact input and an exact
+    output for Uniswap, the reverse for Pancakeswap. When the loaded pool
+    state cannot cover a swap, the quote falls back to the Quoter through the
+    wrapped DexClientWrapper.
+    """
+
+    POOL_STATE_TTL = 3  # seconds before a pool's state is re-read from the chain
+    TICK_BITMAP_WORD_RADIUS = 2  # bitmap words loaded on each side of the current tick
+    MAX_POOL_STATES = 256  # least recently quoted pools are dropped beyond this
+
+    def __init__(
+        self,
+        blockchain_manager,
+        dex_client_wrapper,
+        pool_finder,
+        max_pool_states=MAX_POOL_STATES,
+    ):
+        self.blockchain_manager = blockchain_manager
+        self.dex_client_wrapper = dex_client_wrapper
+        self.pool_finder = pool_finder
+        self.multicall = Multicall(blockchain_manager)
+        self.pool_abi = self.load_abi("pool")
+        self.max_pool_states = max_pool_states
+        self.pool_states = OrderedDict()
+        self.loading_pools = {}
+
+    def load_abi(self, name):
+        path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "pancakeswap",
+            "abis",
+            f"{name}.abi",
+        )
+        with open(path, "r") as f:
+            return json.load(f)
+
+    async def get_price_input(self, token_in, token_out, token_trade_amount, fee):
+        try:
+            return await self.quote(
+                token_in,
+                token_out,
+                token_trade_amount,
+                fee,
+                exact_input=self.dex_client_wrapper.is_price_input_exact_input(),
+            )
+        except (InsufficientPoolStateError, MulticallError, ValueError) as error:
+            logger.info(f"Local input price quote unavailable, using quoter: {error}")
+            return await self.dex_client_wrapper.get_price_input(
+                token_in, token_out, token_trade_amount, fee
+            )
+
+    async def get_price_output(self, token_in, token_out, token_trade_amount, fee):
+        try:
+            return await self.quote(
+                token_in,
+                token_out,
+                token_trade_amount,
+                fee,
+                exact_input=not self.dex_client_wrapper.is_price_input_exact_input(),
+            )
+        except (InsufficientPoolStateError, MulticallError, ValueError) as error:
+            logger.info(f"Local output price quote unavailable, using quoter: {error}")
+            return await self.dex_client_wrapper.get_price_output(
+                token_in, token_out, token_trade_amount, fee
+            )
+
+    async def quote(self, token_in, token_out, amount, fee, exact_input):
+        pool_state = await self.get_pool_state(token_in, token_out, fee)
+        zero_for_one = token_in.lower() == pool_state.token0.lower()
+
+        amount0, amount1 = simulate_swap(
+            pool_state.sqrt_price_x96,
+            pool_state.tick,
+            pool_state.liquidity,
+            pool_state.fee,
+            pool_state.tick_spacing,
+            pool_state.tick_bitmap,
+            pool_state.liquidity_net,
+            zero_for_one,
+            int(amount) if exact_input else -int(amount),
+        )
+
+        if exact_input:
+            return -(amount1 if zero_for_one else amount0)
+
+        amount_in, amount_received = (
+            (amount0, -amount1) if zero_for_one else (amount1, -amount0)
+        )
+        # the Quoter reverts when the pool cannot deliver the full output
+        if amount_received != amount:
+            raise ValueError("Pool liquidity cannot fill the requested output")
+        return amount_in
+
+    async def get_pool_state(self, token_in, token_out, fee) -> PoolState:
+        pool_address = self.pool_finder.get_pool_address(token_in, token_out, fee)
+        pool_state = self.pool_states.get(pool_address)
+        if pool_state and time.time() - pool_state.updated_at < self.POOL_STATE_TTL:
+            self.pool_states.move_to_end(pool_address)
+            return pool_state
+
+        # concurrent quotes for the same pool share one state refresh
+        loading = self.loading_pools.get(pool_address)
+        if loading is None:
+            loading = asyncio.ensure_future(self.read_pool_state(pool_address, fee))
+            self.loading_pools[pool_address] = loading
+        try:
+            pool_state = await loading
+        finally:
+            self.loading_pools.pop(pool_address, None)
+
+        self.pool_states[pool_address] = pool_state
+        self.pool_states.move_to_end(pool_address)
+        if len(self.pool_states) > self.max_pool_states:
+            self.pool_states.popitem(last=False)
+        return pool_state
+
+    async def read_pool_state(self, pool_address, fee) -> PoolState:
+        pool_contract = self.blockchain_manager.get_contract(
+            pool_address, "pool", self.pool_abi
+        )
+        results = await self.multicall.try_aggregate(
+            [
+                pool_contract.functions.slot0(),
+                pool_contract.functions.liquidity(),
+                pool_contract.functions.tickSpacing(),
+                pool_contract.functions.token0(),
+                pool_contract.functions.token1(),
+            ]
+        )
+        slot0 = self.multicall.unwrap_all(results[0])
+        liquidity, tick_spacing, token0, token1 = [
+            self.multicall.unwrap(result) for result in results[1:]
+        ]
+        sqrt_price_x96, tick = slot0[0], slot0[1]
+
+        pool_state = PoolState(
+            address=pool_address,
+            token0=token0,
+            token1=token1,
+            fee=int(fee),
+            tick_spacing=tick_spacing,
+            sqrt_price_x96=sqrt_price_x96,
+            tick=tick,
+            liquidity=liquidity,
+            updated_at=time.time(),
+        )
+        await self.load_ticks(pool_contract, pool_state)
+        return pool_state
+
+    async def load_ticks(self, pool_contract, pool_state: PoolState):
+        current_word = (pool_state.tick // pool_state.tick_spacing) >> 8
+        word_positions = range(
+            current_word - self.TICK_BITMAP_WORD_RADIUS,
+            current_word + self.TICK_BITMAP_WORD_RADIUS + 1,
+        )
+        bitmap_results = await self.multicall.try_aggregate(
+            [pool_contract.functions.tickBitmap(word) for word in word_positions]
+        )
+        for word_position, result in zip(word_positions, bitmap_results):
+            pool_state.tick_bitmap[word_position] = self.multicall.unwrap(result)
+
+        initialized_ticks = [
+            ((word_position << 8) + bit) * pool_state.tick_spacing
+            for word_position, word in pool_state.tick_bitmap.items()
+            for bit in range(256)
+            if word >> bit & 1
+        ]
+        tick_results = await self.multicall.try_aggregate(
+            [pool_contract.functions.ticks(tick) for tick in initialized_ticks]
+        )
+        for tick, result in zip(initialized_ticks, tick_results):
+            # ticks() returns (liquidityGross, liquidityNet, ...)
+            pool_state.liquidity_net[tick] = self.multicall.unwrap_all(result)[1]
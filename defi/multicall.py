@@ -0,0 +1,118 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from web3._utils.abi import get_abi_output_types
+from web3.contract.contract import ContractFunction
+
+from logger_config import logger
+
+
+class MulticallError(Exception):
+    pass
+
+
+@dataclass
+class CallResult:
+    success: bool
+    value: Optional[tuple] = None
+    error: Optional[str] = None
+
+
+class Multicall:
+    """
+    Aggregates read-only contract calls into a single eth_call through the
+    Multicall2/Multicall3 contract, keeping the result of every call separate.
+    """
+
+    MAX_CALLS_PER_BATCH = 50  # quoter calls are gas heavy, keep below eth_call gas caps
+
+    def __init__(self, blockchain_manager):
+        self.blockchain_manager = blockchain_manager
+        self.multicall_abi = self.load_abi()
+
+    def load_abi(self):
+        path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "pancakeswap",
+            "abis",
+            "multicall.abi",
+        )
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def get_contract(self):
+        multicall_address = (
+            self.blockchain_manager.get_current_chain().multicall_address
+        )
+        return self.blockchain_manager.get_contract(
+            multicall_address, "multicall", self.multicall_abi
+        )
+
+    def encode_calls(self, calls: List[ContractFunction]):
+        return [(call.address, call._encode_transaction_data()) for call in calls]
+
+    def decode_results(
+        self, calls: List[ContractFunction], results
+    ) -> List[CallResult]:
+        codec = self.blockchain_manager.async_web3_instance.codec
+        decoded_results = []
+        for call, (success, return_data) in zip(calls, results):
+            if not success:
+                decoded_results.append(
+                    CallResult(False, error=f"{call.fn_name} reverted")
+                )
+                continue
+            if not return_data:
+                # calls to addresses without code succeed with empty return data
+                decoded_results.append(
+                    CallResult(False, error=f"{call.fn_name} returned no data")
+                )
+                continue
+            try:
+                value = codec.decode(get_abi_output_types(call.abi), return_data)
+                decoded_results.append(CallResult(True, value=tuple(value)))
+            except Exception as error:
+                decoded_results.append(CallResult(False, error=str(error)))
+        return decoded_results
+
+    async def try_aggregate(
+        self, calls: List[ContractFunction], block_identifier="latest"
+    ) -> List[CallResult]:
+        """
+        Executes all calls, chunked to MAX_CALLS_PER_BATCH per eth_call, with the
+        chunks sent concurrently. A failing call, or a failing chunk, only marks
+        its own results as failed.
+        """
+        contract = self.get_contract()
+        chunks = [
+            calls[start : start + self.MAX_CALLS_PER_BATCH]
+            for start in range(0, len(calls), self.MAX_CALLS_PER_BATCH)
+        ]
+        chunk_results = await asyncio.gather(
+            *[
+                self.aggregate_chunk(contract, chunk, block_identifier)
+                for chunk in chunks
+            ]
+        )
+        return [result for results in chunk_results for result in results]
+
+    async def aggregate_chunk(self, contract, chunk, block_identifier):
+        try:
+            results = await contract.functions.tryAggregate(
+                False, self.encode_calls(chunk)
+            ).call(block_identifier=block_identifier)
+            return self.decode_results(chunk, results)
+        except Exception as error:
+            logger.error(f"Multicall chunk of {len(chunk)} calls failed: {error}")
+            return [CallResult(False, error=str(error)) for _ in chunk]
+
+    def unwrap(self, result: CallResult) -> Any:
+        return self.unwrap_all(result)[0]
+
+    def unwrap_all(self, result: CallResult) -> tuple:
+        if not result.success:
+            raise MulticallError(result.error)
+        return result.value
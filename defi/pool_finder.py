@@ -0,0 +1,86 @@
+import json
+import os
+
+from eth_abi import encode
+from eth_utils import keccak
+
+from defi.multicall import Multicall
+from utils import to_checksum_address
+
+
+def compute_pool_address(deployer_address, token_a, token_b, fee, init_code_hash):
+    """CREATE2 address of the V3 pool for the pair and fee, no RPC needed."""
+    token0, token1 = sorted((token_a.lower(), token_b.lower()))
+    salt = keccak(encode(["address", "address", "uint24"], [token0, token1, int(fee)]))
+    address = keccak(
+        b"\xff"
+        + bytes.fromhex(deployer_address[2:])
+        + salt
+        + bytes.fromhex(init_code_hash[2:])
+    )[12:]
+    return to_checksum_address(address)
+
+
+class PoolFinder:
+    """
+    Derives V3 pool addresses locally and checks which fee tiers of a pair
+    exist, with their in-range liquidity, in a single multicall.
+    """
+
+    FEE_TIERS = [100, 500, 2500, 3000, 10000]
+
+    def __init__(self, blockchain_manager):
+        self.blockchain_manager = blockchain_manager
+        self.multicall = Multicall(blockchain_manager)
+        self.pool_abi = self.load_abi()
+
+    def load_abi(self):
+        path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "pancakeswap",
+            "abis",
+            "pool.abi",
+        )
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def get_pool_address(self, token_a, token_b, fee):
+        current_chain = self.blockchain_manager.get_current_chain()
+        return compute_pool_address(
+            current_chain.pool_deployer_address,
+            token_a,
+            token_b,
+            fee,
+            current_chain.pool_init_code_hash,
+        )
+
+    async def find_pools(self, token_a, token_b, fees=None):
+        """
+        Returns [{"address", "fee", "liquidity"}] for every existing pool of
+        the pair, deepest first. Calls to addresses without a deployed pool
+        return no data and are left out.
+        """
+        fees = fees or self.FEE_TIERS
+        pool_addresses = [self.get_pool_address(token_a, token_b, fee) for fee in fees]
+        results = await self.multicall.try_aggregate(
+            [
+                self.blockchain_manager.get_contract(
+                    pool_address, "pool", self.pool_abi
+                ).functions.liquidity()
+                for pool_address in pool_addresses
+            ]
+        )
+        pools = [
+            {
+                "address": pool_address,
+                "fee": fee,
+                "liquidity": self.multicall.unwrap(result),
+            }
+            for pool_address, fee, result in zip(pool_addresses, fees, results)
+            if result.success
+        ]
+        return sorted(pools, key=lambda pool: pool["liquidity"], reverse=True)
+
+    async def get_deepest_pool(self, token_a, token_b):
+        pools = await self.find_pools(token_a, token_b)
+        return pools[0] if pools else None
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import os
+
+from eth_utils import keccak
+
+from defi.multicall import Multicall
+from logger_config import logger
+from models.mirrored_pool import MirroredPool
+from utils import to_checksum_address
+
+# Uniswap V3 and PancakeSwap V3 (which appends two protocol fee fields) Swaps
+SWAP_TOPICS = [
+    "0x" + keccak(text=signature).hex()
+    for signature in (
+        "Swap(address,address,int256,int256,uint160,uint128,int24)",
+        "Swap(address,address,int256,int256,uint160,uint128,int24,uint128,uint128)",
+    )
+]
+LIQUIDITY_TOPICS = [
+    "0x" + keccak(text=signature).hex()
+    for signature in (
+        "Mint(address,address,int24,int24,uint128,uint256,uint256)",
+        "Burn(address,int24,int24,uint128,uint256,uint256)",
+    )
+]
+SWAP_STATE_TYPES = ["int256", "int256", "uint160", "uint128", "int24"]
+
+
+class PoolMirror:
+    """
+    Mirrors sqrtPriceX96, tick and liquidity of the watched pools in memory.
+    Pools are read once through a multicall, after which Swap, Mint and Burn
+    logs fetched with eth_getLogs from a block cursor keep them up to date,
+    so pools nobody trades in cost nothing to follow.
+
+    Each consumer sets the pools it watches once per pass; pools no consumer
+    watches any more are dropped. A consumer marks a pool version as seen
+    only after it made use of it, so a failed quote is retried next pass.
+    """
+
+    POLL_INTERVAL = 1  # seconds between log polls
+    MAX_BLOCK_RANGE = 2000  # beyond this the pools are re-read instead
+
+    def __init__(self, blockchain_manager):
+        self.blockchain_manager = blockchain_manager
+        self.multicall = Multicall(blockchain_manager)
+        self.pool_abi = self.load_abi()
+        self.pools = {}
+        # consumer -> addresses of the pools it watches
+        self.watched_pools = {}
+        # (consumer, pool address) -> version marked seen, or checked
+        self.last_seen_versions = {}
+        self.checked_versions = {}
+        self.cursor = None
+        self.chain_name = None
+        self.sync_task = None
+        self.lock = asyncio.Lock()
+
+    def load_abi(self):
+        path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "pancakeswap",
+            "abis",
+            "pool.abi",
+        )
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def set_watched_pools(self, consumer, pool_addresses):
+        """Replace the pools consumer watches, forgetting the ones it dropped."""
+        watched_pools = {pool_address.lower() for pool_address in pool_addresses}
+        self.watched_pools[consumer] = watched_pools
+        for versions in (self.last_seen_versions, self.checked_versions):
+            for key in [
+                key
+                for key in versions
+                if key[0] == consumer and key[1] not in watched_pools
+            ]:
+                del versions[key]
+        if watched_pools:
+            self.start()
+
+    def get_watched_pools(self):
+        return set().union(*self.watched_pools.values())
+
+    def get_pool(self, pool_address) -> MirroredPool:
+        return self.pools.get(pool_address.lower())
+
+    def has_changed(self, pool_address, consumer):
+        """
+        True when the pool changed since consumer last marked it seen, or when
+        it is not mirrored yet and its price is unknown.
+        """
+        pool = self.get_pool(pool_address)
+        if pool is None:
+            return True
+        key = (consumer, pool.address)
+        if self.last_seen_versions.get(key) == pool.version:
+            return False
+        # the version to mark once the consumer made use of it
+        self.checked_versions[key] = pool.version
+        return True
+
+    def mark_seen(self, pool_address, consumer):
+        """Marks the version has_changed last reported to consumer as seen."""
+        key = (consumer, pool_address.lower())
+        version = self.checked_versions.pop(key, None)
+        if version is not None:
+            self.last_seen_versions[key] = version
+
+    def start(self):
+        if self.sync_task is None or self.sync_task.done():
+            self.sync_task = asyncio.ensure_future(self.sync_loop())
+
+    async def sync_loop(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as error:
+                logger.error(f"Pool mirror sync failed: {error}")
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+    async def sync(self):
+        async with self.lock:
+            chain_name = self.blockchain_manager.get_current_chain().name
+            if chain_name != self.chain_name:
+                # block numbers and pools are per chain, drop the old cursor
+                if self.chain_name is not None:
+                    self.watched_pools = {}
+                self.cursor = None
+                self.pools = {}
+                self.last_seen_versions = {}
+                self.checked_versions = {}
+                self.chain_name = chain_name
+            block_number = (
+                await self.blockchain_manager.block_tracker.get_block_number()
+            )
+            watched_pools = self.get_watched_pools()
+            # pools no consumer watches any more stop being followed
+            for pool_address in [
+                pool_address
+                for pool_address in self.pools
+                if pool_address not in watched_pools
+            ]:
+                del self.pools[pool_address]
+            new_pools = [pool for pool in watched_pools if pool not in self.pools]
+            if (
+                self.cursor is not None
+                and block_number - self.cursor > self.MAX_BLOCK_RANGE
+            ):
+                # too far behind for one log query, start over from fresh state
+                new_pools = list(watched_pools)
+            elif self.cursor is not None and block_number > self.cursor:
+                await self.apply_logs(self.cursor + 1, block_number)
+            if new_pools:
+                await self.load_pools(new_pools, block_number)
+            self.cursor = block_number
+
+    async def apply_logs(self, from_block, to_block):
+        addresses = [to_checksum_address(pool) for pool in self.pools]
+        if not addresses:
+            return
+        logs = await self.blockchain_manager.async_web3_instance.eth.get_logs(
+            {
+                "fromBlock": from_block,
+                "toBlock": to_block,
+                "address": addresses,
+                "topics": [SWAP_TOPICS + LIQUIDITY_TOPICS],
+            }
+        )
+        codec = self.blockchain_manager.async_web3_instance.codec
+        changed_liquidity = {}
+        for log in sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"])):
+            pool = self.pools.get(log["address"].lower())
+            if pool is None:
+                continue
+            topic = "0x" + bytes(log["topics"][0]).hex()
+            if topic in SWAP_TOPICS:
+                # the state fields lead the data of both Swap layouts
+                _, _, sqrt_price_x96, liquidity, tick = codec.decode(
+                    SWAP_STATE_TYPES, bytes(log["data"])[: 32 * len(SWAP_STATE_TYPES)]
+                )
+                pool.sqrt_price_x96 = sqrt_price_x96
+                pool.liquidity = liquidity
+                pool.tick = tick
+                pool.block_number = log["blockNumber"]
+                pool.version += 1
+                changed_liquidity.pop(pool.address, None)
+            else:
+                # in-range liquidity may have moved, re-read it below
+                changed_liquidity[pool.address] = log["blockNumber"]
+
+        if changed_liquidity:
+            await self.load_pools(list(changed_liquidity), to_block)
+
+    async def load_pools(self, pool_addresses, block_number):
+        contracts = [
+            self.blockchain_manager.get_contract(pool_address, "pool", self.pool_abi)
+            for pool_address in pool_addresses
+        ]
+        calls = [contract.functions.slot0() for contract in contracts]
+        calls += [contract.functions.liquidity() for contract in contracts]
+        results = await self.multicall.try_aggregate(calls)
+
+        slot0_results = results[: len(contracts)]
+        liquidity_results = results[len(contracts) :]
+        for pool_address, slot0_result, liquidity_result in zip(
+            pool_addresses, slot0_results, liquidity_results
+        ):
+            if not (slot0_result.success and liquidity_result.success):
+                logger.warning(f"Could not read pool {pool_address} for the mirror")
+                continue
+            slot0 = self.multicall.unwrap_all(slot0_result)
+            previous = self.pools.get(pool_address)
+            self.pools[pool_address] = MirroredPool(
+                address=pool_address,
+                sqrt_price_x96=slot0[0],
+                tick=slot0[1],
+                liquidity=self.multicall.unwrap(liquidity_result),
+                block_number=block_number,
+                version=previous.version + 1 if previous else 0,
+            )
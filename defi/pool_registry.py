@@ -0,0 +1,119 @@
+from typing import Dict, Iterable, List, Optional
+
+from models.defi_structures import Pool, Token
+from models.dextrade_chain_data import DexTradeChainData
+
+
+class PoolRegistry:
+    """
+    The known pools of one chain, indexed by pool id, by token address and by
+    (token address, fee). The chain's native token and stablecoins are kept as
+    precomputed lowercase sets, and the trade candidate of each pool (the
+    non-native side of a native pair, unless it is a stablecoin) is worked out
+    once when the pool is added, so discovery filters each pool in O(1).
+    """
+
+    def __init__(self, chain: DexTradeChainData, stablecoin_addresses: Iterable[str]):
+        self.native_token_address = chain.native_token_address.lower()
+        self.native_token_symbol = chain.native_token_name.lower()
+        self.stablecoin_addresses = frozenset(
+            address.lower() for address in stablecoin_addresses
+        )
+        self.pools_by_id: Dict[str, Pool] = {}
+        self.pools_by_token: Dict[str, Dict[str, Pool]] = {}
+        self.pools_by_token_fee: Dict[tuple, Dict[str, Pool]] = {}
+        self.candidate_tokens: Dict[str, Optional[Token]] = {}
+
+    def __len__(self):
+        return len(self.pools_by_id)
+
+    def __contains__(self, pool_id):
+        return pool_id.lower() in self.pools_by_id
+
+    def is_stablecoin(self, token_address: str, token_symbol: str) -> bool:
+        # tokens named like the native token count as well, e.g. bridged WETH
+        return (
+            token_address.lower() in self.stablecoin_addresses
+            or token_symbol.lower() == self.native_token_symbol
+        )
+
+    def add(self, pool: Pool):
+        if pool.id in self.pools_by_id:
+            self.remove(pool.id)
+        self.pools_by_id[pool.id] = pool
+        for token in (pool.token0, pool.token1):
+            self.pools_by_token.setdefault(token.id, {})[pool.id] = pool
+            self.pools_by_token_fee.setdefault((token.id, pool.fee.basis_points), {})[
+                pool.id
+            ] = pool
+        self.candidate_tokens[pool.id] = self.find_candidate_token(pool)
+
+    def add_many(self, pools: Iterable[Pool]):
+        for pool in pools:
+            self.add(pool)
+
+    def remove(self, pool_id):
+        pool = self.pools_by_id.pop(pool_id.lower(), None)
+        if pool is None:
+            return
+        for token in (pool.token0, pool.token1):
+            for index, key in (
+                (self.pools_by_token, token.id),
+                (self.pools_by_token_fee, (token.id, pool.fee.basis_points)),
+            ):
+                pools = index.get(key)
+                if pools is not None:
+                    pools.pop(pool.id, None)
+                    if not pools:
+                        del index[key]
+        self.candidate_tokens.pop(pool.id, None)
+
+    def remove_created_before(self, timestamp):
+        for pool in list(self.pools_by_id.values()):
+            if pool.created_timestamp < timestamp:
+                self.remove(pool.id)
+
+    def get(self, pool_id) -> Optional[Pool]:
+        return self.pools_by_id.get(pool_id.lower())
+
+    def get_pools(self) -> List[Pool]:
+        return list(self.pools_by_id.values())
+
+    def get_pools_for_token(self, token_address) -> List[Pool]:
+        return list(self.pools_by_token.get(token_address.lower(), {}).values())
+
+    def get_pools_for_token_fee(self, token_address, fee) -> List[Pool]:
+        return list(
+            self.pools_by_token_fee.get((token_address.lower(), fee), {}).values()
+        )
+
+    def find_candidate_token(self, pool: Pool) -> Optional[Token]:
+        if pool.token0.id == self.native_token_address:
+            token = pool.token1
+        elif pool.token1.id == self.native_token_address:
+            token = pool.token0
+        else:
+            return None
+        if token.id == self.native_token_address or self.is_stablecoin(
+            token.id, token.symbol
+        ):
+            return None
+        return token
+
+    def get_candidate_token(self, pool: Pool) -> Optional[Token]:
+        """The token to trade against the native token, None if the pool has none."""
+        if pool.id in self.candidate_tokens:
+            return self.candidate_tokens[pool.id]
+        return self.find_candidate_token(pool)
+
+    def filter_pools(self, token_addresses: Iterable[str]) -> List[Pool]:
+        """The native pairs of the given tokens."""
+        pools = []
+        for token_address in {address.lower() for address in token_addresses}:
+            for pool in self.get_pools_for_token(token_address):
+                other_token = (
+                    pool.token1 if pool.token0.id == token_address else pool.token0
+                )
+                if other_token.id == self.native_token_address:
+                    pools.append(pool)
+        return pools
@@ -8,13 +8,22 @@ from uniswap import Uniswap
 from web3.middleware import geth_poa_middleware
 
 from defi.dex_client_wrapper import DexClientWrapper
+from defi.local_quoter import LocalQuoter
+from defi.pool_finder import PoolFinder
+from defi.pool_mirror import PoolMirror
+from defi.pool_registry import PoolRegistry
 from logger_config import logger
 from managers.blockchain_manager import BlockchainManager
+from managers.pool_data_batcher import PoolDataBatcher
 from managers.subgraph_manager import SubgraphManager
+from managers.subgraph_sync import SubgraphSync
 from managers.token_blacklist_manager import TokenBlacklistManager
 from models.defi_structures import Pool
+from models.trade_action import TradeAction
 from pancakeswap import Pancakeswap
 from simulation.simulated_dex_client_wrapper import SimulatedDexClientWrapper
+from token_info.price_history import PriceHistory, PriceSeries
+from utils import to_checksum_address
 
 
 class ProtocolManager:
@@ -26,15 +35,29 @@ class ProtocolManager:
         blockchain_manager: BlockchainManager,
         demo_mode: True,
         simulate_pump_mode: False,
+        local_quoting=False,
+        stream_subgraph_responses=False,
     ):
         self.stablecoin_tokens = self.load_stablecoin_data()
-        self.subgraph_manager = SubgraphManager(blockchain_manager)
+        self.pool_registries = {}
+        self.subgraph_manager = SubgraphManager(
+            blockchain_manager, stream_subgraph_responses
+        )
+        self.subgraph_sync = SubgraphSync(
+            self.subgraph_manager, blockchain_manager, self.get_pool_registry
+        )
+        # concurrent analyses share one id_in query per window
+        self.pool_data_batcher = PoolDataBatcher(self.subgraph_manager)
         self.blockchain_manager: BlockchainManager = blockchain_manager
         self.token_blacklist_manager: TokenBlacklistManager = TokenBlacklistManager(
             blockchain_manager
         )
         self.demo_mode = demo_mode
         self.simulate_pump_mode = simulate_pump_mode
+        self.pool_finder = PoolFinder(blockchain_manager)
+        self.pool_mirror = PoolMirror(blockchain_manager)
+        # every quote and pool read lands in the token's price series
+        self.price_history = PriceHistory()
 
         dex_name = self.blockchain_manager.get_supported_dex()
 
@@ -53,11 +76,56 @@ class ProtocolManager:
                 dex_client = Pancakeswap(
                     w3=self.blockchain_manager.web3_instance,
                     wallet_private_key=self.blockchain_manager.wallet_private_key,
+                    async_w3=self.blockchain_manager.async_web3_instance,
+                    gas_oracle=self.blockchain_manager.gas_oracle,
+                    contract_registry=self.blockchain_manager.contract_registry,
+                    transaction_submitter=self.blockchain_manager.transaction_submitter,
                 )
 
-            self.dex_client_wrapper = DexClientWrapper(dex_client)
+            self.dex_client_wrapper = DexClientWrapper(
+                dex_client, self.blockchain_manager
+            )
         dex_client.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
 
+        # Quotes are computed from pool state when local quoting is enabled,
+        # falling back to the Quoter contract otherwise
+        self.quote_client = self.dex_client_wrapper
+        if local_quoting and not simulate_pump_mode:
+            self.quote_client = LocalQuoter(
+                self.blockchain_manager, self.dex_client_wrapper, self.pool_finder
+            )
+
+    def set_wallet_manager(self, wallet_manager):
+        # Pancakeswap approval checks read the wallet's portfolio snapshot
+        client = self.dex_client_wrapper.client
+        if isinstance(client, Pancakeswap):
+            wallet_manager.add_spender(client.spender_address)
+            client.allowance_reader = wallet_manager.get_allowance
+            # the cached allowance is stale as soon as an approval is sent
+            client.approval_listener = wallet_manager.invalidate_snapshot
+
+    def watch_pools(self, consumer, pool_addresses):
+        """The pools consumer checks this pass, the rest stop being mirrored."""
+        # simulated pumps move prices without any trades in the pool
+        if self.simulate_pump_mode:
+            return
+        self.pool_mirror.set_watched_pools(consumer, pool_addresses)
+
+    def pool_has_changed(self, pool_address, consumer):
+        """
+        Whether the pool traded or its liquidity moved since consumer last
+        quoted it; unchanged pools would quote the same as last time.
+        """
+        if self.simulate_pump_mode:
+            return True
+        return self.pool_mirror.has_changed(pool_address, consumer)
+
+    def mark_pool_quoted(self, pool_address, consumer):
+        """Called once the quote succeeded, so a failed one is retried."""
+        if self.simulate_pump_mode:
+            return
+        self.pool_mirror.mark_seen(pool_address, consumer)
+
     def validate_get_price_inputs(
         self,
         token0: Union[Address, ChecksumAddress],
@@ -102,19 +170,32 @@ class ProtocolManager:
         with open("data/stablecoins.json", "r") as json_file:
             return json.load(json_file)
 
+    def get_pool_registry(self, chain_name=None) -> PoolRegistry:
+        """The pool registry of a chain, shared by all workers."""
+        if chain_name is None:
+            chain_name = self.blockchain_manager.get_current_chain().name
+        pool_registry = self.pool_registries.get(chain_name)
+        if pool_registry is None:
+            pool_registry = PoolRegistry(
+                self.blockchain_manager.supported_chains[chain_name],
+                self.stablecoin_tokens.get(chain_name, {}).keys(),
+            )
+            self.pool_registries[chain_name] = pool_registry
+        return pool_registry
+
     def is_stablecoin(self, token_address: str, token_symbol: str) -> bool:
-        current_chain = self.blockchain_manager.get_current_chain().name
-        self.stablecoin_tokens.setdefault(current_chain, {})
-        is_stablecoin_address = token_address.lower() in (
-            address.lower() for address in self.stablecoin_tokens[current_chain].keys()
-        )
-        if token_symbol == "WETH":
-            abc = "123"
-        is_stablecoin_symbol = (
-            token_symbol.lower()
-            == self.blockchain_manager.get_current_chain().native_token_name.lower()
+        return self.get_pool_registry().is_stablecoin(token_address, token_symbol)
+
+    def get_price_series(
+        self, token_address, fee, side: TradeAction
+    ) -> Optional[PriceSeries]:
+        """
+        The buy or sell quotes recorded so far for the token's pool with the
+        given fee, None if it was never quoted that way.
+        """
+        return self.price_history.get(
+            self.blockchain_manager.get_current_chain().name, token_address, fee, side
         )
-        return is_stablecoin_address or is_stablecoin_symbol
 
     async def get_tokens(
         self,
@@ -123,60 +204,61 @@ class ProtocolManager:
         max_liquidity_usd=100000,
         min_volume_usd=5000,
     ):
+        new_token_addresses = []
+        async for page_tokens in self.stream_tokens(
+            past_time_hours, min_liquidity_usd, max_liquidity_usd, min_volume_usd
+        ):
+            new_token_addresses.extend(page_tokens)
+        return new_token_addresses
+
+    async def stream_tokens(
+        self,
+        past_time_hours=3,
+        min_liquidity_usd=1,
+        max_liquidity_usd=100000,
+        min_volume_usd=5000,
+    ):
+        """Yields the candidate tokens of each subgraph page as it arrives."""
         logger.info("Trying to get new tokens here:")
-        native_token_address = (
-            self.blockchain_manager.get_current_chain().native_token_address
-        )
+        pool_registry = self.get_pool_registry()
         try:
             past_time = int(
                 (
                     datetime.datetime.now() - datetime.timedelta(hours=past_time_hours)
                 ).timestamp()
             )
-            pools_with_native_token: List[
-                Pool
-            ] = self.subgraph_manager.get_pools_with_native_token(
-                None, min_liquidity_usd, max_liquidity_usd, min_volume_usd
-            )
-
-            new_token_addresses = []
-            for pool in pools_with_native_token:
-                token = pool.token0
-                fee = pool.fee
-                # fee = pool.fee.basis_points
-
-                if token.id.lower() == native_token_address.lower():
-                    token = pool.token1
-                if (
-                    (token.id != native_token_address)
-                    and (not self.is_stablecoin(token.id, token.symbol))
-                    and (pool.id != "0x0000000000000000000000000000000000000000")
-                    and not (
-                        await self.token_blacklist_manager.is_token_blacklisted(
-                            token.id
+            async for pools_with_native_token in self.subgraph_sync.stream_pools(
+                past_time, min_liquidity_usd, max_liquidity_usd, min_volume_usd
+            ):
+                new_token_addresses = []
+                for pool in pools_with_native_token:
+                    token = pool_registry.get_candidate_token(pool)
+                    if (
+                        token is not None
+                        and (pool.id != "0x0000000000000000000000000000000000000000")
+                        and not (
+                            await self.token_blacklist_manager.is_token_blacklisted(
+                                token.id
+                            )
+                        )
+                    ):
+                        new_token_addresses.append(
+                            {
+                                "token": token,
+                                "pool": pool,
+                                "fee": pool.fee,
+                            }
                         )
-                    )
-                ):
-                    new_token_addresses.append(
-                        {
-                            "token": token,
-                            "pool": pool,
-                            "fee": fee,
-                        }
-                    )
-            return list(new_token_addresses)
+                yield new_token_addresses
         except Exception as error_message:
             logger.error(f"Error occurred in get_tokens: {str(error_message)}")
-            return []  # Return empty list on error, adjust as needed
 
     # Given token_trade_amount for native_token_address,
     # returns the maximum output amount of token token_address
 
     async def get_max_native_for_token(self, token_address, token_trade_amount, fee):
-        token_in = self.blockchain_manager.web3_instance.to_checksum_address(
-            token_address
-        )
-        token_out = self.blockchain_manager.web3_instance.to_checksum_address(
+        token_in = to_checksum_address(token_address)
+        token_out = to_checksum_address(
             self.blockchain_manager.get_current_chain().native_token_address
         )
         logger.info(
@@ -185,9 +267,17 @@ class ProtocolManager:
                     amount_in: {token_trade_amount}, fee {fee}"
         )
         try:
-            native_token_amount = await self.dex_client_wrapper.get_price_input(
+            native_token_amount = await self.quote_client.get_price_input(
                 token_in, token_out, token_trade_amount, fee
             )
+            self.price_history.record_quote(
+                self.blockchain_manager.get_current_chain().name,
+                token_address,
+                fee,
+                TradeAction.SELL,
+                native_token_amount,
+                token_trade_amount,
+            )
             logger.info(
                 f"Native token (WETH) amount for given token amount: {native_token_amount}"
             )
@@ -202,10 +292,8 @@ class ProtocolManager:
     # buy token_trade_amount of native_token_address.
 
     async def get_min_token_for_native(self, token_address, token_trade_amount, fee):
-        token_in = self.blockchain_manager.web3_instance.to_checksum_address(
-            token_address
-        )
-        token_out = self.blockchain_manager.web3_instance.to_checksum_address(
+        token_in = to_checksum_address(token_address)
+        token_out = to_checksum_address(
             self.blockchain_manager.get_current_chain().native_token_address
         )
         logger.info(
@@ -220,9 +308,17 @@ class ProtocolManager:
 
         try:
             # dex_client_wrapper
-            native_token_amount = await self.dex_client_wrapper.get_price_output(
+            native_token_amount = await self.quote_client.get_price_output(
                 token_in, token_out, token_trade_amount, fee
             )
+            self.price_history.record_quote(
+                self.blockchain_manager.get_current_chain().name,
+                token_address,
+                fee,
+                TradeAction.BUY,
+                token_trade_amount,
+                native_token_amount,
+            )
             return native_token_amount
         except Exception as error:
             # logger.error(f"Error during price estimation: {error}", exc_info=False)
@@ -230,45 +326,58 @@ class ProtocolManager:
             # logger.info("Invalid token price estimation. Cannot proceed further.")
             return -1
 
-    def get_pool_instance(self, token_0, token_1, fee):
-        token_0 = self.blockchain_manager.web3_instance.to_checksum_address(token_0)
-        token_1 = self.blockchain_manager.web3_instance.to_checksum_address(token_1)
+    async def get_pool(self, token_0, token_1, fee=None):
+        """
+        Returns {"address", "fee", "liquidity"} of the pair's pool with the
+        given fee, or of its deepest pool across all fee tiers when fee is None.
+        """
         try:
-            return self.dex_client_wrapper.get_pool_instance(token_0, token_1, fee)
+            if fee is None:
+                return await self.pool_finder.get_deepest_pool(token_0, token_1)
+            pools = await self.pool_finder.find_pools(token_0, token_1, [fee])
+            return pools[0] if pools else None
         except Exception as error:
+            logger.error(f"Error finding pool for {token_0}/{token_1}: {error}")
             return None
 
     async def get_pool_data(self, pool_address):
         try:
-            pools = await self.subgraph_manager.get_pools(pool_address)
-            return pools[0]
+            pool = await self.pool_data_batcher.get_pool(pool_address)
         except Exception as error:
             return None
+        if pool is not None:
+            self.record_pool_volume(pool)
+        return pool
 
-    def make_trade(self, token_address, native_token_address, trade_amount, fee):
-        token_address = self.blockchain_manager.web3_instance.to_checksum_address(
-            token_address
-        )
-        native_token_address = (
-            self.blockchain_manager.web3_instance.to_checksum_address(
-                native_token_address
-            )
+    def record_pool_volume(self, pool: Pool):
+        current_chain = self.blockchain_manager.get_current_chain()
+        native_token_address = current_chain.native_token_address.lower()
+        if pool.token0.id == native_token_address:
+            token = pool.token1
+        elif pool.token1.id == native_token_address:
+            token = pool.token0
+        else:
+            return
+        self.price_history.record_volume(
+            current_chain.name, token.id, pool.fee.basis_points, pool.volumeUSD
         )
-        self.dex_client_wrapper.make_trade(
+
+    async def make_trade(self, token_address, native_token_address, trade_amount, fee):
+        token_address = to_checksum_address(token_address)
+        native_token_address = to_checksum_address(native_token_address)
+        return await self.dex_client_wrapper.make_trade(
             token_address, native_token_address, trade_amount, fee
         )
 
-    def make_trade_output(self, token_address, native_token_address, trade_amount):
-        token_address = self.blockchain_manager.web3_instance.to_checksum_address(
-            token_address
-        )
-        self.dex_client_wrapper.make_trade_output(
+    async def make_trade_output(
+        self, token_address, native_token_address, trade_amount
+    ):
+        token_address = to_checksum_address(token_address)
+        await self.dex_client_wrapper.make_trade_output(
             token_address, native_token_address, trade_amount
         )
 
-    def approve(self, token_address, max_approval):
-        token_address = self.blockchain_manager.web3_instance.to_checksum_address(
-            token_address
-        )
+    async def approve(self, token_address, max_approval):
+        token_address = to_checksum_address(token_address)
         if not self.demo_mode:
-            self.dex_client_wrapper.approve(token_address, max_approval)
+            await self.dex_client_wrapper.approve(token_address, max_approval)
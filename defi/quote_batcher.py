@@ -0,0 +1,39 @@
+from web3.contract.contract import ContractFunction
+
+from defi.multicall import Multicall
+from defi.windowed_batcher import WindowedBatcher
+from logger_config import logger
+
+
+class QuoteBatcher(WindowedBatcher):
+    """
+    Collects quoter calls requested within BATCH_WINDOW seconds and sends them
+    as one multicall. Each caller gets its own result or its own exception.
+    """
+
+    BATCH_WINDOW = 0.05  # seconds to wait for more quotes before sending a batch
+    MAX_BATCH_SIZE = Multicall.MAX_CALLS_PER_BATCH
+
+    def __init__(self, multicall: Multicall):
+        super().__init__()
+        self.multicall = multicall
+
+    async def quote(self, quote_call: ContractFunction) -> int:
+        return await self.submit(quote_call)
+
+    async def send_batch(self, batch):
+        quote_calls = [quote_call for quote_call, _ in batch]
+        logger.info(f"Sending {len(quote_calls)} quotes in one multicall")
+        try:
+            results = await self.multicall.try_aggregate(quote_calls)
+        except Exception as error:
+            self.fail_batch(batch, error)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():  # caller went away
+                continue
+            try:
+                future.set_result(self.multicall.unwrap(result))
+            except Exception as error:
+                future.set_exception(error)
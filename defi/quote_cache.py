@@ -0,0 +1,75 @@
+import asyncio
+
+from logger_config import logger
+from managers.block_tracker import BlockTracker
+
+
+class QuoteCache:
+    """
+    Caches quotes for the current block. Identical requests made while a quote
+    is in flight wait for that same call instead of sending their own, and all
+    entries are dropped as soon as a new block is seen.
+    """
+
+    def __init__(self, blockchain_manager):
+        self.blockchain_manager = blockchain_manager
+        self.block_tracker: BlockTracker = blockchain_manager.block_tracker
+        self.quotes = {}
+        self.in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.block_tracker.add_listener(self.on_new_block)
+
+    def on_new_block(self, block_number):
+        self.quotes.clear()
+
+    async def get(self, request, fetch_quote):
+        """
+        request is a hashable description of the quote, fetch_quote a coroutine
+        function performing the RPC call on a miss.
+        """
+        block_number = await self.block_tracker.get_block_number()
+        chain_name = self.blockchain_manager.get_current_chain().name
+        key = (chain_name, block_number, *request)
+
+        if key in self.quotes:
+            self.hits += 1
+            return self.quotes[key]
+
+        quote_task = self.in_flight.get(key)
+        if quote_task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            quote_task = asyncio.ensure_future(fetch_quote())
+            self.in_flight[key] = quote_task
+            quote_task.add_done_callback(
+                lambda task: self.on_quote_done(key, block_number, task)
+            )
+
+        # shield so that one cancelled caller does not cancel the shared call
+        return await asyncio.shield(quote_task)
+
+    def on_quote_done(self, key, block_number, task):
+        self.in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return  # errors are not cached
+        if block_number == self.block_tracker.block_number:
+            self.quotes[key] = task.result()
+
+    def get_stats(self):
+        requests = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "rpc_calls_saved": self.hits + self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / requests if requests else 0,
+        }
+
+    def log_and_reset_stats(self):
+        logger.info(f"Quote cache stats: {self.get_stats()}")
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
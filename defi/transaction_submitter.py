@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+from web3.exceptions import TransactionNotFound
+
+from logger_config import logger
+from models.pending_transaction import PendingTransaction
+
+
+class TransactionSubmitter:
+    """
+    Signs and sends transactions without waiting for them to be mined. Nonces
+    come from a local counter synced with the pending nonce, so several
+    transactions can be in flight at once, and a background watcher resolves
+    each PendingTransaction with its receipt.
+    """
+
+    POLL_INTERVAL = 1  # seconds between receipt polls
+    CONFIRMATION_TIMEOUT = 300  # seconds before a transaction is given up on
+
+    def __init__(self, async_web3_instance, account, get_gas_price):
+        self.async_web3_instance = async_web3_instance
+        self.account = account
+        self.get_gas_price = get_gas_price
+        self.next_nonce = None
+        self.nonce_lock = asyncio.Lock()
+        self.pending = {}
+        self.watch_task = None
+
+    async def allocate_nonce(self):
+        async with self.nonce_lock:
+            if self.next_nonce is None:
+                self.next_nonce = (
+                    await self.async_web3_instance.eth.get_transaction_count(
+                        self.account.address, "pending"
+                    )
+                )
+            nonce = self.next_nonce
+            self.next_nonce += 1
+            return nonce
+
+    def resync_nonce(self):
+        # re-read from the node on next use, e.g. after a failed send
+        self.next_nonce = None
+
+    async def submit(self, transaction, transaction_params=None) -> PendingTransaction:
+        """
+        transaction is a contract function call. Returns as soon as the node
+        accepted the signed transaction.
+        """
+        transaction_params = {
+            "from": self.account.address,
+            "gasPrice": await self.get_gas_price(),
+            **(transaction_params or {}),
+        }
+        try:
+            transaction_params["nonce"] = await self.allocate_nonce()
+            built_transaction = await transaction.build_transaction(transaction_params)
+            signed_transaction = self.account.sign_transaction(built_transaction)
+            tx_hash = await self.async_web3_instance.eth.send_raw_transaction(
+                signed_transaction.rawTransaction
+            )
+        except Exception:
+            self.resync_nonce()
+            raise
+
+        pending_transaction = PendingTransaction(
+            tx_hash.hex(), transaction_params["nonce"], time.time()
+        )
+        self.pending[pending_transaction.tx_hash] = pending_transaction
+        logger.info(
+            f"Sent transaction {pending_transaction.tx_hash} "
+            f"with nonce {pending_transaction.nonce}"
+        )
+        self.start()
+        return pending_transaction
+
+    def start(self):
+        if self.watch_task is None or self.watch_task.done():
+            self.watch_task = asyncio.ensure_future(self.watch_confirmations())
+
+    async def watch_confirmations(self):
+        while self.pending:
+            await asyncio.sleep(self.POLL_INTERVAL)
+            pending_transactions = list(self.pending.values())
+            receipts = await asyncio.gather(
+                *[
+                    self.async_web3_instance.eth.get_transaction_receipt(
+                        pending_transaction.tx_hash
+                    )
+                    for pending_transaction in pending_transactions
+                ],
+                return_exceptions=True,
+            )
+            for pending_transaction, receipt in zip(pending_transactions, receipts):
+                if isinstance(receipt, TransactionNotFound):
+                    if (
+                        time.time() - pending_transaction.sent_at
+                        > self.CONFIRMATION_TIMEOUT
+                    ):
+                        logger.error(
+                            f"Transaction {pending_transaction.tx_hash} not mined "
+                            f"after {self.CONFIRMATION_TIMEOUT}s"
+                        )
+                        self.resync_nonce()
+                        self.resolve(pending_transaction, None)
+                    continue
+                if isinstance(receipt, Exception):
+                    logger.error(
+                        f"Could not get receipt of {pending_transaction.tx_hash}: "
+                        f"{receipt}"
+                    )
+                    continue
+                self.resolve(pending_transaction, receipt)
+
+    def resolve(self, pending_transaction: PendingTransaction, receipt):
+        self.pending.pop(pending_transaction.tx_hash, None)
+        if receipt is not None:
+            logger.info(
+                f"Transaction {pending_transaction.tx_hash} mined "
+                f"with status {receipt['status']}"
+            )
+        if not pending_transaction.confirmation.done():
+            pending_transaction.confirmation.set_result(receipt)
@@ -0,0 +1,371 @@
+"""
+Integer ports of the Uniswap V3 core libraries (TickMath, SqrtPriceMath,
+SwapMath, TickBitmap) used to quote swaps from pool state without calling the
+Quoter. PancakeSwap V3 pools use the same math.
+
+Results match the Solidity implementation bit for bit, including rounding.
+"""
+from typing import Dict, Tuple
+
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+
+Q96 = 1 << 96
+MAX_UINT160 = (1 << 160) - 1
+MAX_UINT256 = (1 << 256) - 1
+FEE_DENOMINATOR = 1000000
+
+
+class InsufficientPoolStateError(Exception):
+    """Raised when a swap walks past the tick bitmap words that were loaded."""
+
+
+def mul_div(a: int, b: int, denominator: int) -> int:
+    return a * b // denominator
+
+
+def mul_div_rounding_up(a: int, b: int, denominator: int) -> int:
+    return -(-(a * b) // denominator)
+
+
+def div_rounding_up(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+# ------ TickMath ------------------------------------------------------------------
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    abs_tick = abs(tick)
+    if abs_tick > MAX_TICK:
+        raise ValueError(f"Tick {tick} out of range")
+
+    ratio = (
+        0xFFFCB933BD6FAD37AA2D162D1A594001
+        if abs_tick & 0x1
+        else 0x100000000000000000000000000000000
+    )
+    for bit, multiplier in (
+        (0x2, 0xFFF97272373D413259A46990580E213A),
+        (0x4, 0xFFF2E50F5F656932EF12357CF3C7FDCC),
+        (0x8, 0xFFE5CACA7E10E4E61C3624EAA0941CD0),
+        (0x10, 0xFFCB9843D60F6159C9DB58835C926644),
+        (0x20, 0xFF973B41FA98C081472E6896DFB254C0),
+        (0x40, 0xFF2EA16466C96A3843EC78B326B52861),
+        (0x80, 0xFE5DEE046A99A2A811C461F1969C3053),
+        (0x100, 0xFCBE86C7900A88AEDCFFC83B479AA3A4),
+        (0x200, 0xF987A7253AC413176F2B074CF7815E54),
+        (0x400, 0xF3392B0822B70005940C7A398E4B70F3),
+        (0x800, 0xE7159475A2C29B7443B29C7FA6E889D9),
+        (0x1000, 0xD097F3BDFD2022B8845AD8F792AA5825),
+        (0x2000, 0xA9F746462D870FDF8A65DC1F90E061E5),
+        (0x4000, 0x70D869A156D2A1B890BB3DF62BAF32F7),
+        (0x8000, 0x31BE135F97D08FD981231505542FCFA6),
+        (0x10000, 0x9AA508B5B7A84E1C677DE54F3E99BC9),
+        (0x20000, 0x5D6AF8DEDB81196699C329225EE604),
+        (0x40000, 0x2216E584F5FA1EA926041BEDFE98),
+        (0x80000, 0x48A170391F7DC42444E8FA2),
+    ):
+        if abs_tick & bit:
+            ratio = (ratio * multiplier) >> 128
+
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+
+    # round up so that getTickAtSqrtRatio of the output price is always consistent
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96: int) -> int:
+    """Greatest tick whose sqrt ratio is less than or equal to sqrt_price_x96."""
+    if not MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO:
+        raise ValueError(f"Sqrt price {sqrt_price_x96} out of range")
+
+    low, high = MIN_TICK, MAX_TICK
+    while low < high:
+        middle = (low + high + 1) // 2
+        if get_sqrt_ratio_at_tick(middle) <= sqrt_price_x96:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+# ------ SqrtPriceMath -------------------------------------------------------------
+def get_next_sqrt_price_from_amount0_rounding_up(
+    sqrt_price_x96: int, liquidity: int, amount: int, add: bool
+) -> int:
+    if amount == 0:
+        return sqrt_price_x96
+    numerator1 = liquidity << 96
+    product = amount * sqrt_price_x96
+
+    if add:
+        denominator = numerator1 + product
+        if product <= MAX_UINT256 and denominator <= MAX_UINT256:
+            return mul_div_rounding_up(numerator1, sqrt_price_x96, denominator)
+        return div_rounding_up(numerator1, numerator1 // sqrt_price_x96 + amount)
+
+    if product > MAX_UINT256 or numerator1 <= product:
+        raise ValueError("Not enough liquidity for the requested output")
+    next_sqrt_price = mul_div_rounding_up(
+        numerator1, sqrt_price_x96, numerator1 - product
+    )
+    if next_sqrt_price > MAX_UINT160:
+        raise ValueError("Sqrt price overflow")
+    return next_sqrt_price
+
+
+def get_next_sqrt_price_from_amount1_rounding_down(
+    sqrt_price_x96: int, liquidity: int, amount: int, add: bool
+) -> int:
+    if add:
+        next_sqrt_price = sqrt_price_x96 + mul_div(amount, Q96, liquidity)
+        if next_sqrt_price > MAX_UINT160:
+            raise ValueError("Sqrt price overflow")
+        return next_sqrt_price
+
+    quotient = mul_div_rounding_up(amount, Q96, liquidity)
+    if sqrt_price_x96 <= quotient:
+        raise ValueError("Not enough liquidity for the requested output")
+    return sqrt_price_x96 - quotient
+
+
+def get_next_sqrt_price_from_input(
+    sqrt_price_x96: int, liquidity: int, amount_in: int, zero_for_one: bool
+) -> int:
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount0_rounding_up(
+            sqrt_price_x96, liquidity, amount_in, True
+        )
+    return get_next_sqrt_price_from_amount1_rounding_down(
+        sqrt_price_x96, liquidity, amount_in, True
+    )
+
+
+def get_next_sqrt_price_from_output(
+    sqrt_price_x96: int, liquidity: int, amount_out: int, zero_for_one: bool
+) -> int:
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount1_rounding_down(
+            sqrt_price_x96, liquidity, amount_out, False
+        )
+    return get_next_sqrt_price_from_amount0_rounding_up(
+        sqrt_price_x96, liquidity, amount_out, False
+    )
+
+
+def get_amount0_delta(
+    sqrt_ratio_a_x96: int, sqrt_ratio_b_x96: int, liquidity: int, round_up: bool
+) -> int:
+    if sqrt_ratio_a_x96 > sqrt_ratio_b_x96:
+        sqrt_ratio_a_x96, sqrt_ratio_b_x96 = sqrt_ratio_b_x96, sqrt_ratio_a_x96
+    numerator1 = liquidity << 96
+    numerator2 = sqrt_ratio_b_x96 - sqrt_ratio_a_x96
+    if round_up:
+        return div_rounding_up(
+            mul_div_rounding_up(numerator1, numerator2, sqrt_ratio_b_x96),
+            sqrt_ratio_a_x96,
+        )
+    return mul_div(numerator1, numerator2, sqrt_ratio_b_x96) // sqrt_ratio_a_x96
+
+
+def get_amount1_delta(
+    sqrt_ratio_a_x96: int, sqrt_ratio_b_x96: int, liquidity: int, round_up: bool
+) -> int:
+    if sqrt_ratio_a_x96 > sqrt_ratio_b_x96:
+        sqrt_ratio_a_x96, sqrt_ratio_b_x96 = sqrt_ratio_b_x96, sqrt_ratio_a_x96
+    if round_up:
+        return mul_div_rounding_up(liquidity, sqrt_ratio_b_x96 - sqrt_ratio_a_x96, Q96)
+    return mul_div(liquidity, sqrt_ratio_b_x96 - sqrt_ratio_a_x96, Q96)
+
+
+# ------ SwapMath ------------------------------------------------------------------
+def compute_swap_step(
+    sqrt_ratio_current_x96: int,
+    sqrt_ratio_target_x96: int,
+    liquidity: int,
+    amount_remaining: int,
+    fee_pips: int,
+) -> Tuple[int, int, int, int]:
+    zero_for_one = sqrt_ratio_current_x96 >= sqrt_ratio_target_x96
+    exact_in = amount_remaining >= 0
+    amount_in = amount_out = 0
+
+    if exact_in:
+        amount_remaining_less_fee = mul_div(
+            amount_remaining, FEE_DENOMINATOR - fee_pips, FEE_DENOMINATOR
+        )
+        amount_in = (
+            get_amount0_delta(
+                sqrt_ratio_target_x96, sqrt_ratio_current_x96, liquidity, True
+            )
+            if zero_for_one
+            else get_amount1_delta(
+                sqrt_ratio_current_x96, sqrt_ratio_target_x96, liquidity, True
+            )
+        )
+        if amount_remaining_less_fee >= amount_in:
+            sqrt_ratio_next_x96 = sqrt_ratio_target_x96
+        else:
+            sqrt_ratio_next_x96 = get_next_sqrt_price_from_input(
+                sqrt_ratio_current_x96,
+                liquidity,
+                amount_remaining_less_fee,
+                zero_for_one,
+            )
+    else:
+        amount_out = (
+            get_amount1_delta(
+                sqrt_ratio_target_x96, sqrt_ratio_current_x96, liquidity, False
+            )
+            if zero_for_one
+            else get_amount0_delta(
+                sqrt_ratio_current_x96, sqrt_ratio_target_x96, liquidity, False
+            )
+        )
+        if -amount_remaining >= amount_out:
+            sqrt_ratio_next_x96 = sqrt_ratio_target_x96
+        else:
+            sqrt_ratio_next_x96 = get_next_sqrt_price_from_output(
+                sqrt_ratio_current_x96, liquidity, -amount_remaining, zero_for_one
+            )
+
+    reached_target = sqrt_ratio_target_x96 == sqrt_ratio_next_x96
+
+    if zero_for_one:
+        if not (reached_target and exact_in):
+            amount_in = get_amount0_delta(
+                sqrt_ratio_next_x96, sqrt_ratio_current_x96, liquidity, True
+            )
+        if not (reached_target and not exact_in):
+            amount_out = get_amount1_delta(
+                sqrt_ratio_next_x96, sqrt_ratio_current_x96, liquidity, False
+            )
+    else:
+        if not (reached_target and exact_in):
+            amount_in = get_amount1_delta(
+                sqrt_ratio_current_x96, sqrt_ratio_next_x96, liquidity, True
+            )
+        if not (reached_target and not exact_in):
+            amount_out = get_amount0_delta(
+                sqrt_ratio_current_x96, sqrt_ratio_next_x96, liquidity, False
+            )
+
+    # cap the output amount to not exceed the remaining output amount
+    if not exact_in and amount_out > -amount_remaining:
+        amount_out = -amount_remaining
+
+    if exact_in and sqrt_ratio_next_x96 != sqrt_ratio_target_x96:
+        # we didn't reach the target, so take the remainder of the maximum input as fee
+        fee_amount = amount_remaining - amount_in
+    else:
+        fee_amount = mul_div_rounding_up(
+            amount_in, fee_pips, FEE_DENOMINATOR - fee_pips
+        )
+
+    return sqrt_ratio_next_x96, amount_in, amount_out, fee_amount
+
+
+# ------ TickBitmap ----------------------------------------------------------------
+def next_initialized_tick_within_one_word(
+    tick_bitmap: Dict[int, int], tick: int, tick_spacing: int, lte: bool
+) -> Tuple[int, bool]:
+    compressed = tick // tick_spacing  # floor division rounds towards negative infinity
+
+    if lte:
+        word_pos, bit_pos = compressed >> 8, compressed & 0xFF
+        if word_pos not in tick_bitmap:
+            raise InsufficientPoolStateError(f"Tick bitmap word {word_pos} not loaded")
+        mask = (1 << bit_pos) - 1 + (1 << bit_pos)
+        masked = tick_bitmap[word_pos] & mask
+        initialized = masked != 0
+        if initialized:
+            next_tick = (
+                compressed - (bit_pos - (masked.bit_length() - 1))
+            ) * tick_spacing
+        else:
+            next_tick = (compressed - bit_pos) * tick_spacing
+        return next_tick, initialized
+
+    compressed += 1
+    word_pos, bit_pos = compressed >> 8, compressed & 0xFF
+    if word_pos not in tick_bitmap:
+        raise InsufficientPoolStateError(f"Tick bitmap word {word_pos} not loaded")
+    mask = MAX_UINT256 ^ ((1 << bit_pos) - 1)
+    masked = tick_bitmap[word_pos] & mask
+    initialized = masked != 0
+    if initialized:
+        least_significant_bit = (masked & -masked).bit_length() - 1
+        next_tick = (compressed + (least_significant_bit - bit_pos)) * tick_spacing
+    else:
+        next_tick = (compressed + (255 - bit_pos)) * tick_spacing
+    return next_tick, initialized
+
+
+# ------ Pool swap -----------------------------------------------------------------
+def simulate_swap(
+    sqrt_price_x96: int,
+    tick: int,
+    liquidity: int,
+    fee: int,
+    tick_spacing: int,
+    tick_bitmap: Dict[int, int],
+    liquidity_net: Dict[int, int],
+    zero_for_one: bool,
+    amount_specified: int,
+) -> Tuple[int, int]:
+    """
+    Replays UniswapV3Pool.swap without a price limit, as the Quoter does.
+    amount_specified is positive for exact input and negative for exact output.
+    Returns the (amount0, amount1) pool deltas.
+    """
+    sqrt_price_limit_x96 = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+    exact_input = amount_specified > 0
+    amount_specified_remaining = amount_specified
+    amount_calculated = 0
+
+    while amount_specified_remaining != 0 and sqrt_price_x96 != sqrt_price_limit_x96:
+        sqrt_price_start_x96 = sqrt_price_x96
+        tick_next, initialized = next_initialized_tick_within_one_word(
+            tick_bitmap, tick, tick_spacing, zero_for_one
+        )
+        tick_next = min(max(tick_next, MIN_TICK), MAX_TICK)
+        sqrt_price_next_x96 = get_sqrt_ratio_at_tick(tick_next)
+
+        if zero_for_one:
+            use_limit = sqrt_price_next_x96 < sqrt_price_limit_x96
+        else:
+            use_limit = sqrt_price_next_x96 > sqrt_price_limit_x96
+        sqrt_price_target_x96 = (
+            sqrt_price_limit_x96 if use_limit else sqrt_price_next_x96
+        )
+
+        sqrt_price_x96, amount_in, amount_out, fee_amount = compute_swap_step(
+            sqrt_price_x96,
+            sqrt_price_target_x96,
+            liquidity,
+            amount_specified_remaining,
+            fee,
+        )
+
+        if exact_input:
+            amount_specified_remaining -= amount_in + fee_amount
+            amount_calculated -= amount_out
+        else:
+            amount_specified_remaining += amount_out
+            amount_calculated += amount_in + fee_amount
+
+        if sqrt_price_x96 == sqrt_price_next_x96:
+            if initialized:
+                net = liquidity_net.get(tick_next)
+                if net is None:
+                    raise InsufficientPoolStateError(f"Tick {tick_next} not loaded")
+                liquidity += -net if zero_for_one else net
+            tick = tick_next - 1 if zero_for_one else tick_next
+        elif sqrt_price_x96 != sqrt_price_start_x96:
+            tick = get_tick_at_sqrt_ratio(sqrt_price_x96)
+
+    if zero_for_one == exact_input:
+        return amount_specified - amount_specified_remaining, amount_calculated
+    return amount_calculated, amount_specified - amount_specified_remaining
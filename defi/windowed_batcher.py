@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, List, Tuple
+
+
+class WindowedBatcher:
+    """
+    Collects requests made within BATCH_WINDOW seconds and hands them to
+    send_batch together, or as soon as MAX_BATCH_SIZE are pending. A batch is
+    a list of (request, future) pairs; send_batch resolves each future with
+    the result of its request, or with an exception.
+    """
+
+    BATCH_WINDOW = 0.05  # seconds to wait for more requests before sending
+    MAX_BATCH_SIZE = 100
+
+    def __init__(self):
+        self.pending: List[Tuple[Any, asyncio.Future]] = []
+        self.flush_handle = None
+        self.batch_tasks = set()
+
+    async def submit(self, request):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((request, future))
+
+        if len(self.pending) >= self.MAX_BATCH_SIZE:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.BATCH_WINDOW, self.flush)
+
+        return await future
+
+    def flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        batch = self.pending
+        self.pending = []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self.send_batch(batch))
+        # keep a reference so the task is not garbage collected while running
+        self.batch_tasks.add(task)
+        task.add_done_callback(self.batch_tasks.discard)
+
+    async def send_batch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        raise NotImplementedError
+
+    def fail_batch(self, batch, error):
+        for _, future in batch:
+            if not future.done():  # caller went away
+                future.set_exception(error)
@@ -0,0 +1,131 @@
+from decimal import Decimal
+
+import numpy as np
+
+from managers.trade_evaluator import TradeEvaluator
+from models.batch_evaluation import BuyEvaluation, SellEvaluation
+
+
+class BatchTradeEvaluator:
+    """
+    Evaluates the buy thresholds of the whole watchlist and the ROI targets of
+    every monitored token in one vectorized pass over float64 arrays, with the
+    gas cost read once per pass instead of once per token.
+
+    Rows landing within REL_TOLERANCE of a threshold are decided again with
+    the Decimal arithmetic of TradeEvaluator, so the actions match those of
+    evaluating each token on its own.
+    """
+
+    REL_TOLERANCE = 1e-9
+
+    def __init__(self, trade_evaluator: TradeEvaluator):
+        self.trade_evaluator = trade_evaluator
+        self.data_manager = trade_evaluator.data_manager
+
+    def to_array(self, values):
+        # token amounts outgrow int64, float() rounds them like the scalar code
+        values = list(values)
+        return np.fromiter(
+            (float(value) for value in values), dtype=np.float64, count=len(values)
+        )
+
+    def is_near(self, values, thresholds):
+        return np.abs(values - thresholds) <= self.REL_TOLERANCE * np.maximum(
+            np.abs(values), np.abs(thresholds)
+        )
+
+    def evaluate_buys(self, current_token_amounts, token_base_values) -> BuyEvaluation:
+        """
+        current_token_amounts are the tokens the trade amount buys now, -1 for
+        failed quotes, token_base_values the amounts when they were watchlisted.
+        """
+        current = self.to_array(current_token_amounts)
+        base = self.to_array(token_base_values)
+        config = self.data_manager.config
+        price_increase_threshold = float(
+            Decimal(str(config["price_increase_threshold"]))
+        )
+        price_decrease_multiplier = float(
+            1 / Decimal(str(config["price_decrease_threshold"]))
+        )
+
+        increased_threshold_amounts = base / price_increase_threshold
+        decreased_threshold_amounts = base * price_decrease_multiplier
+
+        valid = current >= 0
+        decreased = base > decreased_threshold_amounts
+        increased = current < increased_threshold_amounts
+        buy = valid & ~decreased & increased
+        keep_watching = valid & ~decreased & ~increased & (current > 0)
+
+        ambiguous = np.flatnonzero(
+            valid
+            & (
+                self.is_near(base, decreased_threshold_amounts)
+                | self.is_near(current, increased_threshold_amounts)
+            )
+        )
+        for index in ambiguous:
+            buy[index], keep_watching[index] = self.trade_evaluator.evaluate_buy(
+                current_token_amounts[index], token_base_values[index]
+            )
+
+        return BuyEvaluation(buy, keep_watching, len(ambiguous))
+
+    def evaluate_sells(
+        self,
+        expected_amounts,
+        current_token_amounts,
+        token_base_values,
+        original_investments,
+        fees,
+        total_gas_cost,
+    ) -> SellEvaluation:
+        """
+        expected_amounts are the native amounts the balances sell for now,
+        current_token_amounts the tokens the original investments buy now, -1
+        for failed quotes; a position is only evaluated when both quotes
+        succeeded. total_gas_cost is the gas of a buy and a sell.
+        """
+        expected = self.to_array(expected_amounts)
+        current = self.to_array(current_token_amounts)
+        base = self.to_array(token_base_values)
+        investment = self.to_array(original_investments)
+        fee = self.to_array(fees)
+        price_decrease_threshold = float(
+            self.data_manager.config["price_decrease_threshold"]
+        )
+        desired_profit_percentage = float(
+            1 + self.trade_evaluator.profit_margin + Decimal("0.00001")
+        )
+
+        valid = (expected >= 0) & (current >= 0) & (investment > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            current_roi = np.where(valid & (base > 0), expected / investment, 0.0)
+            # TradeEvaluator.calculate_roi_multiplier_for_gas with the costs
+            # of two transactions expanded
+            net_token_share = 1 / (1 + (fee / 1000000 + 0.01) * 2)
+            expected_roi = desired_profit_percentage * (
+                2 + 2 * float(total_gas_cost) / investment - net_token_share
+            )
+        expected_roi[~valid] = 0.0
+
+        sell = valid & (
+            (current_roi >= expected_roi) | (current_roi < price_decrease_threshold)
+        )
+
+        ambiguous = np.flatnonzero(valid & self.is_near(current_roi, expected_roi))
+        for index in ambiguous:
+            expected_roi_multiplier = (
+                self.trade_evaluator.calculate_roi_multiplier_for_gas(
+                    original_investments[index], fees[index], total_gas_cost
+                )
+            )
+            current_roi_multiplier = float(current_roi[index])
+            sell[index] = (current_roi_multiplier >= expected_roi_multiplier) or (
+                current_roi_multiplier < price_decrease_threshold
+            )
+            expected_roi[index] = float(expected_roi_multiplier)
+
+        return SellEvaluation(valid, sell, current_roi, expected_roi, len(ambiguous))
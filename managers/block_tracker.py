@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+from logger_config import logger
+
+
+class BlockTracker:
+    """
+    Keeps track of the latest block number of the current chain, polling the
+    provider at most once per POLL_INTERVAL, and notifies listeners when a new
+    block arrives.
+    """
+
+    POLL_INTERVAL = 1  # seconds between block number polls
+
+    def __init__(self, blockchain_manager):
+        self.blockchain_manager = blockchain_manager
+        self.block_number = None
+        self.checked_at = 0
+        self.listeners = []
+        self.lock = asyncio.Lock()
+
+    def add_listener(self, callback):
+        # callback(block_number) is called once for every new block seen
+        self.listeners.append(callback)
+
+    def reset(self):
+        self.block_number = None
+        self.checked_at = 0
+
+    def is_fresh(self):
+        return (
+            self.block_number is not None
+            and time.time() - self.checked_at < self.POLL_INTERVAL
+        )
+
+    async def get_block_number(self):
+        if self.is_fresh():
+            return self.block_number
+
+        async with self.lock:  # concurrent callers share one poll
+            if self.is_fresh():
+                return self.block_number
+            block_number = (
+                await self.blockchain_manager.async_web3_instance.eth.block_number
+            )
+            self.checked_at = time.time()
+            if block_number != self.block_number:
+                self.set_block_number(block_number)
+        return self.block_number
+
+    def set_block_number(self, block_number):
+        self.block_number = block_number
+        for listener in self.listeners:
+            try:
+                listener(block_number)
+            except Exception as error:
+                logger.error(f"Block listener failed for block {block_number}: {error}")
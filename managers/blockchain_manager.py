@@ -1,13 +1,18 @@
+import asyncio
 import json
 import os
 from enum import Enum
-from itertools import cycle
 
 from dotenv import load_dotenv
-from web3 import Web3
+from web3 import AsyncWeb3, Web3
 from web3.middleware import geth_poa_middleware
 
+from defi.transaction_submitter import TransactionSubmitter
 from logger_config import logger
+from managers.block_tracker import BlockTracker
+from managers.contract_registry import ContractRegistry
+from managers.gas_oracle import GasOracle
+from managers.provider_pool import ProviderPool
 from models.chain_constants import SelectedChain
 from models.dextrade_chain_data import DexTradeChainData
 
@@ -22,14 +27,31 @@ load_dotenv(dotenv_path)
 
 
 class BlockchainManager:
-    def __init__(self, current_chain_num: SelectedChain):
+    def __init__(
+        self,
+        current_chain_num: SelectedChain,
+        max_concurrent_requests=20,
+        gas_refresh_interval=3,
+    ):
         self.supported_chains = self.get_supported_chains()
         self.erc20_abi = self.load_erc20_abi()
+        self.block_tracker = BlockTracker(self)
+        self.gas_oracle = GasOracle(self, gas_refresh_interval)
         self.set_current_chain(current_chain_num)
         self.current_native_token_address = self.current_chain.native_token_address
         short_name = self.current_chain.short_name.upper()
         provider_urls = json.loads(os.environ[f"{short_name}_PROVIDER_URLS"])
-        self.provider_urls = cycle(provider_urls)
+        self.provider_pool = ProviderPool(provider_urls)
+        # bounds the number of RPC requests in flight across the whole bot
+        self.rpc_semaphore = asyncio.Semaphore(max_concurrent_requests)
+
+        # Reads go through the provider pool, which routes every request to
+        # the healthiest endpoint over a persistent session per endpoint
+        self.async_web3_instance: AsyncWeb3 = AsyncWeb3(self.provider_pool)
+        self.async_web3_instance.middleware_onion.add(
+            self.limit_concurrency_middleware, "limit_concurrency"
+        )
+        self.contract_registry = ContractRegistry(self.async_web3_instance)
 
         self.set_provider()
         self.wallet_private_key = os.environ["WALLET_PRIVATE_KEY"]
@@ -38,16 +60,26 @@ class BlockchainManager:
         )
         self.web3_instance.eth.default_account = self.main_account.address
         self.wallet_address = self.main_account.address
+        self.transaction_submitter = TransactionSubmitter(
+            self.async_web3_instance, self.main_account, self.get_gas_price
+        )
         self.gas_limit_per_transaction = 150000  # example gas limit
 
     def set_provider(self):
-        provider_url = next(self.provider_urls)
+        provider_url = self.provider_pool.get_best_url()
         os.environ["PROVIDER"] = provider_url
         self.web3_instance: Web3 = Web3(Web3.HTTPProvider(provider_url))
         # self.web3_instance.middleware_onion.inject(
         #     geth_poa_middleware, layer=0
         # )  # Required for some Ethereum networks
 
+    async def limit_concurrency_middleware(self, make_request, async_web3):
+        async def middleware(method, params):
+            async with self.rpc_semaphore:
+                return await make_request(method, params)
+
+        return middleware
+
     def get_wallet_address(self):
         return self.wallet_address
 
@@ -71,6 +103,9 @@ class BlockchainManager:
                 chain_data["native_token_name"],
                 chain_data["native_token_address"],
                 chain_data["supported_dex"],
+                chain_data["multicall_address"],
+                chain_data["pool_deployer_address"],
+                chain_data["pool_init_code_hash"],
             )
             for chain_data in supported_chains_data
         }
@@ -91,32 +126,39 @@ class BlockchainManager:
     def set_current_chain(self, selected_chain_enum: Enum):
         self.current_chain = self.supported_chains.get(selected_chain_enum.value)
         self.current_native_token_address = self.current_chain.native_token_address
+        self.block_tracker.reset()
+        self.gas_oracle.reset()
 
     def get_current_chain(self):
         return self.current_chain
 
-    def get_token_balance(self, wallet_address, token_address):
-        token_address = self.web3_instance.to_checksum_address(token_address)
-        token_contract = self.web3_instance.eth.contract(
-            address=token_address, abi=self.erc20_abi
+    async def get_token_balance(self, wallet_address, token_address):
+        token_contract = self.get_contract(token_address, "erc20", self.erc20_abi)
+        return await token_contract.functions.balanceOf(wallet_address).call()
+
+    def get_contract(self, address, abi_name, abi):
+        return self.contract_registry.get_contract(
+            self.current_chain.name, address, abi_name, abi
         )
-        return token_contract.functions.balanceOf(wallet_address).call()
+
+    async def get_gas_price(self):
+        return await self.gas_oracle.get_gas_price()
 
     def get_supported_dex(self):
         chain = self.get_current_chain()
         supported_dex = chain.supported_dex
         return supported_dex
 
-    def calculate_gas_cost_wei(self, num_transactions=2):
+    async def calculate_gas_cost_wei(self, num_transactions=2):
         gas_limit_per_transaction = self.gas_limit_per_transaction
-        gas_price_gwei = self.web3_instance.eth.gas_price
+        gas_price_gwei = await self.get_gas_price()
         gas_cost_per_transaction_wei = gas_price_gwei * gas_limit_per_transaction
         total_gas_fees_wei = gas_cost_per_transaction_wei * num_transactions
         return total_gas_fees_wei
 
-    def calculate_gas_cost_eth(self, num_transactions=2):
+    async def calculate_gas_cost_eth(self, num_transactions=2):
         gas_limit_per_transaction = self.gas_limit_per_transaction
-        gas_price_gwei = self.web3_instance.eth.gas_price
+        gas_price_gwei = await self.get_gas_price()
         gas_cost_per_transaction_wei = gas_price_gwei * gas_limit_per_transaction
         total_gas_fees_wei = gas_cost_per_transaction_wei * num_transactions
         total_gas_fees_eth = self.web3_instance.from_wei(total_gas_fees_wei, "ether")
@@ -0,0 +1,42 @@
+from collections import OrderedDict
+
+from utils import to_checksum_address
+
+
+class ContractRegistry:
+    """
+    Bounded LRU cache of contract objects keyed by (chain, address, abi name),
+    so that hot paths stop rebuilding the same contracts on every call.
+    """
+
+    MAX_CONTRACTS = 512
+
+    def __init__(self, web3_instance, max_contracts=MAX_CONTRACTS):
+        self.web3_instance = web3_instance
+        self.max_contracts = max_contracts
+        self.contracts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_contract(self, chain_name, address, abi_name, abi):
+        address = to_checksum_address(address)
+        key = (chain_name, address, abi_name)
+        contract = self.contracts.get(key)
+        if contract is not None:
+            self.hits += 1
+            self.contracts.move_to_end(key)
+            return contract
+
+        self.misses += 1
+        contract = self.web3_instance.eth.contract(address=address, abi=abi)
+        self.contracts[key] = contract
+        if len(self.contracts) > self.max_contracts:
+            self.contracts.popitem(last=False)
+        return contract
+
+    def get_stats(self):
+        return {
+            "contracts": len(self.contracts),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,92 @@
+import asyncio
+import time
+from statistics import median
+
+from logger_config import logger
+from models.gas_fees import GasFees
+
+
+class GasOracle:
+    """
+    Keeps the current gas price, base fee and priority fee percentiles in
+    memory. A background task polls the block number every refresh_interval
+    seconds and reloads the fees once per new block, so readers never wait
+    on an RPC except for the very first read.
+    """
+
+    FEE_HISTORY_BLOCKS = 5  # blocks averaged for the priority fee percentiles
+    REWARD_PERCENTILES = [10, 50, 90]
+
+    def __init__(self, blockchain_manager, refresh_interval=3):
+        self.blockchain_manager = blockchain_manager
+        self.refresh_interval = refresh_interval
+        self.fees: GasFees = None
+        self.refresh_task = None
+        self.lock = asyncio.Lock()
+
+    def reset(self):
+        self.fees = None
+
+    async def get_fees(self) -> GasFees:
+        self.start()
+        if self.fees is None:
+            await self.refresh()
+        return self.fees
+
+    async def get_gas_price(self):
+        return (await self.get_fees()).gas_price
+
+    async def get_base_fee(self):
+        return (await self.get_fees()).base_fee
+
+    async def get_priority_fee(self, percentile=50):
+        return (await self.get_fees()).priority_fees.get(percentile)
+
+    def start(self):
+        if self.refresh_task is None or self.refresh_task.done():
+            self.refresh_task = asyncio.ensure_future(self.refresh_loop())
+
+    async def refresh_loop(self):
+        while True:
+            try:
+                block_number = (
+                    await self.blockchain_manager.block_tracker.get_block_number()
+                )
+                if self.fees is None or self.fees.block_number != block_number:
+                    await self.refresh(block_number)
+            except Exception as error:
+                logger.error(f"Gas oracle refresh failed: {error}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self, block_number=None):
+        async with self.lock:  # the first readers share one load
+            if block_number is None:
+                if self.fees is not None:
+                    return
+                block_number = (
+                    await self.blockchain_manager.block_tracker.get_block_number()
+                )
+            elif self.fees is not None and self.fees.block_number == block_number:
+                return
+
+            eth = self.blockchain_manager.async_web3_instance.eth
+            gas_price, fee_history = await asyncio.gather(
+                eth.gas_price,
+                eth.fee_history(
+                    self.FEE_HISTORY_BLOCKS, "latest", self.REWARD_PERCENTILES
+                ),
+                return_exceptions=True,
+            )
+            if isinstance(gas_price, Exception):
+                raise gas_price
+
+            fees = GasFees(block_number, gas_price, updated_at=time.time())
+            if not isinstance(fee_history, Exception):
+                # the last entry is the base fee of the next block
+                fees.base_fee = fee_history["baseFeePerGas"][-1]
+                rewards = fee_history.get("reward") or []
+                for index, percentile in enumerate(self.REWARD_PERCENTILES):
+                    samples = [reward[index] for reward in rewards if reward]
+                    if samples:
+                        fees.priority_fees[percentile] = int(median(samples))
+            self.fees = fees
@@ -0,0 +1,135 @@
+import asyncio
+import json
+
+import aiohttp
+
+from logger_config import logger
+from managers.graphql_stream_parser import GraphQLStreamParser
+
+
+class GraphQLError(Exception):
+    pass
+
+
+class GraphQLClient:
+    """
+    Async GraphQL client keeping one pooled aiohttp session. Every request
+    has a deadline, failed requests are retried with exponential backoff
+    without blocking the event loop, and at most MAX_CONCURRENT_REQUESTS are
+    in flight at once.
+    """
+
+    MAX_RETRIES = 3
+    RETRY_DELAY = 1  # seconds before the first retry, doubled on each retry
+    REQUEST_TIMEOUT = 30  # seconds per request
+    MAX_CONCURRENT_REQUESTS = 4
+    STREAM_CHUNK_SIZE = 64 * 1024  # bytes read from a streamed body at a time
+
+    def __init__(self):
+        self.session: aiohttp.ClientSession = None
+        self.semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+
+    def get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.MAX_CONCURRENT_REQUESTS),
+                timeout=aiohttp.ClientTimeout(total=self.REQUEST_TIMEOUT),
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    async def query(self, url, query, variables=None):
+        """Returns the "data" of the response, or None once all retries failed."""
+        data, _ = await self.query_with_size(url, query, variables)
+        return data
+
+    async def query_with_size(self, url, query, variables=None):
+        """Like query, also returning the size of the response body in bytes."""
+        payload = {"query": query}
+        if variables:
+            payload["variables"] = variables
+
+        for retry in range(self.MAX_RETRIES):
+            try:
+                async with self.semaphore:
+                    async with self.get_session().post(url, json=payload) as response:
+                        response.raise_for_status()
+                        body = await response.read()
+                data = json.loads(body)
+
+                if "data" in data:
+                    return data["data"], len(body)
+                logger.error(
+                    "Unexpected response format from The Graph API. "
+                    f"Data not found: {data.get('errors')}"
+                )
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                ValueError,
+                json.JSONDecodeError,
+            ) as error_message:
+                logger.error(
+                    f"Error occurred while calling The Graph API: {error_message!r}"
+                )
+
+            if retry < self.MAX_RETRIES - 1:
+                delay = self.RETRY_DELAY * 2**retry
+                logger.error(f"Retrying in {delay} seconds...")
+                await asyncio.sleep(delay)
+
+        logger.error("Max retries exceeded. Exiting...")
+        return None, 0
+
+    async def stream_query(self, url, query, variables=None):
+        """
+        Yields (field, item) for every item of the list fields of "data" while
+        the body downloads. Retries until the first item was yielded, then
+        raises GraphQLError when the request fails.
+        """
+        payload = {"query": query}
+        if variables:
+            payload["variables"] = variables
+
+        for retry in range(self.MAX_RETRIES):
+            yielded = False
+            try:
+                async with self.semaphore:
+                    async with self.get_session().post(url, json=payload) as response:
+                        response.raise_for_status()
+                        parser = GraphQLStreamParser()
+                        async for chunk in response.content.iter_chunked(
+                            self.STREAM_CHUNK_SIZE
+                        ):
+                            for item in parser.feed(chunk):
+                                yielded = True
+                                yield item
+                        data = parser.close()
+
+                if "data" in data:
+                    return
+                logger.error(
+                    "Unexpected response format from The Graph API. "
+                    f"Data not found: {data.get('errors')}"
+                )
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                ValueError,
+                json.JSONDecodeError,
+            ) as error_message:
+                logger.error(
+                    f"Error occurred while calling The Graph API: {error_message!r}"
+                )
+                if yielded:
+                    raise GraphQLError("Response failed part way through") from None
+
+            if retry < self.MAX_RETRIES - 1:
+                delay = self.RETRY_DELAY * 2**retry
+                logger.error(f"Retrying in {delay} seconds...")
+                await asyncio.sleep(delay)
+
+        raise GraphQLError("Max retries exceeded")
@@ -0,0 +1,121 @@
+import codecs
+import json
+import re
+
+WHITESPACE = re.compile(r"\s*")
+DATA_START = re.compile(r'\{\s*"data"\s*:\s*\{')
+FIELD_NAME = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*')
+VALUE_END = frozenset(",]} \t\r\n")
+
+
+class GraphQLStreamParser:
+    """
+    Incremental parser for GraphQL responses shaped like
+    {"data": {"<field>": [{...}, ...], ...}}. feed() takes the body chunk by
+    chunk and returns the list items completed so far as (field, item) pairs,
+    so only the unparsed tail of the body is held in memory instead of the
+    whole body and its dict tree.
+
+    A body that does not start with "data" (an error response) is buffered
+    and decoded whole by close().
+    """
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.state = "start"
+        self.field_name = None
+        # non-list fields, plus the whole response once buffered
+        self.values = {}
+
+    def feed(self, chunk: bytes):
+        self.buffer += self.text_decoder.decode(chunk)
+        if self.state == "buffered":
+            return []
+        items = []
+        position = 0
+        while True:
+            position = WHITESPACE.match(self.buffer, position).end()
+            if position >= len(self.buffer):
+                break
+            next_position = self.step(position, items)
+            if next_position is None:  # wait for more of the body
+                break
+            position = next_position
+        if self.state != "buffered":
+            self.buffer = self.buffer[position:]
+        return items
+
+    def step(self, position, items):
+        char = self.buffer[position]
+        if self.state == "start":
+            match = DATA_START.match(self.buffer, position)
+            if match:
+                self.state = "fields"
+                return match.end()
+            if len(self.buffer) - position < 32:
+                return None
+            self.state = "buffered"
+            return None
+
+        if self.state == "fields":
+            if char == ",":
+                return position + 1
+            if char == "}":
+                self.state = "end"
+                return position + 1
+            match = FIELD_NAME.match(self.buffer, position)
+            if not match or match.end() >= len(self.buffer):
+                return None
+            self.field_name = json.loads(f'"{match.group(1)}"')
+            if self.buffer[match.end()] == "[":
+                self.state = "items"
+                return match.end() + 1
+            value, end = self.decode(match.end())
+            if value is None and end is None:
+                return None
+            self.values[self.field_name] = value
+            return end
+
+        if self.state == "items":
+            if char == ",":
+                return position + 1
+            if char == "]":
+                self.state = "fields"
+                return position + 1
+            item, end = self.decode(position)
+            if end is None:
+                return None
+            items.append((self.field_name, item))
+            return end
+
+        # "end": only the closing brace of the response is left
+        return position + 1
+
+    def decode(self, position):
+        try:
+            value, end = self.decoder.raw_decode(self.buffer, position)
+        except json.JSONDecodeError:
+            return None, None
+        # a number cut by the chunk boundary decodes as its start, "123" of
+        # "123456" or "-0" of "-0.5", so it only counts once the character
+        # after it is in the buffer and ends it. Objects, lists and strings
+        # end with their closing character.
+        if not isinstance(value, (dict, list, str)) and (
+            end >= len(self.buffer) or self.buffer[end] not in VALUE_END
+        ):
+            return None, None
+        return value, end
+
+    def close(self):
+        """
+        Returns the non-list fields of "data", or for a buffered body the
+        decoded response. Raises ValueError when the body was incomplete.
+        """
+        self.buffer += self.text_decoder.decode(b"", final=True)
+        if self.state in ("start", "buffered"):
+            return json.loads(self.buffer)
+        if self.state != "end":
+            raise ValueError("GraphQL response body ended early")
+        return {"data": self.values}
@@ -0,0 +1,36 @@
+from defi.windowed_batcher import WindowedBatcher
+from logger_config import logger
+from managers.subgraph_manager import SubgraphManager
+from models.defi_structures import Pool
+
+
+class PoolDataBatcher(WindowedBatcher):
+    """
+    Collects pool metric lookups requested within BATCH_WINDOW seconds and
+    fetches them with one get_pools_many call. Lookups of the same pool in a
+    window share the result; a pool the subgraph does not return resolves to
+    None.
+    """
+
+    BATCH_WINDOW = 0.1  # seconds to wait for more lookups before querying
+    MAX_BATCH_SIZE = SubgraphManager.POOL_BATCH_SIZE
+
+    def __init__(self, subgraph_manager: SubgraphManager):
+        super().__init__()
+        self.subgraph_manager = subgraph_manager
+
+    async def get_pool(self, pool_id) -> Pool:
+        return await self.submit(pool_id.lower())
+
+    async def send_batch(self, batch):
+        pool_ids = list(dict.fromkeys(pool_id for pool_id, _ in batch))
+        logger.info(f"Fetching metrics of {len(pool_ids)} pools in one subgraph query")
+        try:
+            pools = await self.subgraph_manager.get_pools_many(pool_ids)
+        except Exception as error:
+            self.fail_batch(batch, error)
+            return
+
+        for pool_id, future in batch:
+            if not future.done():  # caller went away
+                future.set_result(pools.get(pool_id))
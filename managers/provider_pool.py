@@ -0,0 +1,144 @@
+import time
+from typing import Any, Dict, List
+
+from aiohttp import ClientResponseError
+from web3.providers.async_base import AsyncBaseProvider
+from web3.providers.async_rpc import AsyncHTTPProvider
+
+from logger_config import logger
+from models.provider_stats import ProviderStats
+
+RATE_LIMIT_ERROR_CODES = (-32005, 429)
+
+
+class ProviderPool(AsyncBaseProvider):
+    """
+    Async provider spreading requests over several RPC endpoints. Each request
+    goes to the endpoint with the best latency and error rate; rate limited or
+    failing endpoints are ejected for a cooldown and the request is retried on
+    the next one. Every endpoint keeps its own persistent aiohttp session.
+    """
+
+    SMOOTHING = 0.2  # weight of the newest sample in the moving averages
+    ERROR_PENALTY = 10  # how strongly the error rate worsens an endpoint's score
+    MAX_CONSECUTIVE_ERRORS = 3  # errors in a row before an endpoint is ejected
+    ERROR_COOLDOWN = 60  # seconds an erroring endpoint is left out
+    RATE_LIMIT_COOLDOWN = 30  # seconds a rate limited endpoint is left out
+
+    def __init__(self, provider_urls: List[str]):
+        super().__init__()
+        self.providers: Dict[str, AsyncHTTPProvider] = {
+            url: AsyncHTTPProvider(url) for url in provider_urls
+        }
+        self.stats: Dict[str, ProviderStats] = {
+            url: ProviderStats(url) for url in provider_urls
+        }
+
+    def score(self, stats: ProviderStats):
+        # lower is better; the error rate is also added on its own so that an
+        # endpoint that never answered ranks below the ones that did
+        return (
+            stats.latency * (1 + self.ERROR_PENALTY * stats.error_rate)
+            + stats.error_rate
+        )
+
+    def get_ranked_urls(self):
+        now = time.time()
+        available = [
+            stats for stats in self.stats.values() if stats.ejected_until <= now
+        ]
+        if not available:
+            # everything is ejected, use whatever comes back first
+            return [
+                stats.url
+                for stats in sorted(self.stats.values(), key=lambda s: s.ejected_until)
+            ]
+        return [stats.url for stats in sorted(available, key=self.score)]
+
+    def get_best_url(self):
+        return self.get_ranked_urls()[0]
+
+    async def make_request(self, method, params: Any):
+        last_error = None
+        for url in self.get_ranked_urls():
+            stats = self.stats[url]
+            started_at = time.time()
+            try:
+                response = await self.providers[url].make_request(method, params)
+            except ClientResponseError as error:
+                self.record_failure(stats, rate_limited=error.status == 429)
+                last_error = error
+                continue
+            except Exception as error:
+                self.record_failure(stats)
+                last_error = error
+                continue
+
+            if self.is_rate_limited(response):
+                self.record_failure(stats, rate_limited=True)
+                last_error = response["error"]
+                continue
+
+            self.record_success(stats, time.time() - started_at)
+            return response
+
+        raise ConnectionError(f"All RPC providers failed for {method}: {last_error}")
+
+    def is_rate_limited(self, response):
+        error = response.get("error")
+        if not isinstance(error, dict):
+            return False
+        return (
+            error.get("code") in RATE_LIMIT_ERROR_CODES
+            or "rate limit" in str(error.get("message", "")).lower()
+        )
+
+    def record_success(self, stats: ProviderStats, latency):
+        stats.requests += 1
+        stats.consecutive_errors = 0
+        stats.latency = (
+            latency
+            if stats.latency == 0
+            else stats.latency + self.SMOOTHING * (latency - stats.latency)
+        )
+        stats.error_rate -= self.SMOOTHING * stats.error_rate
+
+    def record_failure(self, stats: ProviderStats, rate_limited=False):
+        stats.requests += 1
+        stats.errors += 1
+        stats.consecutive_errors += 1
+        stats.error_rate += self.SMOOTHING * (1 - stats.error_rate)
+
+        if rate_limited:
+            stats.rate_limited += 1
+            self.eject(stats, self.RATE_LIMIT_COOLDOWN, "rate limited")
+        elif stats.consecutive_errors >= self.MAX_CONSECUTIVE_ERRORS:
+            self.eject(stats, self.ERROR_COOLDOWN, "failing")
+
+    def eject(self, stats: ProviderStats, cooldown, reason):
+        stats.ejected_until = time.time() + cooldown
+        stats.consecutive_errors = 0
+        logger.warning(f"RPC provider {stats.url} {reason}, ejected for {cooldown}s")
+
+    async def is_connected(self, show_traceback: bool = False) -> bool:
+        for url in self.get_ranked_urls():
+            if await self.providers[url].is_connected(show_traceback):
+                return True
+        return False
+
+    def get_stats(self):
+        now = time.time()
+        return {
+            url: {
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "rate_limited": stats.rate_limited,
+                "latency_ms": round(stats.latency * 1000, 1),
+                "error_rate": round(stats.error_rate, 3),
+                "ejected": stats.ejected_until > now,
+            }
+            for url, stats in self.stats.items()
+        }
+
+    def log_stats(self):
+        logger.info(f"RPC provider stats: {self.get_stats()}")
@@ -0,0 +1,146 @@
+import os
+from string import Template
+from typing import Dict, Optional
+
+from logger_config import logger
+
+QUERIES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "queries"
+)
+
+# filter name -> (marker in the .graphql file, whether the value is quoted)
+QUERY_FILTERS = {
+    "past_time": ("#PAST_TIME_FILTER#", True),
+    "min_liquidity": ("#MIN_LIQUIDITY_FILTER#", False),
+    "max_liquidity": ("#MAX_LIQUIDITY_FILTER#", False),
+    "min_volume": ("#MIN_VOLUME_FILTER#", False),
+}
+
+# placeholders each query kind (directory under queries/) may use
+QUERY_PLACEHOLDERS = {
+    "search": {
+        "native_token_address",
+        "token0_address",
+        "token1_address",
+        "page_size",
+        "cursor",
+        "token0_cursor",
+        "token1_cursor",
+    },
+    "pool": {"pool_address"},
+    "pool_batch": {"pool_ids", "page_size"},
+}
+
+
+def get_placeholders(template: Template):
+    placeholders = set()
+    for match in template.pattern.finditer(template.template):
+        if match.group("invalid") is not None:
+            raise ValueError(f"invalid placeholder at offset {match.start()}")
+        name = match.group("named") or match.group("braced")
+        if name:
+            placeholders.add(name)
+    return placeholders
+
+
+class PreparedQuery:
+    """
+    A query template compiled once, with the filter syntax of its subgraph
+    type. The template with its filters filled in is cached per filter
+    arguments, so rendering a page only substitutes the placeholders.
+    """
+
+    MAX_FILTERED_TEMPLATES = 64
+
+    def __init__(self, name, source, syntax: Optional[Dict[str, str]]):
+        self.name = name
+        self.source = source
+        self.syntax = syntax or {}
+        self.filter_names = [
+            filter_name
+            for filter_name, (marker, _) in QUERY_FILTERS.items()
+            if marker in source
+        ]
+        self.placeholders = get_placeholders(Template(source))
+        self.filtered_templates: Dict[tuple, Template] = {}
+
+    def validate(self, allowed_placeholders):
+        unknown = self.placeholders - allowed_placeholders
+        if unknown:
+            raise ValueError(f"unknown placeholders {sorted(unknown)}")
+        missing_syntax = [
+            filter_name
+            for filter_name in self.filter_names
+            if filter_name not in self.syntax
+        ]
+        if missing_syntax:
+            raise ValueError(f"no filter syntax for {missing_syntax}")
+
+    def with_filters(self, **filter_values) -> Template:
+        cache_key = tuple(
+            filter_values.get(filter_name) for filter_name in self.filter_names
+        )
+        template = self.filtered_templates.get(cache_key)
+        if template is not None:
+            return template
+
+        source = self.source
+        for filter_name, value in zip(self.filter_names, cache_key):
+            marker, quoted = QUERY_FILTERS[filter_name]
+            rendered_filter = ""
+            if value is not None:
+                value = f'"{value}"' if quoted else value
+                rendered_filter = f"{self.syntax[filter_name]}: {value}"
+            source = source.replace(marker, rendered_filter)
+
+        template = Template(source)
+        if len(self.filtered_templates) >= self.MAX_FILTERED_TEMPLATES:
+            self.filtered_templates.clear()
+        self.filtered_templates[cache_key] = template
+        return template
+
+    def render(self, filters: Optional[Dict] = None, **values) -> str:
+        missing = self.placeholders - values.keys()
+        if missing:
+            raise KeyError(f"{self.name} needs values for {sorted(missing)}")
+        template = self.with_filters(**(filters or {}))
+        return template.substitute({name: values[name] for name in self.placeholders})
+
+
+class QueryTemplateRegistry:
+    """
+    Loads, compiles and validates every queries/<kind>/<subgraph_type>.graphql
+    file once, instead of reading it from disk on every query. A template
+    that fails validation is logged and left out.
+    """
+
+    def __init__(self, syntax_dict, queries_dir=QUERIES_DIR):
+        self.syntax_dict = syntax_dict
+        self.queries_dir = queries_dir
+        self.queries: Dict[tuple, PreparedQuery] = {}
+        self.load_all()
+
+    def load_all(self):
+        for kind, allowed_placeholders in QUERY_PLACEHOLDERS.items():
+            kind_dir = os.path.join(self.queries_dir, kind)
+            if not os.path.isdir(kind_dir):
+                continue
+            for filename in sorted(os.listdir(kind_dir)):
+                subgraph_type, extension = os.path.splitext(filename)
+                if extension != ".graphql":
+                    continue
+                with open(os.path.join(kind_dir, filename), "r") as file:
+                    source = file.read()
+                name = f"{kind}/{filename}"
+                try:
+                    prepared_query = PreparedQuery(
+                        name, source, self.syntax_dict.get(subgraph_type)
+                    )
+                    prepared_query.validate(allowed_placeholders)
+                except ValueError as error:
+                    logger.error(f"Invalid query template {name}: {error}")
+                    continue
+                self.queries[(kind, subgraph_type)] = prepared_query
+
+    def get(self, kind, subgraph_type) -> Optional[PreparedQuery]:
+        return self.queries.get((kind, subgraph_type))
@@ -1,22 +1,39 @@
+import asyncio
 import json
-import os.path
-import time
-from string import Template
-from typing import List
-
-import requests
+from typing import Dict, List, Set, Tuple
 
 from logger_config import logger
 from managers.blockchain_manager import BlockchainManager
+from managers.graphql_client import GraphQLClient
+from managers.query_template_registry import QueryTemplateRegistry
+from managers.subgraph_response_cache import SubgraphResponseCache
 from models.defi_structures import Fee, Pool, Token
 
 
-class SubgraphManager:
-    MAX_RETRIES = 3
-    RETRY_DELAY = 1  # Delay between retry attempts in seconds
+class SubgraphQueryError(Exception):
+    pass
+
 
-    def __init__(self, blockchain_manager: BlockchainManager):
+class SubgraphManager:
+    PAGE_SIZE = 1000  # largest page The Graph serves
+    POOL_BATCH_SIZE = 100  # pool ids per id_in query, keeps queries small
+    STREAM_BATCH_SIZE = 200  # pools handed on at a time while a page streams
+    # past_time is floored to the "search" TTL, so searches made while an
+    # entry is fresh render the same query and share it
+    PAST_TIME_BUCKET = SubgraphResponseCache.QUERY_TTLS["search"]
+
+    def __init__(self, blockchain_manager: BlockchainManager, stream_responses=False):
         self.blockchain_manager = blockchain_manager
+        # parse search pages while they download instead of after
+        self.stream_responses = stream_responses
+        self.graphql_client = GraphQLClient()
+        self.response_cache = SubgraphResponseCache()
+        uniswap_v3_syntax = {
+            "past_time": "createdAtTimestamp_gte",
+            "min_liquidity": "totalValueLockedUSD_gt",
+            "max_liquidity": "totalValueLockedUSD_lt",
+            "min_volume": "volumeUSD_gt",
+        }
         self.syntax_dict = {
             "messari": {
                 "past_time": "createdTimestamp_gt",
@@ -24,24 +41,30 @@ class SubgraphManager:
                 "max_liquidity": "totalValueLockedUSD_lt",
                 "min_volume": "cumulativeVolumeUSD_gt",
             },
-            "uniswap_v3": {
-                "past_time": "createdAtTimestamp_gte",
-                "min_liquidity": "totalValueLockedUSD_gt",
-                "max_liquidity": "totalValueLockedUSD_lt",
-                "min_volume": "volumeUSD_gt",
-            },
+            "uniswap_v3_eth": uniswap_v3_syntax,
+            "uniswap_v3_goerli": uniswap_v3_syntax,
             # Add more subgraph types as necessary...
         }
+        # search query result lists and the cursor placeholder paging each
+        self.page_cursors = {
+            "poolsWithToken0": "token0_cursor",
+            "poolsWithToken1": "token1_cursor",
+            "liquidityPools": "cursor",
+        }
         self.subgraph_parsers = {
             "messari": self.parse_messari,
             "uniswap_v3_eth": self.parse_uniswap_v3,
             "uniswap_v3_goerli": self.parse_uniswap_v3,
             # Add more subgraph types and their corresponding parsing methods
         }
-
-    def read_graphql_file(self, filename):
-        with open(filename, "r") as file:
-            return file.read()
+        # parse one pool of a response, for responses parsed while streaming
+        self.pool_parsers = {
+            "messari": self.parse_messari_pool,
+            "uniswap_v3_eth": self.parse_uniswap_v3_pool,
+            "uniswap_v3_goerli": self.parse_uniswap_v3_pool,
+        }
+        # every queries/ template compiled once, with its filter syntax
+        self.query_templates = QueryTemplateRegistry(self.syntax_dict)
 
     def convert_query_to_json(self, query):
         query_lines = query.strip().split("\n")
@@ -49,42 +72,13 @@ class SubgraphManager:
         query_json = json.dumps(" ".join(query_lines))
         return query_json
 
-    def _send_query(self, query):
+    async def _send_query(self, query, kind=None):
         url = self.blockchain_manager.get_current_chain().graph_url
-        for retry in range(self.MAX_RETRIES):
-            try:
-                response = requests.post(url, json={"query": query}, timeout=240)
-                response.raise_for_status()
-                data = response.json()
-
-                if "data" in data:
-                    return data["data"]
-                else:
-                    logger.error(
-                        "Unexpected response format from The Graph API. Data not found"
-                    )
-                    if retry < self.MAX_RETRIES - 1:
-                        logger.error(f"Retrying in {self.RETRY_DELAY} seconds...")
-                        time.sleep(self.RETRY_DELAY)
-                    else:
-                        logger.error("Max retries exceeded. Exiting...")
-                        return None
-
-            except (
-                requests.RequestException,
-                ValueError,
-                json.JSONDecodeError,
-            ) as error_message:
-                logger.error(
-                    f"Error occurred while calling The Graph API: {error_message}",
-                    exc_info=True,
-                )
-                if retry < self.MAX_RETRIES - 1:
-                    logger.error(f"Retrying in {self.RETRY_DELAY} seconds...")
-                    time.sleep(self.RETRY_DELAY)
-                else:
-                    logger.error("Max retries exceeded. Exiting...")
-                    return None
+        return await self.response_cache.get(
+            self.response_cache.make_key(url, query),
+            kind,
+            lambda: self.graphql_client.query_with_size(url, query),
+        )
 
     def parse_subgraph_response(self, subgraph_type, response_data):
         parser = self.subgraph_parsers.get(subgraph_type)
@@ -105,33 +99,35 @@ class SubgraphManager:
         if "pools" in response_data:
             pools_data = response_data["pools"]
 
-        pools: List[Pool] = []  # Empty list to hold Pool objects
+        return [self.parse_uniswap_v3_pool(pool_data) for pool_data in pools_data]
 
-        # Iterating through each pool data dictionary
-        for pool_data in pools_data:
-            fee = Fee("1", int(float(pool_data["feeTier"])))
-            token0 = Token(
-                pool_data["token0"]["id"],
-                pool_data["token0"]["symbol"],
-                pool_data["token0"]["name"],
-            )
-            token1 = Token(
-                pool_data["token1"]["id"],
-                pool_data["token0"]["symbol"],
-                pool_data["token0"]["name"],
-            )
-            # Creating Pool object and adding to the list
-            pool = Pool(
-                pool_data["id"], token0, token1, fee, pool_data["untrackedVolumeUSD"]
-            )
-            pools.append(pool)
-        return pools
+    def parse_uniswap_v3_pool(self, pool_data):
+        fee = Fee("1", int(float(pool_data["feeTier"])))
+        token0 = Token(
+            pool_data["token0"]["id"],
+            pool_data["token0"]["symbol"],
+            pool_data["token0"]["name"],
+        )
+        token1 = Token(
+            pool_data["token1"]["id"],
+            pool_data["token1"]["symbol"],
+            pool_data["token1"]["name"],
+        )
+        return Pool(
+            pool_data["id"],
+            token0,
+            token1,
+            fee,
+            pool_data["untrackedVolumeUSD"],
+            int(pool_data.get("createdAtTimestamp", 0)),
+        )
 
     def filter_pools(self, pools, token_addresses):
         filtered_pools = []
         native_token_address = (
             self.blockchain_manager.get_current_chain().native_token_address.lower()
         )
+        token_addresses = set(token_addresses)
         for pool in pools:
             if (
                 pool.token0.id == native_token_address
@@ -155,133 +151,263 @@ class SubgraphManager:
 
         pools_data = response_data["liquidityPools"]  # Your list of pool dictionaries
 
-        pools: List[Pool] = []  # Empty list to hold Pool objects
+        return [self.parse_messari_pool(pool_data) for pool_data in pools_data]
 
-        # Iterating through each pool data dictionary
-        for pool_data in pools_data:
-            first_non_zero_fee = next(
-                (fee for fee in pool_data["fees"] if float(fee["feePercentage"]) > 0),
-                None,
-            )
-            fee = Fee(
-                first_non_zero_fee["id"],
-                int(float(first_non_zero_fee.get("feePercentage")) * 10000),
-            )
+    def parse_messari_pool(self, pool_data):
+        first_non_zero_fee = next(
+            (fee for fee in pool_data["fees"] if float(fee["feePercentage"]) > 0),
+            None,
+        )
+        fee = Fee(
+            first_non_zero_fee["id"],
+            int(float(first_non_zero_fee.get("feePercentage")) * 10000),
+        )
 
-            # Extracting tokens data and transforming into a list of Token objects
-            tokens_data = pool_data["inputTokens"]
-            tokens = [
-                Token(token["id"], token["symbol"], token["name"])
-                for token in tokens_data
-            ]
+        # Extracting tokens data and transforming into a list of Token objects
+        tokens_data = pool_data["inputTokens"]
+        tokens = [
+            Token(token["id"], token["symbol"], token["name"]) for token in tokens_data
+        ]
+
+        # Creating Pool object
+        return Pool(
+            pool_data["id"],
+            tokens[0],
+            tokens[1],
+            fee,
+            pool_data["cumulativeVolumeUSD"],
+            int(pool_data.get("createdTimestamp", 0)),
+        )
 
-            # Creating Pool object and adding to the list
-            pool = Pool(
-                pool_data["id"],
-                tokens[0],
-                tokens[1],
-                fee,
-                pool_data["cumulativeVolumeUSD"],
-            )
-            pools.append(pool)
+    async def get_pools_with_native_token(
+        self,
+        past_time=None,
+        min_liquidity_usd=None,
+        max_liquidity_usd=None,
+        min_volume_usd=None,
+    ):
+        pools: List[Pool] = []
+        async for page in self.stream_pools_with_native_token(
+            past_time, min_liquidity_usd, max_liquidity_usd, min_volume_usd
+        ):
+            pools.extend(page)
         return pools
 
-    def get_pools_with_native_token(
+    async def stream_pools_with_native_token(
         self,
         past_time=None,
         min_liquidity_usd=None,
         max_liquidity_usd=None,
         min_volume_usd=None,
     ):
+        """
+        Yields the parsed pools page by page, paging with id_gt cursors. The
+        next page is already downloading while the caller handles a page.
+        """
         subgraph_type = self.blockchain_manager.get_current_chain().graph_type
-        syntax = self.syntax_dict.get(subgraph_type)
-
-        # If there is no syntax for the current subgraph type, log an error and return early.
-        if syntax is None:
-            logger.error(f"No syntax defined for subgraph type: {subgraph_type}")
-            return []
-
-        native_token_address = (
-            self.blockchain_manager.get_current_chain().native_token_address.lower()
-        )
-
-        if os.path.isfile(f"queries/search/{subgraph_type}.graphql"):
-            query_template = self.read_graphql_file(
-                f"queries/search/{subgraph_type}.graphql"
-            )
-        else:
+        prepared_query = self.query_templates.get("search", subgraph_type)
+        if prepared_query is None:
             logger.error(
                 f"No query template defined for subgraph type: {subgraph_type}"
             )
-            return []
+            return
 
+        native_token_address = (
+            self.blockchain_manager.get_current_chain().native_token_address.lower()
+        )
         if past_time is not None:
-            query_template = query_template.replace(
-                "#PAST_TIME_FILTER#", f'{syntax["past_time"]}: "{past_time}"'
+            past_time -= past_time % self.PAST_TIME_BUCKET
+        filters = {
+            "past_time": past_time,
+            "min_liquidity": min_liquidity_usd,
+            "max_liquidity": max_liquidity_usd,
+            "min_volume": min_volume_usd,
+        }
+        # last pool id seen per result list, "0x" sorts before every pool id
+        cursors = {cursor_name: "0x" for cursor_name in self.page_cursors.values()}
+
+        def render_page_query():
+            return prepared_query.render(
+                filters,
+                native_token_address=native_token_address,
+                token0_address=native_token_address,
+                token1_address=native_token_address,
+                page_size=self.PAGE_SIZE,
+                **cursors,
             )
-        else:
-            query_template = query_template.replace("#PAST_TIME_FILTER#", "")
 
-        if min_liquidity_usd is not None:
-            query_template = query_template.replace(
-                "#MIN_LIQUIDITY_FILTER#",
-                f'{syntax["min_liquidity"]}: {min_liquidity_usd}',
-            )
-        else:
-            query_template = query_template.replace("#MIN_LIQUIDITY_FILTER#", "")
+        if self.stream_responses:
+            async for pools in self.stream_search_pages(
+                subgraph_type, render_page_query, cursors
+            ):
+                yield pools
+            return
 
-        if max_liquidity_usd is not None:
-            query_template = query_template.replace(
-                "#MAX_LIQUIDITY_FILTER#",
-                f'{syntax["max_liquidity"]}: {max_liquidity_usd}',
-            )
-        else:
-            query_template = query_template.replace("#MAX_LIQUIDITY_FILTER#", "")
+        next_page = asyncio.ensure_future(
+            self._send_query(render_page_query(), "search")
+        )
+        try:
+            while next_page is not None:
+                subgraph_response = await next_page
+                next_page = None
+                if subgraph_response is None:
+                    # stopping silently would look like the last page
+                    raise SubgraphQueryError("Pool search page query failed")
+
+                has_more_pages = False
+                for field_name, pools_data in subgraph_response.items():
+                    cursor_name = self.page_cursors.get(field_name)
+                    if cursor_name and pools_data:
+                        cursors[cursor_name] = pools_data[-1]["id"]
+                    if len(pools_data) >= self.PAGE_SIZE:
+                        has_more_pages = True
+                if has_more_pages:
+                    next_page = asyncio.ensure_future(
+                        self._send_query(render_page_query(), "search")
+                    )
 
-        if min_volume_usd is not None:
-            query_template = query_template.replace(
-                "#MIN_VOLUME_FILTER#", f'{syntax["min_volume"]}: {min_volume_usd}'
-            )
-        else:
-            query_template = query_template.replace("#MIN_VOLUME_FILTER#", "")
+                yield self.parse_subgraph_response(subgraph_type, subgraph_response)
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def stream_search_pages(self, subgraph_type, render_page_query, cursors):
+        """
+        Search pages parsed into pools while the body downloads, never holding
+        a whole body or its dict tree. A reader task downloads the pages into
+        a queue so that a slow caller never keeps a response open, reading at
+        most one page ahead of the caller. Bypasses the response cache.
+        """
+        parse_pool = self.pool_parsers[subgraph_type]
+        url = self.blockchain_manager.get_current_chain().graph_url
+        # (pools, end_of_page) entries, None once the reader stopped
+        batches = asyncio.Queue()
+        pages_ahead = asyncio.Semaphore(2)
+
+        async def read_pages():
+            has_more_pages = True
+            while has_more_pages:
+                await pages_ahead.acquire()
+                page_counts = {}
+                batch = []
+                async for field_name, pool_data in self.graphql_client.stream_query(
+                    url, render_page_query()
+                ):
+                    cursor_name = self.page_cursors.get(field_name)
+                    if cursor_name:
+                        cursors[cursor_name] = pool_data["id"]
+                    page_counts[field_name] = page_counts.get(field_name, 0) + 1
+                    batch.append(parse_pool(pool_data))
+                    if len(batch) >= self.STREAM_BATCH_SIZE:
+                        batches.put_nowait((batch, False))
+                        batch = []
+                batches.put_nowait((batch, True))
+                has_more_pages = any(
+                    count >= self.PAGE_SIZE for count in page_counts.values()
+                )
 
-        query_template = Template(query_template)
+        reader = asyncio.ensure_future(read_pages())
+        reader.add_done_callback(lambda _: batches.put_nowait(None))
+        try:
+            while True:
+                entry = await batches.get()
+                if entry is None:
+                    break
+                pools, end_of_page = entry
+                if end_of_page:
+                    pages_ahead.release()
+                if pools:
+                    yield pools
+            if not reader.cancelled() and reader.exception() is not None:
+                raise SubgraphQueryError(
+                    f"Pool search stream failed: {reader.exception()}"
+                )
+        finally:
+            reader.cancel()
+
+    async def get_pools(self, pool_address):
+        subgraph_type = self.blockchain_manager.get_current_chain().graph_type
+        prepared_query = self.query_templates.get("pool", subgraph_type)
+        if prepared_query is None:
+            logger.error(
+                f"No query template defined for subgraph type: {subgraph_type}"
+            )
+            return []
 
-        query = query_template.substitute(native_token_address=native_token_address)
+        query = prepared_query.render(pool_address=pool_address)
 
-        subgraph_response = self._send_query(query)
+        subgraph_response = await self._send_query(query, "pool")
 
         parsed_data = self.parse_subgraph_response(subgraph_type, subgraph_response)
 
         return parsed_data
 
-    async def get_pools(self, pool_address):
+    async def get_pools_many(self, pool_ids) -> Dict[str, Pool]:
+        """
+        Fetches many pools with id_in queries of up to POOL_BATCH_SIZE ids,
+        sent concurrently. Returns the pools found keyed by lowercase id.
+        """
+        pools, _ = await self.query_pools_by_id(pool_ids)
+        return pools
+
+    async def query_pools_by_id(
+        self,
+        pool_ids,
+        min_liquidity_usd=None,
+        max_liquidity_usd=None,
+        min_volume_usd=None,
+    ) -> Tuple[Dict[str, Pool], Set[str]]:
+        """
+        get_pools_many with the search filters applied by the subgraph. Returns
+        the pools found and passing the filters, keyed by lowercase id, and the
+        ids whose query failed; the other ids do not pass the filters.
+        """
         subgraph_type = self.blockchain_manager.get_current_chain().graph_type
-        # query_template = self.get_query_template(subgraph_type)
+        pool_ids = list(dict.fromkeys(pool_id.lower() for pool_id in pool_ids))
 
-        if os.path.isfile(f"queries/pool/{subgraph_type}.graphql"):
-            query_template = self.read_graphql_file(
-                f"queries/pool/{subgraph_type}.graphql"
-            )
-        else:
+        prepared_query = self.query_templates.get("pool_batch", subgraph_type)
+        if prepared_query is None:
             logger.error(
                 f"No query template defined for subgraph type: {subgraph_type}"
             )
-            return []
-
-        query_template = Template(query_template)
+            return {}, set(pool_ids)
 
-        query = query_template.substitute(
-            pool_address=pool_address,
+        filters = {
+            "min_liquidity": min_liquidity_usd,
+            "max_liquidity": max_liquidity_usd,
+            "min_volume": min_volume_usd,
+        }
+        chunks = [
+            pool_ids[start : start + self.POOL_BATCH_SIZE]
+            for start in range(0, len(pool_ids), self.POOL_BATCH_SIZE)
+        ]
+
+        responses = await asyncio.gather(
+            *[
+                self._send_query(
+                    prepared_query.render(
+                        filters,
+                        page_size=len(chunk),
+                        pool_ids=", ".join(f'"{pool_id}"' for pool_id in chunk),
+                    ),
+                    "pool_batch",
+                )
+                for chunk in chunks
+            ]
         )
 
-        subgraph_response = self._send_query(query)
-
-        parsed_data = self.parse_subgraph_response(subgraph_type, subgraph_response)
-
-        return parsed_data
-
-    def get_pools_with_tokens(
+        pools: Dict[str, Pool] = {}
+        failed_pool_ids: Set[str] = set()
+        for chunk, subgraph_response in zip(chunks, responses):
+            if subgraph_response is None:
+                logger.error(f"Pool batch query failed for {len(chunk)} pools")
+                failed_pool_ids.update(chunk)
+                continue
+            for pool in self.parse_subgraph_response(subgraph_type, subgraph_response):
+                pools[pool.id] = pool
+        return pools, failed_pool_ids
+
+    async def get_pools_with_tokens(
         self,
         past_time,
         min_liquidity_usd,
@@ -289,6 +415,6 @@ class SubgraphManager:
         min_volume_usd,
         tokens: List[Token],
     ):
-        pools = self.get_pools_with_native_token(
+        pools = await self.get_pools_with_native_token(
             past_time, min_liquidity_usd, max_liquidity_usd, min_volume_usd
         )
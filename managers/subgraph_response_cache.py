@@ -0,0 +1,129 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+from logger_config import logger
+from models.cached_response import CachedResponse
+
+
+class SubgraphResponseCache:
+    """
+    Caches subgraph responses keyed by endpoint, whitespace-normalized query
+    and variables. An entry is fresh for the TTL of its query kind and served
+    stale for STALE_FACTOR times that TTL while one background refresh
+    replaces it. Identical misses share one request, failed responses are not
+    cached, and least recently used entries are evicted above MAX_BYTES.
+    """
+
+    # The "search" TTL is deliberately shorter than a discovery cycle, which
+    # lasts at least monitor_timeframe while its price checks sample: the next
+    # cycle searches from the sync's high-water mark and has to see the pools
+    # created meanwhile. Within a cycle it serves repeated searches, such as
+    # the immediate retry after a failed cycle and overlapping callers.
+    QUERY_TTLS = {"search": 60, "pool": 20, "pool_batch": 20}  # seconds
+    DEFAULT_TTL = 20
+    STALE_FACTOR = 3
+    MAX_BYTES = 16 * 1024 * 1024  # summed response body sizes
+
+    def __init__(self):
+        self.responses: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self.cached_bytes = 0
+        self.in_flight = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bytes_saved = 0
+
+    def make_key(self, url, query, variables=None):
+        return (
+            url,
+            " ".join(query.split()),
+            json.dumps(variables, sort_keys=True) if variables else None,
+        )
+
+    async def get(self, key, kind, fetch_response):
+        """
+        fetch_response is a coroutine function returning (data, size), with
+        data None when the request failed.
+        """
+        ttl = self.QUERY_TTLS.get(kind, self.DEFAULT_TTL)
+        cached_response = self.responses.get(key)
+        if cached_response is not None:
+            age = time.time() - cached_response.fetched_at
+            if age < ttl * self.STALE_FACTOR:
+                self.responses.move_to_end(key)
+                self.bytes_saved += cached_response.size
+                if age < ttl:
+                    self.hits += 1
+                else:
+                    self.stale_hits += 1
+                    if key not in self.in_flight:
+                        self.start_fetch(key, fetch_response)
+                return cached_response.data
+
+        fetch_task = self.in_flight.get(key)
+        coalesced = fetch_task is not None
+        if coalesced:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            fetch_task = self.start_fetch(key, fetch_response)
+
+        # shield so that one cancelled caller does not cancel the shared request
+        data, size = await asyncio.shield(fetch_task)
+        if coalesced:
+            self.bytes_saved += size
+        return data
+
+    def start_fetch(self, key, fetch_response):
+        fetch_task = asyncio.ensure_future(fetch_response())
+        # also keeps a reference to background refreshes nobody awaits
+        self.in_flight[key] = fetch_task
+        fetch_task.add_done_callback(lambda task: self.on_fetch_done(key, task))
+        return fetch_task
+
+    def on_fetch_done(self, key, task):
+        self.in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        data, size = task.result()
+        if data is None:
+            return  # errors are not cached
+        self.store(key, CachedResponse(data, size, time.time()))
+
+    def store(self, key, cached_response: CachedResponse):
+        previous = self.responses.pop(key, None)
+        if previous is not None:
+            self.cached_bytes -= previous.size
+        if cached_response.size > self.MAX_BYTES:
+            return
+        self.responses[key] = cached_response
+        self.cached_bytes += cached_response.size
+        while self.cached_bytes > self.MAX_BYTES:
+            _, evicted = self.responses.popitem(last=False)
+            self.cached_bytes -= evicted.size
+
+    def get_stats(self):
+        requests = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.stale_hits + self.coalesced) / requests
+            if requests
+            else 0,
+            "bytes_saved": self.bytes_saved,
+            "entries": len(self.responses),
+            "cached_bytes": self.cached_bytes,
+        }
+
+    def log_and_reset_stats(self):
+        logger.info(f"Subgraph cache stats: {self.get_stats()}")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bytes_saved = 0
@@ -0,0 +1,184 @@
+import asyncio
+import json
+
+import aiofiles
+
+from logger_config import logger
+from managers.blockchain_manager import BlockchainManager
+from managers.subgraph_manager import SubgraphManager
+from models.defi_structures import Fee, Pool, Token
+
+
+class SubgraphSync:
+    """
+    Incremental pool discovery. Per chain and subgraph type it keeps the newest
+    pool creation time seen (the high-water mark), persisted to SYNC_FILE with
+    the native pools of the chain's PoolRegistry created inside the discovery
+    window. Each sync only searches for pools created since the mark, so the
+    search costs as much as the new activity instead of the whole history.
+
+    The volume and liquidity filters are on current values, which change long
+    after a pool is created. So the search for new pools is not filtered;
+    every known pool is checked against the filters by id instead, with
+    batched id_in queries that also bring its metrics up to date. Pools that
+    fail the filters stay known and are checked again on the next sync.
+    """
+
+    SYNC_FILE = "data/subgraph_sync.json"
+
+    def __init__(
+        self,
+        subgraph_manager: SubgraphManager,
+        blockchain_manager: BlockchainManager,
+        get_pool_registry,
+    ):
+        self.subgraph_manager = subgraph_manager
+        self.blockchain_manager = blockchain_manager
+        # chain name -> PoolRegistry
+        self.get_pool_registry = get_pool_registry
+        self.high_water_marks = None
+        self.lock = asyncio.Lock()
+
+    def get_sync_key(self):
+        current_chain = self.blockchain_manager.get_current_chain()
+        return f"{current_chain.name}:{current_chain.graph_type}"
+
+    async def stream_pools(
+        self,
+        past_time,
+        min_liquidity_usd=None,
+        max_liquidity_usd=None,
+        min_volume_usd=None,
+    ):
+        """
+        Yields the known pools created after past_time that pass the filters
+        now, refreshed, as a first page, then the pages of pools created since
+        the high-water mark that pass them.
+        """
+        if self.high_water_marks is None:
+            await self.load_from_file()
+
+        sync_key = self.get_sync_key()
+        pool_registry = self.get_pool_registry(
+            self.blockchain_manager.get_current_chain().name
+        )
+        filters = (min_liquidity_usd, max_liquidity_usd, min_volume_usd)
+        checked = failed = 0
+
+        # pools older than the discovery window are no longer candidates
+        pool_registry.remove_created_before(past_time)
+
+        known_pool_ids = [pool.id for pool in pool_registry.get_pools()]
+        if known_pool_ids:
+            passing_pools, failed_pool_ids = await self.check_pools(
+                pool_registry, known_pool_ids, filters
+            )
+            checked += len(known_pool_ids)
+            failed += len(failed_pool_ids)
+            if passing_pools:
+                yield passing_pools
+
+        high_water_mark = self.high_water_marks.get(sync_key)
+        since = past_time
+        if high_water_mark is not None and high_water_mark > past_time:
+            since = high_water_mark
+        newest_seen = since
+
+        try:
+            async for page in self.subgraph_manager.stream_pools_with_native_token(
+                since
+            ):
+                # the filter is inclusive, so pools at the mark come back again
+                new_pools = [pool for pool in page if pool.id not in pool_registry]
+                for pool in new_pools:
+                    pool_registry.add(pool)
+                    newest_seen = max(newest_seen, pool.created_timestamp)
+                if not new_pools:
+                    continue
+                passing_pools, failed_pool_ids = await self.check_pools(
+                    pool_registry, [pool.id for pool in new_pools], filters
+                )
+                checked += len(new_pools)
+                failed += len(failed_pool_ids)
+                if passing_pools:
+                    yield passing_pools
+        except Exception:
+            # pages arrive in id order, so the mark only moves after a full sync
+            await self.save_to_file()
+            raise
+
+        self.high_water_marks[sync_key] = newest_seen
+        logger.info(
+            f"Subgraph sync {sync_key}: {len(pool_registry)} pools, "
+            f"{checked} checked against the filters, {failed} checks failed, "
+            f"high-water mark {newest_seen}"
+        )
+        await self.save_to_file()
+
+    async def check_pools(self, pool_registry, pool_ids, filters):
+        """
+        The pools passing the filters now, which replace their stored copies,
+        and the ids whose check failed and is left to the next sync.
+        """
+        (
+            passing_pools,
+            failed_pool_ids,
+        ) = await self.subgraph_manager.query_pools_by_id(pool_ids, *filters)
+        for pool in passing_pools.values():
+            pool_registry.add(pool)
+        return list(passing_pools.values()), failed_pool_ids
+
+    def pool_to_record(self, pool: Pool):
+        return {
+            "id": pool.id,
+            "token0": pool.token0.to_json(),
+            "token1": pool.token1.to_json(),
+            "fee": pool.fee.to_json(),
+            "volumeUSD": pool.volumeUSD,
+            "created_timestamp": pool.created_timestamp,
+        }
+
+    def pool_from_record(self, record) -> Pool:
+        return Pool(
+            record["id"],
+            Token(**record["token0"]),
+            Token(**record["token1"]),
+            Fee(**record["fee"]),
+            record["volumeUSD"],
+            record["created_timestamp"],
+        )
+
+    async def load_from_file(self):
+        try:
+            async with self.lock:
+                async with aiofiles.open(self.SYNC_FILE, "r") as json_file:
+                    stored_state = json.loads(await json_file.read())
+            high_water_marks = {}
+            for sync_key, chain_state in stored_state.items():
+                high_water_marks[sync_key] = chain_state["high_water_mark"]
+                chain_name = sync_key.split(":")[0]
+                self.get_pool_registry(chain_name).add_many(
+                    self.pool_from_record(record) for record in chain_state["pools"]
+                )
+            self.high_water_marks = high_water_marks
+            logger.info("subgraph sync state loaded from file")
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            # File does not exist or invalid JSON. Start a full sync.
+            self.high_water_marks = {}
+
+    async def save_to_file(self):
+        stored_state = {
+            sync_key: {
+                "high_water_mark": high_water_mark,
+                "pools": [
+                    self.pool_to_record(pool)
+                    for pool in self.get_pool_registry(
+                        sync_key.split(":")[0]
+                    ).get_pools()
+                ],
+            }
+            for sync_key, high_water_mark in self.high_water_marks.items()
+        }
+        async with self.lock:
+            async with aiofiles.open(self.SYNC_FILE, "w") as json_file:
+                await json_file.write(json.dumps(stored_state))
@@ -0,0 +1,122 @@
+import heapq
+import itertools
+import time
+from typing import Optional
+
+from logger_config import logger
+from models.token_check_state import TokenCheckState
+
+
+class TokenCheckIndex:
+    """
+    Which token_pool_ids were checked recently and how it went. Each entry
+    expires after the TTL of its state, after which the token is considered
+    again, and past MAX_ENTRIES the entries closest to expiring are dropped,
+    so memory stays flat however long the bot runs.
+
+    Expiry times sit in a heap next to the entries. A state change pushes a
+    new heap item and leaves the old one to be skipped when it comes up.
+    """
+
+    TTLS = {
+        # safety net for analyses that never report back, longer than a
+        # full analysis queue takes to drain
+        TokenCheckState.IN_FLIGHT: 6 * 60 * 60,
+        TokenCheckState.REJECTED: 24 * 60 * 60,
+        TokenCheckState.ACCEPTED: 3 * 24 * 60 * 60,
+        # short, a failed quote may be a passing RPC problem, but a token that
+        # never quotes must not take an analysis slot on every page
+        TokenCheckState.FAILED: 60 * 60,
+    }
+    MAX_ENTRIES = 50000
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = {}  # token_pool_id -> (state, expires_at)
+        self.expiries = []  # heap of (expires_at, sequence, token_pool_id)
+        self.sequence = itertools.count()
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self):
+        self.expire()
+        return len(self.entries)
+
+    def __contains__(self, token_pool_id):
+        return self.get_state(token_pool_id) is not None
+
+    def get_state(self, token_pool_id) -> Optional[TokenCheckState]:
+        entry = self.entries.get(token_pool_id)
+        if entry is None:
+            return None
+        state, expires_at = entry
+        if expires_at <= time.monotonic():
+            self.expire()
+            return None
+        return state
+
+    def set_state(self, token_pool_id, state: TokenCheckState):
+        expires_at = time.monotonic() + self.TTLS[state]
+        self.entries[token_pool_id] = (state, expires_at)
+        heapq.heappush(self.expiries, (expires_at, next(self.sequence), token_pool_id))
+        self.expire()
+        while len(self.entries) > self.max_entries:
+            if self.pop_earliest():
+                self.evicted += 1
+        if len(self.expiries) > 2 * len(self.entries):
+            self.compact()
+
+    def mark_in_flight(self, token_pool_id):
+        self.set_state(token_pool_id, TokenCheckState.IN_FLIGHT)
+
+    def mark_rejected(self, token_pool_id):
+        self.set_state(token_pool_id, TokenCheckState.REJECTED)
+
+    def mark_accepted(self, token_pool_id):
+        self.set_state(token_pool_id, TokenCheckState.ACCEPTED)
+
+    def mark_failed(self, token_pool_id):
+        self.set_state(token_pool_id, TokenCheckState.FAILED)
+
+    def remove(self, token_pool_id):
+        # the heap item is skipped once it comes up
+        self.entries.pop(token_pool_id, None)
+
+    def expire(self):
+        now = time.monotonic()
+        while self.expiries and self.expiries[0][0] <= now:
+            if self.pop_earliest():
+                self.expired += 1
+
+    def pop_earliest(self):
+        """Drops the entry of the earliest heap item, False if it was stale."""
+        expires_at, _, token_pool_id = heapq.heappop(self.expiries)
+        entry = self.entries.get(token_pool_id)
+        if entry is None or entry[1] != expires_at:
+            return False
+        del self.entries[token_pool_id]
+        return True
+
+    def compact(self):
+        self.expiries = [
+            (expires_at, next(self.sequence), token_pool_id)
+            for token_pool_id, (_, expires_at) in self.entries.items()
+        ]
+        heapq.heapify(self.expiries)
+
+    def get_stats(self):
+        self.expire()
+        states = {state.value: 0 for state in TokenCheckState}
+        for state, _ in self.entries.values():
+            states[state.value] += 1
+        return {
+            **states,
+            "entries": len(self.entries),
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+    def log_and_reset_stats(self):
+        logger.info(f"Token check index stats: {self.get_stats()}")
+        self.expired = 0
+        self.evicted = 0
@@ -1,83 +1,249 @@
 import asyncio
-import json
+import time
 
 from logger_config import logger
+from managers.token_check_index import TokenCheckIndex
+from models.analysis_job import AnalysisJob
 from models.defi_structures import Fee, Pool, Token
 from token_info.token_analysis import TokenAnalysis
 from token_info.token_monitor import TokenMonitor
 
 
 class TokenStatusManager:
+    """
+    Runs the analysis of discovered tokens as a pipeline stage. Exploit checks
+    run concurrently as tokens arrive and tokens passing them wait in a
+    bounded queue. A few workers take them off the queue and start their
+    analysis in the sampling scheduler once one of MAX_IN_FLIGHT_ANALYSES
+    slots is free; the slot is given back when the analysis resolves. While
+    every slot is taken the queue fills, and while the queue is full
+    create_token_check_tasks does not return, which holds discovery back.
+    """
+
+    ANALYSIS_WORKERS = 4  # starting an analysis only takes a moment
+    MAX_IN_FLIGHT_ANALYSES = 200  # analyses sampling at once
+    QUEUE_SIZE = 100  # tokens waiting for a worker before discovery is held back
+    EXPLOIT_CHECK_CONCURRENCY = 10
+
     def __init__(self, token_analysis: TokenAnalysis, token_monitor: TokenMonitor):
         # Initialize TokenStatusManager with instances of TokenAnalysis and TokenMonitor
         self.token_analysis: TokenAnalysis = token_analysis
         self.token_monitor: TokenMonitor = token_monitor
-        concurrent_limit = 20
-        self.semaphore = asyncio.Semaphore(concurrent_limit)
-        # tasks stores tuples containing asyncio tasks and token data
+        # tasks stores tuples containing price check futures and token data
+        # of the last page
         self.tasks = []
-        # tokens_with_tasks is a set of token_pool_id strings representing tokens already being monitored
-        self.tokens_with_tasks = set()
+        # token_pool_ids checked recently, in flight, rejected or accepted,
+        # until their TTL runs out
+        self.tokens_with_tasks = TokenCheckIndex()
+        self.analysis_queue = asyncio.Queue(self.QUEUE_SIZE)
+        self.exploit_check_semaphore = asyncio.Semaphore(self.EXPLOIT_CHECK_CONCURRENCY)
+        self.analysis_slots = asyncio.Semaphore(self.MAX_IN_FLIGHT_ANALYSES)
+        self.workers = []
+        self.waiting_workers = 0
+        self.in_flight = 0
+        # in-flight analyses integrated over time, and when it was last updated
+        self.slot_time = 0
+        self.slot_time_updated_at = time.monotonic()
+        self.analysed = 0
+        self.backpressure_waits = 0
+        self.max_queue_depth = 0
+        self.stats_started_at = time.monotonic()
 
     def get_tasks(self):
         # Returns list of tasks
         return self.tasks
 
     def get_tokens_with_tasks(self):
-        # Returns set of tokens that are currently being monitored
+        # Returns the index of tokens that were checked recently
         return self.tokens_with_tasks
 
+    def start_workers(self):
+        if self.workers:
+            return
+        self.stats_started_at = time.monotonic()
+        self.workers = [
+            asyncio.ensure_future(self.analysis_worker())
+            for _ in range(self.ANALYSIS_WORKERS)
+        ]
+
     async def create_token_check_tasks(self, new_tokens):
-        # Clears the tasks list
-        self.tasks.clear()
-        logger.info(f"Cleared tasks.")
+        # a new list per page, earlier pages keep theirs
+        tasks = []
+        self.tasks = tasks
+        self.start_workers()
 
-        # Iterates over new_tokens, which is expected to be a list of dictionaries with keys 'token', 'pool_address', and 'fee'
-        for token_index, token_info in enumerate(new_tokens):
-            try:  # Try to create a task for this token
-                token: Token = token_info["token"]
-                pool: Pool = token_info["pool"]
-                fee: Fee = token_info["fee"]
+        # new_tokens is expected to be a list of dictionaries with keys
+        # 'token', 'pool' and 'fee'
+        await asyncio.gather(
+            *[
+                self.check_token(token_index, token_info, len(new_tokens), tasks)
+                for token_index, token_info in enumerate(new_tokens)
+            ]
+        )
 
-                # Creates a unique identifier for each token by concatenating token address and pool address
-                token_pool_id = f"{token.id}_{pool.id}"
+        # Returns the list of tasks and the set of tokens_with_tasks
+        logger.info(f"Returning tasks and tokens_with_tasks.")
+        return tasks, self.tokens_with_tasks
 
-                # logger.info(f"Processing token: {token_pool_id}")
+    async def check_token(self, token_index, token_info, token_count, tasks):
+        try:  # Try to create a task for this token
+            token: Token = token_info["token"]
+            pool: Pool = token_info["pool"]
+            fee: Fee = token_info["fee"]
 
-                # Checks if the token is already being monitored, if so it skips to the next token
-                if token_pool_id in self.token_monitor.get_monitored_tokens():
-                    logger.info(f"Token already monitored: {token_pool_id}")
-                    continue
+            # Creates a unique identifier for each token by concatenating token address and pool address
+            token_pool_id = f"{token.id}_{pool.id}"
 
+            # Checks if the token is already being monitored, if so it skips to the next token
+            if token_pool_id in self.token_monitor.get_monitored_tokens():
+                logger.info(f"Token already monitored: {token_pool_id}")
+                return
+
+            # tokens checked recently are skipped until their cooldown expires
+            if token_pool_id in self.tokens_with_tasks:
+                return
+
+            async with self.exploit_check_semaphore:
                 logger.info(
-                    f"Checking tokensniffer score of token {token.id}. {token_index} of {len(new_tokens)}"
+                    f"Checking tokensniffer score of token {token.id}. {token_index} of {token_count}"
                 )
                 # Checks if the token has any exploits, and if the token is not already being monitored
                 token_passes_muster = not await self.token_analysis.has_exploits(
                     token.id
                 )
-                token_has_no_task = token_pool_id not in self.tokens_with_tasks
-
-                # If the token has no exploits and is not being monitored, it creates a task to check if the token's price is increasing
-                if token_passes_muster and token_has_no_task:
-                    logger.info(f"Creating async task for token {token.id}")
-                    task = None
-                    async with self.semaphore:
-                        task = asyncio.create_task(
-                            self.token_analysis.is_token_price_increase(
-                                token, fee, pool
-                            )
-                        )
-
-                    # Appends the task and token data to self.tasks and adds the token_pool_id to self.tokens_with_tasks
-                    if task:
-                        self.tasks.append((task, token, fee, pool))
-                        self.tokens_with_tasks.add(token_pool_id)
-
-            except Exception as e:
-                logger.error(f"Failed to create task for token {token_info}: {e}")
-                continue
+            # another page may have queued the same token during the check
+            if token_pool_id in self.tokens_with_tasks:
+                return
 
-        # Returns the list of tasks and the set of tokens_with_tasks
-        logger.info(f"Returning tasks and tokens_with_tasks.")
-        return self.tasks, self.tokens_with_tasks
+            if not token_passes_muster:
+                self.tokens_with_tasks.mark_rejected(token_pool_id)
+                return
+
+            # If the token has no exploits and is not being monitored, it queues
+            # a check of whether the token's price is increasing
+            self.tokens_with_tasks.mark_in_flight(token_pool_id)
+            task = asyncio.get_running_loop().create_future()
+            task.add_done_callback(
+                lambda task: self.on_analysis_done(token_pool_id, task)
+            )
+            tasks.append((task, token, fee, pool))
+            await self.enqueue(AnalysisJob(token, fee, pool, task, time.monotonic()))
+
+        except Exception as e:
+            logger.error(f"Failed to create task for token {token_info}: {e}")
+
+    def on_analysis_done(self, token_pool_id, task):
+        if task.cancelled() or task.exception() is not None:
+            # not analysed, consider it again once the short cooldown expires
+            self.tokens_with_tasks.mark_failed(token_pool_id)
+            return
+        price_has_increased, token_base_value = task.result()
+        if price_has_increased:
+            self.tokens_with_tasks.mark_accepted(token_pool_id)
+        elif token_base_value > 0:
+            self.tokens_with_tasks.mark_rejected(token_pool_id)
+        else:
+            # the price could not be read, which says little about the token
+            self.tokens_with_tasks.mark_failed(token_pool_id)
+
+    async def enqueue(self, job: AnalysisJob):
+        if self.analysis_queue.full():
+            self.backpressure_waits += 1
+            logger.info(
+                f"Analysis queue full, holding discovery back for token {job.token.id}"
+            )
+        # waits for room while every analysis slot is taken and the queue is full
+        await self.analysis_queue.put(job)
+        self.max_queue_depth = max(self.max_queue_depth, self.analysis_queue.qsize())
+
+    async def analysis_worker(self):
+        while True:
+            job: AnalysisJob = await self.analysis_queue.get()
+            try:
+                if job.result.done():  # skip jobs whose caller went away
+                    continue
+                # a slot is held until the analysis resolves, so the workers
+                # only hold a job while they wait for room and start it
+                self.waiting_workers += 1
+                try:
+                    await self.analysis_slots.acquire()
+                finally:
+                    self.waiting_workers -= 1
+                self.start_analysis(job)
+            finally:
+                self.analysis_queue.task_done()
+
+    def start_analysis(self, job: AnalysisJob):
+        logger.info(
+            f"Scheduling price check for token {job.token.id}, "
+            f"queued {time.monotonic() - job.queued_at:.1f}s"
+        )
+        self.update_slot_time()
+        self.in_flight += 1
+        try:
+            # a future owned by the sampling scheduler, not a sleeping task
+            analysis = self.token_analysis.schedule_price_check(
+                job.token, job.fee, job.pool
+            )
+        except Exception as error:
+            self.release_slot()
+            if not job.result.done():
+                job.result.set_exception(error)
+            return
+        analysis.add_done_callback(
+            lambda analysis: self.on_analysis_resolved(job, analysis)
+        )
+        # stop sampling for callers that went away
+        job.result.add_done_callback(
+            lambda result: analysis.cancel() if result.cancelled() else None
+        )
+
+    def on_analysis_resolved(self, job: AnalysisJob, analysis: asyncio.Future):
+        self.release_slot()
+        if job.result.done():
+            return
+        if analysis.cancelled():
+            job.result.cancel()
+        elif analysis.exception() is not None:
+            job.result.set_exception(analysis.exception())
+        else:
+            job.result.set_result(analysis.result())
+            self.analysed += 1
+
+    def release_slot(self):
+        self.update_slot_time()
+        self.in_flight -= 1
+        self.analysis_slots.release()
+
+    def update_slot_time(self):
+        # integrates the in-flight count over time for the slot utilisation
+        now = time.monotonic()
+        self.slot_time += self.in_flight * (now - self.slot_time_updated_at)
+        self.slot_time_updated_at = now
+
+    def get_stats(self):
+        self.update_slot_time()
+        slot_capacity = self.MAX_IN_FLIGHT_ANALYSES * (
+            time.monotonic() - self.stats_started_at
+        )
+        return {
+            "queue_depth": self.analysis_queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.MAX_IN_FLIGHT_ANALYSES,
+            "slot_utilisation": self.slot_time / slot_capacity if slot_capacity else 0,
+            "workers_waiting_for_slot": self.waiting_workers,
+            "workers": len(self.workers),
+            "analysed": self.analysed,
+            "backpressure_waits": self.backpressure_waits,
+        }
+
+    def log_and_reset_stats(self):
+        logger.info(f"Token analysis pipeline stats: {self.get_stats()}")
+        self.tokens_with_tasks.log_and_reset_stats()
+        self.token_analysis.sampling_scheduler.log_and_reset_stats()
+        self.stats_started_at = time.monotonic()
+        self.slot_time = 0
+        self.analysed = 0
+        self.backpressure_waits = 0
+        self.max_queue_depth = self.analysis_queue.qsize()
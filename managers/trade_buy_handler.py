@@ -1,7 +1,7 @@
 import asyncio
-from decimal import Decimal
 from venv import logger
 
+from models.trade_action import TradeAction
 from models.trade_data import PotentialTrade, TradeData, TradeType
 
 
@@ -13,6 +13,7 @@ class BuyHandler:
         data_manager,
         token_monitor,
         wallet_manager,
+        batch_trade_evaluator,
         trade_controller,
     ):
         self.blockchain_manager = blockchain_manager
@@ -20,23 +21,78 @@ class BuyHandler:
         self.data_manager = data_manager
         self.token_monitor = token_monitor
         self.wallet_manager = wallet_manager
+        self.batch_trade_evaluator = batch_trade_evaluator
         self.trade_controller = trade_controller
 
     async def buy_increasing_tokens(self, trade_amount, watchlist):
         # Create a copy of the watchlist
         watchlist_copy = list(watchlist)
-        # Create tasks for all tokens
+        self.protocol_manager.watch_pools(
+            "buy", [token_data["pool"]["id"] for token_data in watchlist_copy]
+        )
+        potential_trades = []
+        for token_data in watchlist_copy:
+            potential_trade = await self.check_increasing_token(token_data, watchlist)
+            if potential_trade is not None:
+                potential_trades.append(potential_trade)
+        if not potential_trades:
+            return
+
+        # the trade amount and gas price are the same for every token
+        if not await self.is_trade_amount_worth_gas(trade_amount):
+            for potential_trade in potential_trades:
+                await watchlist.remove(
+                    potential_trade.token_address, potential_trade.pool_address
+                )
+            return
+
+        # amount of tokens given for a amount of ETH, quoted in one batch
+        current_token_amounts = await asyncio.gather(
+            *[
+                self.protocol_manager.get_min_token_for_native(
+                    potential_trade.token_address,
+                    trade_amount,
+                    potential_trade.fee,
+                )
+                for potential_trade in potential_trades
+            ]
+        )
+        for potential_trade, current_token_amount in zip(
+            potential_trades, current_token_amounts
+        ):
+            if current_token_amount >= 0:
+                self.protocol_manager.mark_pool_quoted(
+                    potential_trade.pool_address, "buy"
+                )
+        evaluation = self.batch_trade_evaluator.evaluate_buys(
+            current_token_amounts,
+            [potential_trade.token_base_value for potential_trade in potential_trades],
+        )
+        logger.info(
+            f"Evaluated {len(potential_trades)} watchlist tokens, "
+            f"{int(evaluation.buy.sum())} to buy, "
+            f"{evaluation.rechecked} rechecked near a threshold"
+        )
+
         tasks = [
-            self.process_increasing_token(token_data, trade_amount, watchlist)
-            for token_data in watchlist_copy
+            self.act_on_increasing_token(
+                potential_trade,
+                current_token_amount,
+                trade_amount,
+                bool(evaluation.buy[index]),
+                bool(evaluation.keep_watching[index]),
+                watchlist,
+            )
+            for index, (potential_trade, current_token_amount) in enumerate(
+                zip(potential_trades, current_token_amounts)
+            )
         ]
 
         # Run all tasks concurrently
         await asyncio.gather(*tasks)
 
-    async def process_increasing_token(
-        self, token_data, native_token_trade_amount, watchlist
-    ):
+    async def check_increasing_token(self, token_data, watchlist):
+        """The token's PotentialTrade if it is due for evaluation, else None."""
         potential_trade = PotentialTrade(
             token_data["token"]["id"],
             token_data["token"]["name"],
@@ -48,36 +104,43 @@ class BuyHandler:
             "buy_increasing_tokens_from_watchlist: checking duplicate monitored token"
         )
 
-        # if (
-        #     potential_trade.token_address.lower()
-        #     == "0x6982508145454ce325ddbe47a25d4ec3d2311933"
-        # ):
-        #     abc = "123"
-
         if (
             not self.has_been_bought_already(
                 potential_trade.token_address, potential_trade.pool_address
             )
             and self.is_below_token_monitor_limit()
         ):
-            should_continue_watching = await self.evaluate_increasing_token(
-                potential_trade, native_token_trade_amount
-            )
-            logger.info(
-                f"watchlist token {potential_trade.token_address} has decreased 10%, removing from watchlist"
-            )
-            # Remove the token from watchlist if it should no longer be watched
-            if not should_continue_watching:
-                await watchlist.remove(
-                    potential_trade.token_address, potential_trade.pool_address
+            if not self.protocol_manager.pool_has_changed(
+                potential_trade.pool_address, "buy"
+            ):
+                logger.info(
+                    f"watchlist token {potential_trade.token_address}: "
+                    "pool unchanged, skipping"
                 )
-        else:
-            logger.info(
-                f"buy_increasing_tokens_from_watchlist: watchlist token {potential_trade.token_address} is already in monitored token list, removing from watchlist"
-            )
-            await watchlist.remove(
-                potential_trade.token_address, potential_trade.pool_address
-            )
+                return None
+            return potential_trade
+
+        logger.info(
+            f"buy_increasing_tokens_from_watchlist: watchlist token {potential_trade.token_address} is already in monitored token list, removing from watchlist"
+        )
+        await watchlist.remove(
+            potential_trade.token_address, potential_trade.pool_address
+        )
+        return None
+
+    async def is_trade_amount_worth_gas(self, native_token_trade_amount):
+        # Avoid ZeroDivisionError
+        if native_token_trade_amount == 0:
+            logger.error("Native token trade amount is zero, aborting.")
+            return False
+
+        gas_limit_per_transaction = self.blockchain_manager.gas_limit_per_transaction
+        # Get the current gas price in Gwei
+        gas_price_wei = await self.blockchain_manager.get_gas_price()
+        gas_cost_per_transaction_wei = gas_price_wei * gas_limit_per_transaction
+        return self.batch_trade_evaluator.trade_evaluator.is_gas_within_threshold(
+            native_token_trade_amount, gas_cost_per_transaction_wei
+        )
 
     def is_below_token_monitor_limit(self):
         monitored_tokens = self.token_monitor.get_monitored_tokens()
@@ -100,84 +163,41 @@ class BuyHandler:
                 return True
         return False
 
-    async def evaluate_increasing_token(
+    async def act_on_increasing_token(
         self,
         potential_trade: PotentialTrade,
+        current_token_amount,
         native_token_trade_amount,
+        buy,
+        keep_watching,
+        watchlist,
     ):
         logger.info(
             f"processing increasing token: watchlist token {potential_trade.token_address}"
         )
-
-        # amount of tokens given for a amount of ETH
-        current_token_amount = await self.protocol_manager.get_min_token_for_native(
-            potential_trade.token_address,
-            native_token_trade_amount,
-            potential_trade.fee,
-        )
-
-        gas_limit_per_transaction = self.blockchain_manager.gas_limit_per_transaction
-        # Get the current gas price in Gwei
-        gas_price_wei = self.blockchain_manager.web3_instance.eth.gas_price
-        gas_cost_per_transaction_wei = gas_price_wei * gas_limit_per_transaction
-
-        # Avoid ZeroDivisionError
-        if native_token_trade_amount == 0:
-            logger.error("Native token trade amount is zero, aborting.")
-            return
-
-        gas_percentage_of_trade = float(gas_cost_per_transaction_wei) / float(
-            native_token_trade_amount
-        )
-
-        gas_cost_trade_threshold = float(
-            self.data_manager.config["gas_cost_trade_threshold"]
-        )
-
-        if gas_percentage_of_trade > gas_cost_trade_threshold:
-            logger.error(
-                f"Gas cost percentage {gas_percentage_of_trade * 100} exceeds { gas_cost_trade_threshold * 100}% of trade amount, aborting."
-            )
-            return
-
-        # Check if token amount is negative or invalid, -1 is invalid or error
         if current_token_amount < 0:
-            # Handle the error or invalid token amount
             logger.error("Invalid token amount. Cannot proceed further.")
-            return  # or raise an exception, return an error code, or take appropriate action
 
-        price_increase_threshold = Decimal(
-            str(self.data_manager.config["price_increase_threshold"])
+        # how the token moved since it was watchlisted, from the recorded quotes
+        price_series = self.protocol_manager.get_price_series(
+            potential_trade.token_address, potential_trade.fee, TradeAction.BUY
         )
-        price_decrease_threshold = Decimal(
-            str(self.data_manager.config["price_decrease_threshold"])
+        price_stats = (
+            price_series.get_stats(self.data_manager.config["monitor_timeframe"] * 60)
+            if price_series is not None
+            else None
         )
-        increased_threshold_token_amount = (
-            Decimal(str(float(potential_trade.token_base_value)))
-            / price_increase_threshold  # divide because its the opposite, less tokens if token is worth more in eth
-        )
-        decreased_threshold_token_amount = Decimal(
-            str(float(potential_trade.token_base_value))
-        ) * (
-            Decimal(str(float(1 / price_decrease_threshold)))
-        )  # divide because its the opposite, less tokens if token is worth more in eth
 
         logger.info(
             f"Token : {potential_trade.token_address}, "
             f"Current Token Amount: {current_token_amount:.0f}, "
-            f"Increase Threshold: {price_increase_threshold}, "
-            f"Decrease Threshold: {price_decrease_threshold}, "
-            f"Decreased Amount To Remove from Watchlist: {decreased_threshold_token_amount:.0f}, "
-            f"Expected Token Amount: {increased_threshold_token_amount:.0f}"
+            f"Token Base Value: {potential_trade.token_base_value}, "
+            f"Buy: {buy}, "
+            f"Keep Watching: {keep_watching}, "
+            f"Price History: {price_stats}"
         )
 
-        # Remove from watchlist if current value in eth is less than what is on the watchlist
-        if potential_trade.token_base_value > decreased_threshold_token_amount:
-            return False
-
-        if (
-            current_token_amount < increased_threshold_token_amount
-        ):  # less tokens; more valuable
+        if buy:
             trade_data_buy = TradeData(
                 trade_type=TradeType.BUY,
                 input_amount=native_token_trade_amount,  # eg. 0.01 ETH
@@ -186,10 +206,16 @@ class BuyHandler:
             )
 
             await self.buy(potential_trade, trade_data_buy)
-            # dont watch anymore, lets buy
-            return False
-        if current_token_amount > 0:  # token price is still valid
-            return True
+
+        # Remove the token from watchlist if it should no longer be watched
+        if not keep_watching:
+            logger.info(
+                f"watchlist token {potential_trade.token_address} is no longer "
+                "watched, removing from watchlist"
+            )
+            await watchlist.remove(
+                potential_trade.token_address, potential_trade.pool_address
+            )
 
     async def buy(self, potential_trade, trade_data):
         # Some code
@@ -2,6 +2,7 @@ from decimal import Decimal
 
 from defi.protocol_manager import ProtocolManager
 from logger_config import logger
+from managers.batch_trade_evaluator import BatchTradeEvaluator
 from managers.blockchain_manager import BlockchainManager
 from managers.data_management import DataManagement
 from managers.trade_buy_handler import BuyHandler
@@ -39,12 +40,15 @@ class TradeController:
         self.trade_executor: TradeExecutor = trade_executor
         self.trade_evaluator: TradeEvaluator = trade_evaluator
         self.protocol_manager: ProtocolManager = protocol_manager
+        # evaluates the whole watchlist and monitored set in one pass each
+        self.batch_trade_evaluator = BatchTradeEvaluator(self.trade_evaluator)
         self.buy_handler = BuyHandler(
             self.blockchain_manager,
             self.protocol_manager,
             self.data_manager,
             self.token_monitor,
             self.wallet_manager,
+            self.batch_trade_evaluator,
             self,
         )
         self.sell_handler = SellHandler(
@@ -56,12 +60,13 @@ class TradeController:
             self.wallet_manager,
             self.token_analysis,
             self.trade_evaluator,
+            self.batch_trade_evaluator,
             self,
         )
 
     async def monitor_trades(self, watchlist):
         trade_amount = int(
-            self.wallet_manager.get_native_token_balance_percentage(
+            await self.wallet_manager.get_native_token_balance_percentage(
                 self.data_manager.config["trade_amount_percentage"]
             )
         )
@@ -70,11 +75,15 @@ class TradeController:
             watchlist,
         )
         await self.sell_handler.sell_decreasing_tokens()
+        if not self.protocol_manager.simulate_pump_mode:
+            self.protocol_manager.dex_client_wrapper.quote_cache.log_and_reset_stats()
+        self.protocol_manager.subgraph_manager.response_cache.log_and_reset_stats()
+        self.blockchain_manager.provider_pool.log_stats()
 
     async def trade_increasing_token(
         self, potential_trade: PotentialTrade, trade_data: TradeData
     ):
-        if self.trade_evaluator.has_balance_for_trade(
+        if await self.trade_evaluator.has_balance_for_trade(
             potential_trade.token_address, trade_data.input_amount, TradeAction.BUY
         ):
             await self.trade_executor.trade_token(
@@ -108,7 +117,7 @@ class TradeController:
             )
             return  # or raise an exception, return an error code, or take appropriate action
 
-        if self.trade_evaluator.has_balance_for_trade(
+        if await self.trade_evaluator.has_balance_for_trade(
             # input = tokens to trade for ETH in your wallet
             potential_trade.token_address,
             trade_data.input_amount,
@@ -25,16 +25,25 @@ class TradeEvaluator:
         self.protocol_manager = protocol_manager
         self.profit_margin = profit_margin
 
-    def calculate_gas_fee_in_eth(self):
-        average_gas_price = self.blockchain_manager.web3_instance.eth.gas_price
+    async def calculate_gas_fee_in_eth(self):
+        average_gas_price = await self.blockchain_manager.get_gas_price()
         estimated_gas_limit = 150000
         gas_fee = average_gas_price * estimated_gas_limit
         return gas_fee
 
-    def calculate_net_amount_and_costs(self, token_base_value, fee, num_transactions=2):
-        total_gas_cost = self.blockchain_manager.calculate_gas_cost_wei(
+    async def calculate_net_amount_and_costs(
+        self, token_base_value, fee, num_transactions=2
+    ):
+        total_gas_cost = await self.blockchain_manager.calculate_gas_cost_wei(
             num_transactions
         )
+        return self.calculate_net_amount_and_costs_for_gas(
+            token_base_value, fee, total_gas_cost, num_transactions
+        )
+
+    def calculate_net_amount_and_costs_for_gas(
+        self, token_base_value, fee, total_gas_cost, num_transactions=2
+    ):
         net_token_amount = calculate_estimated_net_token_amount_wei_after_fees(
             fee, token_base_value, num_transactions
         )
@@ -43,38 +52,95 @@ class TradeEvaluator:
         costs = total_gas_cost + fees
         return net_amount, costs
 
-    def calculate_roi_multiplier(
+    async def calculate_roi_multiplier(
         self, potential_trade: PotentialTrade, trade_data: TradeData
     ):
-        orig_investment = Decimal(trade_data.original_investment_eth)
+        total_gas_cost = await self.blockchain_manager.calculate_gas_cost_wei(2)
+        expected_roi_multiplier = self.calculate_roi_multiplier_for_gas(
+            trade_data.original_investment_eth, potential_trade.fee, total_gas_cost
+        )
+        logger.info(
+            f"Initial investment: {trade_data.original_investment_eth} \
+                Gas cost: {total_gas_cost} \
+                Multiplier: {expected_roi_multiplier}"
+        )
+        return expected_roi_multiplier
+
+    def calculate_roi_multiplier_for_gas(
+        self, original_investment_eth, fee, total_gas_cost
+    ):
+        orig_investment = Decimal(original_investment_eth)
         # selling to ETH will cost some ETH (fees, slippage)
-        net_amount, costs = self.calculate_net_amount_and_costs(
-            orig_investment, potential_trade.fee, 2
+        net_amount, costs = self.calculate_net_amount_and_costs_for_gas(
+            orig_investment, fee, total_gas_cost, 2
         )
         buffer = Decimal("0.00001")
         desired_profit_percentage = 1 + self.profit_margin + buffer
         expected_roi_value = (orig_investment + costs) * desired_profit_percentage
-        expected_roi_multiplier = expected_roi_value / orig_investment
+        return expected_roi_value / orig_investment
 
-        logger.info(
-            f"Initial investment: {orig_investment} \
-                Net amount: {net_amount} \
-                Costs: {costs} \
-                Profit percentage: {desired_profit_percentage} \
-                Multiplier: {expected_roi_multiplier}"
+    def calculate_buy_thresholds(self, token_base_value):
+        """
+        The token amounts the native trade amount has to buy for the token to
+        count as increased (buy it) or decreased (stop watching it).
+        """
+        price_increase_threshold = Decimal(
+            str(self.data_manager.config["price_increase_threshold"])
         )
-        return expected_roi_multiplier
+        price_decrease_threshold = Decimal(
+            str(self.data_manager.config["price_decrease_threshold"])
+        )
+        increased_threshold_token_amount = (
+            Decimal(str(float(token_base_value)))
+            / price_increase_threshold  # divide because its the opposite, less tokens if token is worth more in eth
+        )
+        decreased_threshold_token_amount = Decimal(str(float(token_base_value))) * (
+            Decimal(str(float(1 / price_decrease_threshold)))
+        )  # divide because its the opposite, less tokens if token is worth more in eth
+        return increased_threshold_token_amount, decreased_threshold_token_amount
+
+    def evaluate_buy(self, current_token_amount, token_base_value):
+        """(buy, keep_watching) for a watchlist token quoted at current_token_amount."""
+        # -1 is invalid or error
+        if current_token_amount < 0:
+            return False, False
+        (
+            increased_threshold_token_amount,
+            decreased_threshold_token_amount,
+        ) = self.calculate_buy_thresholds(token_base_value)
+        # Remove from watchlist if current value in eth is less than what is on the watchlist
+        if token_base_value > decreased_threshold_token_amount:
+            return False, False
+        if current_token_amount < increased_threshold_token_amount:
+            # less tokens; more valuable. dont watch anymore, lets buy
+            return True, False
+        # keep watching while the token price is still valid
+        return False, current_token_amount > 0
+
+    def is_gas_within_threshold(self, trade_amount, gas_cost_per_transaction_wei):
+        gas_percentage_of_trade = float(gas_cost_per_transaction_wei) / float(
+            trade_amount
+        )
+        gas_cost_trade_threshold = float(
+            self.data_manager.config["gas_cost_trade_threshold"]
+        )
+        if gas_percentage_of_trade > gas_cost_trade_threshold:
+            logger.error(
+                f"Gas cost percentage {gas_percentage_of_trade * 100} exceeds { gas_cost_trade_threshold * 100}% of trade amount, aborting."
+            )
+            return False
+        return True
 
-    def has_balance_for_trade(self, token_address, trade_amount, action):
+    async def has_balance_for_trade(self, token_address, trade_amount, action):
         estimated_gas_limit = 150000
         num_trades = 2  # Number of trades to consider
 
         # Get the average gas price in Gwei
-        average_gas_price = self.blockchain_manager.web3_instance.eth.gas_price
+        average_gas_price = await self.blockchain_manager.get_gas_price()
         gas_fee = average_gas_price * estimated_gas_limit * num_trades
 
         if action == TradeAction.BUY:
-            native_token_balance = self.wallet_manager.get_native_token_balance()
+            native_token_balance = await self.wallet_manager.get_native_token_balance()
             needed_token_balance = trade_amount + gas_fee
             if native_token_balance < needed_token_balance:
                 logger.info(
@@ -82,7 +148,7 @@ class TradeEvaluator:
                 )
                 return False
         elif action == TradeAction.SELL:
-            token_balance = self.wallet_manager.get_token_balance(token_address)
+            token_balance = await self.wallet_manager.get_token_balance(token_address)
             if token_balance < trade_amount:
                 logger.info(
                     f"Not enough {token_address} tokens balance to make the trade. Have {token_balance} need {trade_amount}"
@@ -1,16 +1,23 @@
+import asyncio
 from decimal import Decimal
 
+from web3.exceptions import TransactionNotFound
+
 from defi.protocol_manager import ProtocolManager
 from logger_config import logger
 from managers.blockchain_manager import BlockchainManager
 from managers.wallet_manager import WalletManager
 from models.trade_action import TradeAction
-from models.trade_data import PotentialTrade, TradeData
+from models.trade_data import PotentialTrade, TradeData, TradeType
 from token_info.token_monitor import TokenMonitor
 from utils import calculate_estimated_net_token_amount_wei_after_fees
 
 
 class TradeExecutor:
+    # how long to look for the receipt of a transaction the submitter timed out
+    LATE_RECEIPT_POLL_INTERVAL = 30  # seconds
+    LATE_RECEIPT_TIMEOUT = 30 * 60  # seconds
+
     def __init__(
         self,
         blockchain_manager: BlockchainManager,
@@ -24,6 +31,7 @@ class TradeExecutor:
         self.protocol_manager = protocol_manager
         self.token_monitor = token_monitor
         self.demo_mode = demo_mode
+        self.confirmation_tasks = set()
 
     async def trade_token(
         self,
@@ -32,8 +40,8 @@ class TradeExecutor:
         action,
     ):
         try:
-            gas_fee = self.blockchain_manager.calculate_gas_cost_wei(1)
-            token_balance = self.wallet_manager.get_token_balance(
+            gas_fee = await self.blockchain_manager.calculate_gas_cost_wei(1)
+            token_balance = await self.wallet_manager.get_token_balance(
                 potential_trade.token_address
             )  # balance for token in wallet
 
@@ -104,12 +112,12 @@ class TradeExecutor:
 
             # Calculate new balances after transaction
             new_eth_balance = (
-                self.wallet_manager.get_native_token_balance()
+                await self.wallet_manager.get_native_token_balance()
                 - trade_data.input_amount
                 - gas_fee
             )
             new_token_balance = (
-                self.wallet_manager.get_token_balance(
+                await self.wallet_manager.get_token_balance(
                     potential_trade.token_address.lower()
                 )
                 + net_expected_token_amount
@@ -123,12 +131,15 @@ class TradeExecutor:
         else:
             # buys 0.1 worth of UNI with WETH
             # uniswap_client.make_trade(goerli_token1, goerli_token0, 100000000000000000)
-            self.protocol_manager.make_trade(
+            pending_transaction = await self.protocol_manager.make_trade(
                 self.blockchain_manager.current_native_token_address,
                 potential_trade.token_address,
                 trade_data.input_amount,
                 potential_trade.fee,
             )
+            self.track_confirmation(
+                pending_transaction, potential_trade, trade_data, TradeAction.BUY
+            )
         await self.token_monitor.add_monitored_token(potential_trade, trade_data)
 
     async def sell_token(
@@ -145,7 +156,7 @@ class TradeExecutor:
 
             # Calculate new balances after transaction
             current_eth_balance = Decimal(
-                self.wallet_manager.get_native_token_balance()
+                await self.wallet_manager.get_native_token_balance()
             )
 
             # Calculate the net token amount after fees and slippage, applies to WETH/ETH/native
@@ -168,9 +179,107 @@ class TradeExecutor:
             )
         else:
             # SELL
-            self.protocol_manager.make_trade(
+            pending_transaction = await self.protocol_manager.make_trade(
                 potential_trade.token_address,
                 self.blockchain_manager.current_native_token_address,
                 trade_data.input_amount,
                 potential_trade.fee,
             )
+            self.track_confirmation(
+                pending_transaction, potential_trade, trade_data, TradeAction.SELL
+            )
+
+    def track_confirmation(
+        self, pending_transaction, potential_trade, trade_data, action
+    ):
+        if pending_transaction is None:
+            # the blocking uniswap client only returns once the trade is sent
+            self.wallet_manager.invalidate_snapshot()
+            return
+        # the trading loop goes on while the transaction is mined
+        task = asyncio.ensure_future(
+            self.on_trade_confirmed(
+                pending_transaction, potential_trade, trade_data, action
+            )
+        )
+        self.confirmation_tasks.add(task)
+        task.add_done_callback(self.confirmation_tasks.discard)
+
+    async def on_trade_confirmed(
+        self, pending_transaction, potential_trade, trade_data, action
+    ):
+        receipt = await pending_transaction.confirmation
+        if receipt is None:
+            # not mined before the submitter gave up on it, which does not
+            # mean it never will be
+            logger.warning(
+                f"{action.name} of {potential_trade.token_address} unknown "
+                f"after timeout, transaction {pending_transaction.tx_hash}"
+            )
+            receipt = await self.wait_for_late_receipt(pending_transaction.tx_hash)
+        self.wallet_manager.invalidate_snapshot()
+
+        if receipt is None:
+            traded = await self.has_traded_by_balance(potential_trade, action)
+        else:
+            traded = receipt["status"] == 1
+        if traded:
+            logger.info(
+                f"{action.name} of {potential_trade.token_address} confirmed "
+                f"in transaction {pending_transaction.tx_hash}"
+            )
+            return
+
+        logger.error(
+            f"{action.name} of {potential_trade.token_address} failed "
+            f"in transaction {pending_transaction.tx_hash}"
+        )
+        if action == TradeAction.BUY:
+            # the token was monitored as soon as the buy was sent
+            await self.token_monitor.remove_monitored_token(
+                potential_trade.token_address.lower(),
+                potential_trade.pool_address.lower(),
+            )
+        else:
+            # the token was dropped from the monitor when the sell was sent
+            await self.token_monitor.add_monitored_token(
+                potential_trade,
+                TradeData(
+                    trade_type=TradeType.BUY,
+                    input_amount=trade_data.original_investment_eth,
+                    expected_amount=None,
+                    original_investment_eth=trade_data.original_investment_eth,
+                ),
+            )
+
+    async def wait_for_late_receipt(self, tx_hash):
+        """The receipt of a transaction mined after all, None if it never shows."""
+        eth = self.blockchain_manager.async_web3_instance.eth
+        waited = 0
+        while waited < self.LATE_RECEIPT_TIMEOUT:
+            await asyncio.sleep(self.LATE_RECEIPT_POLL_INTERVAL)
+            waited += self.LATE_RECEIPT_POLL_INTERVAL
+            try:
+                return await eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+            except Exception as error:
+                logger.error(f"Could not get receipt of {tx_hash}: {error}")
+        return None
+
+    async def has_traded_by_balance(self, potential_trade, action):
+        """
+        Whether a trade whose receipt never showed went through, going by the
+        token balance left in the wallet. When the balance cannot be read the
+        position is kept, so the monitor still sees any tokens the wallet holds.
+        """
+        try:
+            token_balance = await self.wallet_manager.get_token_balance(
+                potential_trade.token_address
+            )
+        except Exception as error:
+            logger.error(
+                f"Could not read balance of {potential_trade.token_address}: {error}"
+            )
+            return action == TradeAction.BUY
+        return (token_balance > 0) == (action == TradeAction.BUY)
@@ -2,6 +2,7 @@ import asyncio
 from copy import deepcopy
 from venv import logger
 
+from models.trade_action import TradeAction
 from models.trade_data import PotentialTrade, TradeData, TradeType
 
 
@@ -16,6 +17,7 @@ class SellHandler:
         wallet_manager,
         token_analysis,
         trade_evaluator,
+        batch_trade_evaluator,
         trade_controller,
     ):
         self.demo_mode = demo_mode
@@ -26,6 +28,7 @@ class SellHandler:
         self.wallet_manager = wallet_manager
         self.token_analysis = token_analysis
         self.trade_evaluator = trade_evaluator
+        self.batch_trade_evaluator = batch_trade_evaluator
         self.trade_controller = trade_controller
 
     async def sell_decreasing_tokens(self):
@@ -43,19 +46,105 @@ class SellHandler:
             await self.check_monitored_valid(token_address, pool_address)
 
         monitored_tokens = deepcopy(self.token_monitor.get_monitored_tokens())
+        # load all monitored balances in the same snapshot, and stop loading
+        # the balances of tokens sold or dropped from the monitor since
+        self.wallet_manager.set_tracked_tokens(
+            token_data["token_address"] for token_data in monitored_tokens.values()
+        )
+        self.protocol_manager.watch_pools(
+            "sell",
+            [token_data["pool_address"] for token_data in monitored_tokens.values()],
+        )
 
         logger.info("sell_decreasing_tokens_from_monitor: checking monitored_tokens")
-        # Create tasks for all tokens
-        tasks = [
-            self.process_decreasing_token(token_data)
-            for _, token_data in monitored_tokens.items()
+        positions = [
+            position
+            for position in await asyncio.gather(
+                *[
+                    self.check_decreasing_token(token_data)
+                    for token_data in monitored_tokens.values()
+                ]
+            )
+            if position is not None
         ]
+        if not positions:
+            return
+
+        # amount in ETH we'd expect if we sold right now, and the tokens the
+        # original investment buys now; as before batching, a position is only
+        # evaluated when both quotes succeed. Quoted in one batch.
+        expected_amounts, current_token_amounts = await asyncio.gather(
+            asyncio.gather(
+                *[
+                    self.protocol_manager.get_max_native_for_token(
+                        potential_trade.token_address,
+                        trade_data.input_amount,
+                        potential_trade.fee,
+                    )
+                    for potential_trade, trade_data in positions
+                ]
+            ),
+            asyncio.gather(
+                *[
+                    self.protocol_manager.get_min_token_for_native(
+                        potential_trade.token_address,
+                        trade_data.original_investment_eth,
+                        potential_trade.fee,
+                    )
+                    for potential_trade, trade_data in positions
+                ]
+            ),
+        )
+        for (potential_trade, _), expected_amount, current_token_amount in zip(
+            positions, expected_amounts, current_token_amounts
+        ):
+            if expected_amount >= 0 and current_token_amount >= 0:
+                self.protocol_manager.mark_pool_quoted(
+                    potential_trade.pool_address, "sell"
+                )
+        # a buy and a sell, the same for every token
+        total_gas_cost = await self.blockchain_manager.calculate_gas_cost_wei(2)
+        evaluation = self.batch_trade_evaluator.evaluate_sells(
+            expected_amounts,
+            current_token_amounts,
+            [potential_trade.token_base_value for potential_trade, _ in positions],
+            [trade_data.original_investment_eth for _, trade_data in positions],
+            [potential_trade.fee for potential_trade, _ in positions],
+            total_gas_cost,
+        )
+        logger.info(
+            f"Evaluated {len(positions)} monitored tokens, "
+            f"{int(evaluation.sell.sum())} to sell, "
+            f"{evaluation.rechecked} rechecked near a threshold"
+        )
+
+        tasks = []
+        for index, (potential_trade, trade_data) in enumerate(positions):
+            trade_data.expected_amount = expected_amounts[index]
+            # Check if token amount or current_token_amount is negative or invalid
+            if not evaluation.valid[index]:
+                logger.error("Invalid token amount. Cannot proceed further.")
+                continue
+            tasks.append(
+                self.act_on_decreasing_token(
+                    potential_trade,
+                    trade_data,
+                    float(evaluation.current_roi[index]),
+                    float(evaluation.expected_roi[index]),
+                    bool(evaluation.sell[index]),
+                    total_gas_cost,
+                )
+            )
 
         # Run all tasks concurrently
         await asyncio.gather(*tasks)
 
-    async def process_decreasing_token(self, token_data):
-        actual_token_balance = self.wallet_manager.get_token_balance(
+    async def check_decreasing_token(self, token_data):
+        """
+        (PotentialTrade, TradeData) of a monitored token whose pool moved since
+        the last check, None if it can be skipped.
+        """
+        actual_token_balance = await self.wallet_manager.get_token_balance(
             token_data["token_address"]
         )
 
@@ -67,6 +156,15 @@ class SellHandler:
             token_data["token_base_value"],
         )
 
+        if not self.protocol_manager.pool_has_changed(
+            potential_trade.pool_address, "sell"
+        ):
+            logger.info(
+                f"monitored token {potential_trade.token_address}: "
+                "pool unchanged, skipping"
+            )
+            return None
+
         logger.info(
             f"sell_decreasing_tokens_from_monitor: token: {potential_trade.token_address} fee: {potential_trade.fee} pool_address: {potential_trade.pool_address} token_base_value: {potential_trade.token_base_value}"
         )
@@ -77,70 +175,37 @@ class SellHandler:
             expected_amount=None,
             original_investment_eth=token_data["input_amount"],
         )
+        return potential_trade, trade_data_sell
 
-        await self.evaluate_decreasing_token(
-            potential_trade,
-            trade_data_sell,
-        )
-
-    async def evaluate_decreasing_token(
+    async def act_on_decreasing_token(
         self,
         potential_trade: PotentialTrade,
         trade_data: TradeData,
+        current_roi_multiplier,
+        expected_roi_multiplier,
+        has_reached_roi_or_decreased,
+        total_gas_cost,
     ):
-        logger.info("evaluate_decreasing_token: start")
-        # process the token prices for demo mode
-        current_token_amount = await self.protocol_manager.get_min_token_for_native(
-            potential_trade.token_address,
-            trade_data.original_investment_eth,
-            potential_trade.fee,
-        )
-
-        # amount in ETH we'd expect if we sold right now
-        trade_data.expected_amount = (
-            await self.protocol_manager.get_max_native_for_token(
-                potential_trade.token_address,
-                trade_data.input_amount,
-                potential_trade.fee,
-            )
-        )
-
-        # Check if token amount or current_token_amount is negative or invalid
-        if trade_data.expected_amount < 0 or current_token_amount < 0:
-            # Handle the error or invalid token amount
-            logger.error("Invalid token amount. Cannot proceed further.")
-            return  # or raise an exception, return an error code, or take appropriate action
-
-        # check against amount paid for the tokens
-        # did we make a ROI?
-        current_roi_multiplier = (
-            float(trade_data.expected_amount)
-            / float(trade_data.original_investment_eth)  # eg. 0.08 / 0.06
-            if potential_trade.token_base_value > 0
-            else 0
-        )
-
-        expected_roi_multiplier = self.trade_evaluator.calculate_roi_multiplier(
-            potential_trade, trade_data
-        )
-
         await self.token_monitor.update_monitored_token(
             potential_trade,
             {
-                "current_roi": float(current_roi_multiplier),
-                "expected_roi": float(expected_roi_multiplier),
+                "current_roi": current_roi_multiplier,
+                "expected_roi": expected_roi_multiplier,
             },
         )
 
-        has_reached_roi_or_decreased = (
-            current_roi_multiplier >= expected_roi_multiplier
-        ) or (
-            current_roi_multiplier
-            < self.token_analysis.data_manager.config["price_decrease_threshold"]
+        # recent quotes of the token, read from history instead of quoting again
+        price_series = self.protocol_manager.get_price_series(
+            potential_trade.token_address, potential_trade.fee, TradeAction.SELL
+        )
+        price_stats = (
+            price_series.get_stats(self.data_manager.config["monitor_timeframe"] * 60)
+            if price_series is not None
+            else None
         )
 
         logger.info(
-            f"Selling decreasing tokens: current_price: {current_token_amount}, \
+            f"Selling decreasing tokens: price_history: {price_stats}, \
                 trade_data.original_investment_eth:{trade_data.original_investment_eth}, current_roi_multiplier: {current_roi_multiplier}, \
                     expected_multiplier:{expected_roi_multiplier} trade_data.expected_amount: {trade_data.expected_amount}"
         )
@@ -150,7 +215,12 @@ class SellHandler:
                 potential_trade,
                 trade_data,
                 current_roi_multiplier,
-                expected_roi_multiplier,
+                # exact target, so the sold reason matches the scalar comparison
+                self.trade_evaluator.calculate_roi_multiplier_for_gas(
+                    trade_data.original_investment_eth,
+                    potential_trade.fee,
+                    total_gas_cost,
+                ),
             )
 
     async def sell(
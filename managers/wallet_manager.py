@@ -4,9 +4,12 @@ import json
 import aiofiles
 from web3 import Web3
 
+from defi.multicall import Multicall, MulticallError
 from logger_config import logger
 from managers.blockchain_manager import BlockchainManager
 from managers.data_management import DataManagement
+from models.portfolio_snapshot import PortfolioSnapshot
+from utils import to_checksum_address
 
 
 class WalletManager:
@@ -23,9 +26,15 @@ class WalletManager:
         self.demo_mode = demo_mode
         self.demo_balances = self.load_demo_balances(reset_userdata_on_load)
         self.lock = asyncio.Lock()  # Add a lock
+        self.multicall = Multicall(blockchain_manager)
+        # tokens and router spenders included in every portfolio snapshot
+        self.tracked_tokens = set()
+        self.spenders = set()
+        self.snapshot: PortfolioSnapshot = None
+        self.snapshot_lock = asyncio.Lock()
 
-    def get_native_token_balance_percentage(self, percentage):
-        balance = self.get_token_balance(
+    async def get_native_token_balance_percentage(self, percentage):
+        balance = await self.get_token_balance(
             self.blockchain_manager.current_native_token_address.lower()
         )
         return int(balance * percentage)
@@ -34,10 +43,8 @@ class WalletManager:
         current_chain_name = self.blockchain_manager.get_current_chain().name
         return self.demo_balances[current_chain_name]["tokens"]
 
-    def get_token_balance(self, token_address):
-        token_address = self.blockchain_manager.web3_instance.to_checksum_address(
-            token_address
-        )
+    async def get_token_balance(self, token_address):
+        token_address = to_checksum_address(token_address)
         if self.demo_mode:
             current_chain_name = self.blockchain_manager.get_current_chain().name
 
@@ -46,13 +53,160 @@ class WalletManager:
             )
             return balance
         else:
-            balance = self.blockchain_manager.get_token_balance(
-                self.wallet_address, token_address
+            self.track_tokens([token_address])
+            snapshot = await self.get_snapshot()
+            return self.read_from_snapshot(
+                snapshot.token_balances, snapshot, token_address.lower()
             )
-            return balance
 
-    def get_native_token_balance(self):
-        balance = self.get_token_balance(
+    def track_tokens(self, token_addresses):
+        for token_address in token_addresses:
+            self.tracked_tokens.add(token_address.lower())
+
+    def set_tracked_tokens(self, token_addresses):
+        """
+        Tracks the given tokens and the wrapped native token, and stops
+        tracking the rest, so sold tokens leave the snapshot. Untracked tokens
+        are tracked again when their balance is read.
+        """
+        self.tracked_tokens = {
+            token_address.lower() for token_address in token_addresses
+        }
+        self.tracked_tokens.add(
+            self.blockchain_manager.current_native_token_address.lower()
+        )
+
+    def read_from_snapshot(self, values, snapshot: PortfolioSnapshot, key):
+        if key in snapshot.errors:
+            raise MulticallError(f"Reading {key} failed: {snapshot.errors[key]}")
+        return values[key]
+
+    def add_spender(self, spender_address):
+        self.spenders.add(spender_address.lower())
+
+    async def get_allowance(self, token_address, spender_address):
+        self.track_tokens([token_address])
+        self.add_spender(spender_address)
+        snapshot = await self.get_snapshot()
+        return self.read_from_snapshot(
+            snapshot.allowances,
+            snapshot,
+            (token_address.lower(), spender_address.lower()),
+        )
+
+    def invalidate_snapshot(self):
+        # our own transactions change balances before the next block is seen
+        self.snapshot = None
+
+    def is_snapshot_current(self, block_number):
+        if self.snapshot is None or self.snapshot.block_number != block_number:
+            return False
+        return all(
+            self.snapshot.has_read(token) for token in self.tracked_tokens
+        ) and all(
+            self.snapshot.has_read((token, spender))
+            for token in self.tracked_tokens
+            for spender in self.spenders
+        )
+
+    async def get_snapshot(self) -> PortfolioSnapshot:
+        """
+        Balances of the wallet and allowances of the tracked tokens, read in one
+        multicall and reused for the rest of the block.
+        """
+        block_number = await self.blockchain_manager.block_tracker.get_block_number()
+        if self.is_snapshot_current(block_number):
+            return self.snapshot
+
+        async with self.snapshot_lock:  # concurrent readers share one load
+            if not self.is_snapshot_current(block_number):
+                self.snapshot = await self.load_snapshot(block_number)
+        return self.snapshot
+
+    async def load_snapshot(self, block_number) -> PortfolioSnapshot:
+        """
+        A call that fails in the multicall, e.g. balanceOf of a honeypot, is
+        read again on its own. Reads failing twice are stored as errors of
+        their own token, so they do not fail the rest of the snapshot.
+        """
+        tokens = sorted(self.tracked_tokens)
+        spenders = sorted(self.spenders)
+        token_contracts = [
+            self.blockchain_manager.get_contract(
+                token, "erc20", self.blockchain_manager.erc20_abi
+            )
+            for token in tokens
+        ]
+        snapshot = PortfolioSnapshot(block_number, None)
+        # (dict of the snapshot the value goes to, key, call)
+        reads = [
+            (
+                snapshot.token_balances,
+                token,
+                contract.functions.balanceOf(self.wallet_address),
+            )
+            for token, contract in zip(tokens, token_contracts)
+        ]
+        reads += [
+            (
+                snapshot.allowances,
+                (token, spender),
+                contract.functions.allowance(
+                    self.wallet_address, to_checksum_address(spender)
+                ),
+            )
+            for token, contract in zip(tokens, token_contracts)
+            for spender in spenders
+        ]
+        native_balance_call = self.multicall.get_contract().functions.getEthBalance(
+            self.wallet_address
+        )
+        results = await self.multicall.try_aggregate(
+            [native_balance_call] + [call for _, _, call in reads]
+        )
+
+        if results[0].success:
+            snapshot.native_balance = self.multicall.unwrap(results[0])
+        failed_reads = []
+        for (values, key, call), result in zip(reads, results[1:]):
+            if result.success:
+                values[key] = self.multicall.unwrap(result)
+            else:
+                failed_reads.append((values, key, call))
+        if failed_reads:
+            await self.read_one_by_one(snapshot, failed_reads)
+        if snapshot.native_balance is None:
+            try:
+                snapshot.native_balance = (
+                    await self.blockchain_manager.async_web3_instance.eth.get_balance(
+                        self.wallet_address
+                    )
+                )
+            except Exception as error:
+                logger.error(f"Reading the native balance failed: {error}")
+
+        logger.info(
+            f"Portfolio snapshot for block {block_number}: {len(tokens)} tokens, "
+            f"{len(reads) - len(tokens)} allowances, {len(failed_reads)} read again, "
+            f"{len(snapshot.errors)} failed"
+        )
+        return snapshot
+
+    async def read_one_by_one(self, snapshot: PortfolioSnapshot, failed_reads):
+        results = await asyncio.gather(
+            *[call.call() for _, _, call in failed_reads], return_exceptions=True
+        )
+        for (values, key, _), result in zip(failed_reads, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    f"Reading {key} for the portfolio snapshot failed: {result}"
+                )
+                snapshot.errors[key] = str(result)
+            else:
+                values[key] = result
+
+    async def get_native_token_balance(self):
+        balance = await self.get_token_balance(
             self.blockchain_manager.current_native_token_address.lower()
         )
         return balance
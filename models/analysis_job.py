@@ -0,0 +1,14 @@
+import asyncio
+from dataclasses import dataclass
+
+from models.defi_structures import Fee, Pool, Token
+
+
+@dataclass
+class AnalysisJob:
+    token: Token
+    fee: Fee
+    pool: Pool
+    # resolves with (price_has_increased, token_base_value)
+    result: asyncio.Future
+    queued_at: float
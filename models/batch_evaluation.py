@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class BuyEvaluation:
+    buy: np.ndarray  # bool per watchlist token
+    keep_watching: np.ndarray  # bool, False removes the token from the watchlist
+    rechecked: int  # rows decided with Decimal arithmetic near a threshold
+
+
+@dataclass
+class SellEvaluation:
+    valid: np.ndarray  # bool, False when a quote of the position failed
+    sell: np.ndarray  # bool per monitored token
+    current_roi: np.ndarray
+    expected_roi: np.ndarray
+    rechecked: int
@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class CachedResponse:
+    data: Any
+    size: int  # bytes of the response body
+    fetched_at: float
@@ -10,13 +10,20 @@ class Token:
 
 class Pool:
     def __init__(
-        self, id: str, token0: Token, token1: Token, fee: int, volumeUSD: float
+        self,
+        id: str,
+        token0: Token,
+        token1: Token,
+        fee: int,
+        volumeUSD: float,
+        created_timestamp: int = 0,
     ):
         self.id = id.lower()
         self.token0 = token0
         self.token1 = token1
         self.fee = fee
         self.volumeUSD = volumeUSD
+        self.created_timestamp = created_timestamp
 
     def to_json(self):
         return {"id": self.id}
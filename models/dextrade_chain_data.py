@@ -13,4 +13,8 @@ class DexTradeChainData:
     native_token_name: str
     native_token_address: str
     supported_dex: str
+    multicall_address: str
+    # pools are deployed with CREATE2 by this address (the factory on Uniswap)
+    pool_deployer_address: str
+    pool_init_code_hash: str
     # Additional chain-specific properties if needed
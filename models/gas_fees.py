@@ -0,0 +1,13 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+
+@dataclass
+class GasFees:
+    block_number: int
+    gas_price: int
+    # None on chains without EIP-1559 fee history
+    base_fee: Optional[int] = None
+    # priority fee (wei) per reward percentile, e.g. {50: 1500000000}
+    priority_fees: Dict[int, int] = field(default_factory=dict)
+    updated_at: float = 0
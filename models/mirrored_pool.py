@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class MirroredPool:
+    address: str
+    sqrt_price_x96: int
+    tick: int
+    liquidity: int
+    # block of the last change seen and a counter bumped on every change
+    block_number: int
+    version: int = 0
@@ -0,0 +1,11 @@
+import asyncio
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PendingTransaction:
+    tx_hash: str
+    nonce: int
+    sent_at: float
+    # resolves with the receipt, or None if it was not mined before the timeout
+    confirmation: asyncio.Future = field(default_factory=asyncio.Future)
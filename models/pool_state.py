@@ -0,0 +1,18 @@
+from dataclasses import dataclass, field
+from typing import Dict
+
+
+@dataclass
+class PoolState:
+    address: str
+    token0: str
+    token1: str
+    fee: int
+    tick_spacing: int
+    sqrt_price_x96: int
+    tick: int
+    liquidity: int
+    # tick bitmap words and liquidityNet of the initialized ticks inside them
+    tick_bitmap: Dict[int, int] = field(default_factory=dict)
+    liquidity_net: Dict[int, int] = field(default_factory=dict)
+    updated_at: float = 0
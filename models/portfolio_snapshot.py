@@ -0,0 +1,21 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple, Union
+
+
+@dataclass
+class PortfolioSnapshot:
+    block_number: int
+    # balance of the chain's gas token (ETH, BNB) held by the wallet, None if
+    # it could not be read
+    native_balance: Optional[int]
+    # ERC20 balances keyed by lowercase token address
+    token_balances: Dict[str, int] = field(default_factory=dict)
+    # allowances keyed by (lowercase token address, lowercase spender address)
+    allowances: Dict[Tuple[str, str], int] = field(default_factory=dict)
+    # token address or (token, spender) of reads that failed, with the error
+    errors: Dict[Union[str, Tuple[str, str]], str] = field(default_factory=dict)
+
+    def has_read(self, key):
+        return (
+            key in self.token_balances or key in self.allowances or key in self.errors
+        )
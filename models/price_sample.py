@@ -0,0 +1,8 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class PriceSample:
+    trade_amount: int  # native token amount the quote is for
+    token_amount: int  # -1 when the quote failed
+    volume_usd: float  # -1 when the pool metrics could not be read
@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ProviderStats:
+    url: str
+    requests: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    consecutive_errors: int = 0
+    # exponentially weighted moving averages, 0 until the first request
+    latency: float = 0
+    error_rate: float = 0
+    ejected_until: float = 0
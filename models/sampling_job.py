@@ -0,0 +1,15 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+
+@dataclass
+class SamplingJob:
+    # called with None for the first sample and the first sample for the second
+    take_sample: Callable[[Optional[Any]], Awaitable[Any]]
+    window: float  # seconds between the two samples
+    # maps (first sample, second sample) to the result of the job
+    evaluate: Callable[[Any, Any], Any]
+    result: asyncio.Future
+    first_sample: Optional[Any] = None
+    sampled_once: bool = False
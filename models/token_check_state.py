@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class TokenCheckState(Enum):
+    IN_FLIGHT = "in_flight"  # queued or being analysed
+    REJECTED = "rejected"  # failed the exploit check or the price check
+    ACCEPTED = "accepted"  # passed the price check and went to the watchlist
+    FAILED = "failed"  # the analysis errored or the price could not be read
@@ -4,9 +4,15 @@ import time
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 from eth_typing.evm import Address, ChecksumAddress
-from web3 import Web3
+from web3 import AsyncWeb3, Web3
+from web3.contract.contract import ContractFunction
 from web3.exceptions import NameNotFound
 
+from defi.transaction_submitter import TransactionSubmitter
+from managers.contract_registry import ContractRegistry
+from models.pending_transaction import PendingTransaction
+from utils import to_checksum_address
+
 AddressLike = Union[Address, ChecksumAddress]
 MAX_UINT256 = 2**256 - 1
 
@@ -19,6 +25,9 @@ class Pancakeswap:
     address: AddressLike
     version: int
 
+    # fixed, the swap's gas estimate reverts while its approval is unmined
+    SWAP_GAS_LIMIT = 300000
+
     w3: Web3
 
     def _str_to_addr(self, s: Union[AddressLike, str]) -> Address:
@@ -44,8 +53,23 @@ class Pancakeswap:
         use_testnet=False,
         factory_contract_addr: Optional[str] = None,
         router_contract_addr: Optional[str] = None,
+        async_w3: Optional[AsyncWeb3] = None,
+        gas_oracle=None,
+        contract_registry: Optional[ContractRegistry] = None,
+        transaction_submitter: Optional[TransactionSubmitter] = None,
     ) -> None:
         self.w3 = w3
+        # async provider used for every RPC of the trading path
+        self.async_w3 = async_w3
+        self.gas_oracle = gas_oracle
+        self.chain_name = "bsc_testnet" if use_testnet else "bsc_mainnet"
+        self.contract_registry = contract_registry or ContractRegistry(async_w3)
+        # optional async (token, spender) -> allowance, e.g. a cached snapshot
+        self.allowance_reader = None
+        # optional callback run once an approval is sent, e.g. to drop a cache
+        self.approval_listener = None
+        # tokens whose approval is sent but not mined yet
+        self.pending_approvals = set()
         self.w3.eth.default_account = w3.eth.account.from_key(
             wallet_private_key
         ).address
@@ -57,6 +81,10 @@ class Pancakeswap:
         self.erc20_abi = self.load_abi("erc20")
         self.main_account = self.w3.eth.account.from_key(self.wallet_private_key)
         self.wallet_address = self.main_account.address
+        # shared with the rest of the bot so that all sends use one nonce counter
+        self.transaction_submitter = transaction_submitter or TransactionSubmitter(
+            async_w3, self.main_account, self.get_gas_price
+        )
         # Get the quoter contract address
         quoter_mainnet_address = "0xB048Bbc1Ee6b733FFfCFb9e9CeF7375518e25997"
         quoter_testnet_address = "0xbC203d7f83677c7ed3F7acEc959963E7F4ECC5C2"
@@ -83,124 +111,160 @@ class Pancakeswap:
         self.spender_address = w3.to_checksum_address(
             "0x1b81D678ffb9C0263b24A97847620C99d213eB14"
         )
+        if async_w3 is not None:
+            self.async_quoter_contract = async_w3.eth.contract(
+                address=w3.to_checksum_address(quoter_contract_address),
+                abi=self.quoter_abi,
+            )
+            self.async_router_contract = async_w3.eth.contract(
+                address=w3.to_checksum_address(router_contract_address),
+                abi=self.router_abi,
+            )
 
     def load_abi(self, name):
         path = os.path.join(os.path.dirname(__file__), "abis", f"{name}.abi")
         with open(path, "r") as f:
             return json.load(f)  # This parses the JSON into a Python object
 
-    def check_approval(self, token_address: AddressLike) -> bool:
-        token = self.w3.eth.contract(
-            address=self._str_to_addr(token_address), abi=self.erc20_abi
+    async def get_gas_price(self) -> int:
+        if self.gas_oracle is not None:
+            return await self.gas_oracle.get_gas_price()
+        return await self.async_w3.eth.gas_price
+
+    def get_token_contract(self, token_address: AddressLike):
+        return self.contract_registry.get_contract(
+            self.chain_name, token_address, "erc20", self.erc20_abi
         )
-        params = {}
-        allowance = token.functions.allowance(
+
+    async def check_approval(self, token_address: AddressLike) -> bool:
+        if to_checksum_address(token_address) in self.pending_approvals:
+            return True
+        if self.allowance_reader is not None:
+            allowance = await self.allowance_reader(
+                to_checksum_address(token_address), self.spender_address
+            )
+            return allowance > 0
+        token = self.get_token_contract(token_address)
+        allowance = await token.functions.allowance(
             self.w3.eth.default_account, self._str_to_addr(self.spender_address)
         ).call()
         return allowance > 0
 
-    def approve_tokens(self, token_address: AddressLike) -> Dict[str, Any]:
-        token = self.w3.eth.contract(
-            address=self._str_to_addr(token_address), abi=self.erc20_abi
-        )
+    async def approve_tokens(self, token_address: AddressLike) -> PendingTransaction:
+        """
+        Sends the approval without waiting for it to be mined; the shared
+        nonce counter orders it before the trade that needs it.
+        """
+        token = self.get_token_contract(token_address)
         transaction = token.functions.approve(
             self._str_to_addr(self.spender_address),  # Set the spender address
             MAX_UINT256,  # Approve max amount
         )
-        estimate_gas = transaction.estimate_gas()
-
-        gas_price = self.w3.eth.gas_price
+        estimate_gas = await transaction.estimate_gas(
+            {"from": self.w3.eth.default_account}
+        )
         gas_limit = estimate_gas + int(estimate_gas * 0.1)  # Add 10% buffer
 
-        # Build the transaction
-        approve_transaction = transaction.build_transaction(
-            {
-                "gasPrice": gas_price,
-                "gas": gas_limit,
-                "from": self.w3.eth.default_account,
-                "nonce": self.w3.eth.get_transaction_count(self.w3.eth.default_account),
-            }
+        pending_transaction = await self.transaction_submitter.submit(
+            transaction, {"gas": gas_limit}
         )
-
-        # Sign and send the transaction
-        signed_transaction = self.w3.eth.account.sign_transaction(
-            approve_transaction, self.wallet_private_key
+        approved_token = to_checksum_address(token_address)
+        self.pending_approvals.add(approved_token)
+        # once mined the allowance is read again, a failed approval is retried
+        pending_transaction.confirmation.add_done_callback(
+            lambda _: self.pending_approvals.discard(approved_token)
         )
-        tx_hash = self.w3.eth.send_raw_transaction(signed_transaction.rawTransaction)
-
-        # Wait for the transaction to be mined
-        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        if self.approval_listener is not None:
+            self.approval_listener()
+        return pending_transaction
 
-        return {
-            "transaction_hash": tx_hash.hex(),
-            "gas_used": receipt["gasUsed"],
-        }
-
-    def get_price_input(
+    def get_price_input_call(
         self,
         token0: AddressLike,  # input token
         token1: AddressLike,  # output token
         qty: int,
         fee: Optional[int] = None,
-    ) -> int:
+        quoter_contract=None,
+    ) -> ContractFunction:
+        """Builds the quoter call without executing it, e.g. for a multicall."""
+        quoter_contract = quoter_contract or self.quoter_contract
         params = {
-            "tokenIn": self.w3.to_checksum_address(token0),
-            "tokenOut": self.w3.to_checksum_address(token1),
+            "tokenIn": to_checksum_address(token0),
+            "tokenOut": to_checksum_address(token1),
             "amount": int(qty),
             "fee": int(fee),
             "sqrtPriceLimitX96": 0,
         }
+        return quoter_contract.functions.quoteExactOutputSingle(params)
 
-        response = self.quoter_contract.functions.quoteExactOutputSingle(params).call()
+    def get_price_input(
+        self,
+        token0: AddressLike,  # input token
+        token1: AddressLike,  # output token
+        qty: int,
+        fee: Optional[int] = None,
+    ) -> int:
+        response = self.get_price_input_call(token0, token1, qty, fee).call()
         amount = response[0]
 
         return amount
 
-    def get_price_output(
+    def get_price_output_call(
         self,
         token0: AddressLike,
         token1: AddressLike,
         qty: int,
         fee: Optional[int] = None,
-    ) -> int:
+        quoter_contract=None,
+    ) -> ContractFunction:
+        """Builds the quoter call without executing it, e.g. for a multicall."""
+        quoter_contract = quoter_contract or self.quoter_contract
         params = {
-            "tokenIn": self.w3.to_checksum_address(token0),
-            "tokenOut": self.w3.to_checksum_address(token1),
+            "tokenIn": to_checksum_address(token0),
+            "tokenOut": to_checksum_address(token1),
             "amountIn": int(qty),
             "fee": int(fee),
             "sqrtPriceLimitX96": 0,
         }
+        return quoter_contract.functions.quoteExactInputSingle(params)
 
-        response = self.quoter_contract.functions.quoteExactInputSingle(params).call()
+    def get_price_output(
+        self,
+        token0: AddressLike,
+        token1: AddressLike,
+        qty: int,
+        fee: Optional[int] = None,
+    ) -> int:
+        response = self.get_price_output_call(token0, token1, qty, fee).call()
         amount = response[0]
 
         return amount
 
-    def make_trade(
+    async def make_trade(
         self,
         token_in: AddressLike,
         token_out: AddressLike,
         amount: int,
         fee: Optional[int] = None,
         slippage: Optional[float] = None,
-    ) -> Dict[str, Any]:
-        if not self.check_approval(token_in):
-            self.approve_tokens(token_in)
+    ) -> PendingTransaction:
+        # only the token paid into the router needs an allowance
+        if not await self.check_approval(token_in):
+            await self.approve_tokens(token_in)
 
-        if not self.check_approval(token_out):
-            self.approve_tokens(token_out)
         if slippage is None:
             slippage = self.default_slippage
 
-        min_tokens_bought = int(
-            (1 - slippage) * self.get_price_output(token_in, token_out, amount, fee)
-        )
+        price_output = await self.get_price_output_call(
+            token_in, token_out, amount, fee, self.async_quoter_contract
+        ).call()
+        min_tokens_bought = int((1 - slippage) * price_output[0])
 
         sqrt_price_limit_x96 = 0
         # Prepare the function parameters
         params = {
-            "tokenIn": Web3.to_checksum_address(token_in),
-            "tokenOut": Web3.to_checksum_address(token_out),
+            "tokenIn": to_checksum_address(token_in),
+            "tokenOut": to_checksum_address(token_out),
             "fee": fee,
             "recipient": self.wallet_address,
             "deadline": self._deadline(),
@@ -210,26 +274,10 @@ class Pancakeswap:
         }
 
         # Prepare the transaction
-        transaction = self.router_contract.functions.exactInputSingle(params)
-        # Build the transaction
-        transaction_dict = {
-            "value": 0,
-            "gasPrice": self.w3.eth.gas_price,
-            "from": self.wallet_address,
-            "nonce": self.w3.eth.get_transaction_count(self.wallet_address),
-        }
-
-        # Build the transaction
-        trade_transaction = transaction.build_transaction(transaction_dict)
+        transaction = self.async_router_contract.functions.exactInputSingle(params)
 
-        # Sign and send the transaction
-        signed_transaction = self.main_account.sign_transaction(trade_transaction)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_transaction.rawTransaction)
-
-        # Wait for the transaction to be mined
-        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-
-        return {
-            "transaction_hash": tx_hash.hex(),
-            "gas_used": receipt["gasUsed"],
-        }
+        # Sent without waiting for it to be mined, the returned transaction
+        # resolves with the receipt
+        return await self.transaction_submitter.submit(
+            transaction, {"value": 0, "gas": self.SWAP_GAS_LIMIT}
+        )
@@ -0,0 +1,410 @@
+"""
+Local stand-in for the hosted subgraphs, serving pools built from the
+responses recorded in simulation/fixtures. It understands the subset of
+GraphQL the queries/ templates use: aliased collection fields with first,
+skip, orderBy, orderDirection and where arguments, where filters with the
+_gt/_gte/_lt/_lte/_in/_not/_contains suffixes and nested "field_" filters,
+and selection sets, which the response is projected onto.
+
+Point a chain's graph_url at it to run discovery offline:
+
+    python -m simulation.graphql_stand_in --subgraph-type messari --pools 10000
+"""
+import argparse
+import asyncio
+import bisect
+import copy
+import json
+import os
+import random
+import re
+import time
+from decimal import Decimal, InvalidOperation
+
+from aiohttp import web
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# collection field served per subgraph type
+COLLECTIONS = {
+    "uniswap_v3_eth": "pools",
+    "uniswap_v3_goerli": "pools",
+    "messari": "liquidityPools",
+}
+DEFAULT_FIRST = 100
+MAX_FIRST = 1000  # The Graph rejects larger pages
+
+TOKEN_PATTERN = re.compile(
+    r"(?P<skip>[\s,]+|#[^\n]*)"
+    r'|(?P<string>"(?:[^"\\]|\\.)*")'
+    r"|(?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)"
+    r"|(?P<name>[_A-Za-z][_0-9A-Za-z]*)"
+    r"|(?P<punct>[{}()\[\]:])"
+)
+FILTER_SUFFIXES = (
+    "_not_in",
+    "_not",
+    "_gte",
+    "_lte",
+    "_gt",
+    "_lt",
+    "_in",
+    "_contains",
+)
+
+
+class GraphQLSyntaxError(Exception):
+    pass
+
+
+def tokenize(query):
+    tokens = []
+    position = 0
+    while position < len(query):
+        match = TOKEN_PATTERN.match(query, position)
+        if match is None:
+            raise GraphQLSyntaxError(f"Unexpected character at {position}")
+        position = match.end()
+        if match.lastgroup != "skip":
+            tokens.append((match.lastgroup, match.group()))
+    return tokens
+
+
+class QueryParser:
+    """Parses a query into [(alias, field, arguments, selection)]."""
+
+    def __init__(self, query):
+        self.tokens = tokenize(query)
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][1]
+        return None
+
+    def take(self, expected=None):
+        if self.position >= len(self.tokens):
+            raise GraphQLSyntaxError("Unexpected end of query")
+        kind, value = self.tokens[self.position]
+        if expected is not None and value != expected:
+            raise GraphQLSyntaxError(f"Expected {expected!r}, got {value!r}")
+        self.position += 1
+        return kind, value
+
+    def parse(self):
+        if self.peek() == "query":
+            self.take()
+            if self.peek() != "{":
+                self.take()  # operation name
+        return self.parse_selection_set()
+
+    def parse_selection_set(self):
+        self.take("{")
+        selections = []
+        while self.peek() != "}":
+            _, name = self.take()
+            alias = name
+            if self.peek() == ":":
+                self.take(":")
+                _, name = self.take()
+            arguments = {}
+            if self.peek() == "(":
+                self.take("(")
+                while self.peek() != ")":
+                    _, argument_name = self.take()
+                    self.take(":")
+                    arguments[argument_name] = self.parse_value()
+                self.take(")")
+            selection = None
+            if self.peek() == "{":
+                selection = self.parse_selection_set()
+            selections.append((alias, name, arguments, selection))
+        self.take("}")
+        return selections
+
+    def parse_value(self):
+        kind, value = self.take()
+        if kind == "string":
+            return json.loads(value)
+        if kind == "number":
+            return Decimal(value)
+        if value == "[":
+            values = []
+            while self.peek() != "]":
+                values.append(self.parse_value())
+            self.take("]")
+            return values
+        if value == "{":
+            fields = {}
+            while self.peek() != "}":
+                _, name = self.take()
+                self.take(":")
+                fields[name] = self.parse_value()
+            self.take("}")
+            return fields
+        return {"true": True, "false": False, "null": None}.get(value, value)
+
+
+def comparable(value):
+    if isinstance(value, dict):
+        value = value.get("id")
+    if isinstance(value, Decimal):
+        return value
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        return str(value).lower()
+
+
+def matches(record, where):
+    for key, expected in where.items():
+        if key.endswith("_") and isinstance(expected, dict):
+            value = record.get(key[:-1])
+            nested = value if isinstance(value, list) else [value]
+            if not any(item and matches(item, expected) for item in nested):
+                return False
+            continue
+
+        operator = ""
+        field = key
+        for suffix in FILTER_SUFFIXES:
+            if key.endswith(suffix):
+                field, operator = key[: -len(suffix)], suffix
+                break
+        value = comparable(record.get(field))
+
+        if operator == "_contains":
+            if str(expected).lower() not in str(value):
+                return False
+        elif operator in ("_in", "_not_in"):
+            found = value in expected  # a set, see prepare_where
+            if found != (operator == "_in"):
+                return False
+        else:
+            expected = comparable(expected)
+            try:
+                result = {
+                    "": value == expected,
+                    "_not": value != expected,
+                    "_gt": value > expected,
+                    "_gte": value >= expected,
+                    "_lt": value < expected,
+                    "_lte": value <= expected,
+                }[operator]
+            except TypeError:  # a number compared with a non-number
+                result = False
+            if not result:
+                return False
+    return True
+
+
+def prepare_where(where):
+    """Turns the lists of _in/_not_in filters into sets, once per query."""
+    prepared = {}
+    for key, expected in (where or {}).items():
+        if key.endswith("_") and isinstance(expected, dict):
+            expected = prepare_where(expected)
+        elif key.endswith(("_in", "_not_in")):
+            expected = frozenset(comparable(item) for item in expected)
+        prepared[key] = expected
+    return prepared
+
+
+def project(value, selection):
+    if selection is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, selection) for item in value]
+    if value is None:
+        return None
+    return {
+        alias: project(value.get(name), sub_selection)
+        for alias, name, _, sub_selection in selection
+    }
+
+
+class GraphQLStandIn:
+    """Serves one subgraph type's pools over HTTP, like the hosted subgraph."""
+
+    def __init__(self, subgraph_type, records):
+        if subgraph_type not in COLLECTIONS:
+            raise ValueError(f"No stand-in collection for {subgraph_type}")
+        self.collection = COLLECTIONS[subgraph_type]
+        self.records = sorted(records, key=lambda record: record["id"])
+        self.record_ids = [record["id"] for record in self.records]
+        self.records_by_id = {record["id"]: record for record in self.records}
+        self.query_count = 0
+        self.runner = None
+        self.url = None
+
+    def run_query(self, query):
+        data = {}
+        for alias, name, arguments, selection in QueryParser(query).parse():
+            if name != self.collection:
+                raise GraphQLSyntaxError(f"Type `Query` has no field `{name}`")
+            data[alias] = [
+                project(record, selection) for record in self.select(arguments)
+            ]
+        return data
+
+    def select(self, arguments):
+        first = int(arguments.get("first", DEFAULT_FIRST))
+        skip = int(arguments.get("skip", 0))
+        if first > MAX_FIRST:
+            raise GraphQLSyntaxError(f"first may not be larger than {MAX_FIRST}")
+        where = arguments.get("where") or {}
+        order_by = arguments.get("orderBy", "id")
+        descending = arguments.get("orderDirection") == "desc"
+
+        if "id_in" in where:
+            # pool lookups by id skip the scan
+            candidates = [
+                self.records_by_id[pool_id.lower()]
+                for pool_id in dict.fromkeys(where["id_in"])
+                if pool_id.lower() in self.records_by_id
+            ]
+            where = prepare_where(where)
+            selected = [record for record in candidates if matches(record, where)]
+            selected.sort(
+                key=lambda record: comparable(record.get(order_by)),
+                reverse=descending,
+            )
+            return selected[skip : skip + first]
+
+        where = prepare_where(where)
+
+        if order_by == "id" and not descending:
+            # records are kept in id order, so id_gt pages start with a bisect
+            start = 0
+            if "id_gt" in where:
+                start = bisect.bisect_right(self.record_ids, where.pop("id_gt"))
+            selected = []
+            for record in self.records[start:]:
+                if matches(record, where):
+                    selected.append(record)
+                    if len(selected) >= skip + first:
+                        break
+            return selected[skip:]
+
+        selected = [record for record in self.records if matches(record, where)]
+        selected.sort(
+            key=lambda record: comparable(record.get(order_by)), reverse=descending
+        )
+        return selected[skip : skip + first]
+
+    async def handle(self, request):
+        self.query_count += 1
+        try:
+            payload = await request.json()
+            data = self.run_query(payload["query"])
+        except (GraphQLSyntaxError, KeyError, ValueError) as error:
+            return web.json_response({"errors": [{"message": str(error)}]})
+        return web.json_response({"data": data})
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_post("/{path:.*}", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        bound_port = self.runner.addresses[0][1]
+        self.url = f"http://{host}:{bound_port}/"
+        return self.url
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+
+def load_fixture(subgraph_type):
+    fixture_name = "messari" if subgraph_type == "messari" else "uniswap_v3_eth"
+    path = os.path.join(FIXTURES_DIR, f"{fixture_name}_pools.json")
+    with open(path, "r") as json_file:
+        return json.load(json_file)["data"][COLLECTIONS[subgraph_type]]
+
+
+def generate_pools(subgraph_type, count, native_token_address, seed=1):
+    """
+    count pools cloned from the recorded fixture, each pairing a new token
+    with the native token and created within the last week.
+    """
+    fixture = load_fixture(subgraph_type)
+    generator = random.Random(seed)
+    native_token_address = native_token_address.lower()
+    now = int(time.time())
+    pools = []
+    for index in range(count):
+        pool = copy.deepcopy(fixture[index % len(fixture)])
+        # multiplying by an odd constant modulo 2**160 keeps the ids distinct
+        pool["id"] = f"0x{(index + 1) * 0x9E3779B97F4A7C15 % 2**160:040x}"
+        token = {
+            "id": f"0x{(index + 1) * 0xC2B2AE3D27D4EB4F % 2**160:040x}",
+            "symbol": f"TKN{index}",
+            "name": f"Token {index}",
+        }
+        native_token = {
+            "id": native_token_address,
+            "symbol": "WETH",
+            "name": "Wrapped Ether",
+        }
+        created = str(now - generator.randrange(7 * 24 * 3600))
+        scale = Decimal(generator.uniform(0.001, 2)).quantize(Decimal("0.000001"))
+
+        if subgraph_type == "messari":
+            pool["inputTokens"] = [native_token, token]
+            if index % 2:
+                pool["inputTokens"].reverse()
+            for fee in pool["fees"]:
+                fee["id"] = f"{fee['id'].rsplit('-', 1)[0]}-{pool['id']}"
+            pool["createdTimestamp"] = created
+            volume_field = "cumulativeVolumeUSD"
+        else:
+            pool["token0"], pool["token1"] = (
+                (native_token, token) if index % 2 else (token, native_token)
+            )
+            pool["createdAtTimestamp"] = created
+            pool["volumeUSD"] = str(Decimal(pool["volumeUSD"]) * scale)
+            volume_field = "untrackedVolumeUSD"
+        pool[volume_field] = str(Decimal(pool[volume_field]) * scale)
+        pool["totalValueLockedUSD"] = str(Decimal(pool["totalValueLockedUSD"]) * scale)
+        pools.append(pool)
+    return pools
+
+
+async def serve(subgraph_type, pool_count, native_token_address, host, port):
+    stand_in = GraphQLStandIn(
+        subgraph_type, generate_pools(subgraph_type, pool_count, native_token_address)
+    )
+    url = await stand_in.start(host, port)
+    print(f"Serving {pool_count} {subgraph_type} pools at {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stand_in.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--subgraph-type", default="uniswap_v3_eth")
+    parser.add_argument("--pools", type=int, default=1000)
+    parser.add_argument(
+        "--native-token-address",
+        default="0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    arguments = parser.parse_args()
+    asyncio.run(
+        serve(
+            arguments.subgraph_type,
+            arguments.pools,
+            arguments.native_token_address,
+            arguments.host,
+            arguments.port,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -137,11 +137,13 @@ class SimulatedDexClientWrapper:
         )
         return result
 
-    def make_trade(self, token_address, native_token_address, trade_amount, fee):
+    async def make_trade(self, token_address, native_token_address, trade_amount, fee):
         return
 
-    def make_trade_output(self, token_address, native_token_address, trade_amount):
+    async def make_trade_output(
+        self, token_address, native_token_address, trade_amount
+    ):
         return
 
-    def approve(self, token_address, max_approval):
+    async def approve(self, token_address, max_approval):
         return
@@ -0,0 +1,4 @@
+import os
+
+# logger_config writes to logs/app.log under the working directory
+os.makedirs("logs", exist_ok=True)
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from managers.graphql_stream_parser import GraphQLStreamParser
+
+BODY = json.dumps(
+    {
+        "data": {
+            "n": 123456,
+            "price": -1.5e-3,
+            "flag": True,
+            "missing": None,
+            "poolsWithToken0": [{"id": "0x01", "volumeUSD": "10.5"}],
+            "poolsWithToken1": [{"id": "0x02"}, {"id": "0x03", "fee": 3000}],
+        }
+    }
+).encode()
+
+
+def parse(body, chunk_size):
+    parser = GraphQLStreamParser()
+    items = []
+    for start in range(0, len(body), chunk_size):
+        items += parser.feed(body[start : start + chunk_size])
+    return items, parser.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, len(BODY)])
+def test_chunk_boundaries_do_not_cut_values(chunk_size):
+    items, response = parse(BODY, chunk_size)
+
+    assert items == [
+        ("poolsWithToken0", {"id": "0x01", "volumeUSD": "10.5"}),
+        ("poolsWithToken1", {"id": "0x02"}),
+        ("poolsWithToken1", {"id": "0x03", "fee": 3000}),
+    ]
+    assert response == {
+        "data": {"n": 123456, "price": -1.5e-3, "flag": True, "missing": None}
+    }
+
+
+def test_error_response_is_decoded_whole():
+    body = json.dumps({"errors": [{"message": "indexing error"}]}).encode()
+
+    items, response = parse(body, 1)
+
+    assert items == []
+    assert response == {"errors": [{"message": "indexing error"}]}
+
+
+def test_truncated_body_raises():
+    with pytest.raises(ValueError):
+        parse(BODY[:-10], 1)
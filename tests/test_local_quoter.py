@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+
+from defi.dex_client_wrapper import DexClientWrapper
+from defi.local_quoter import LocalQuoter
+from defi.v3_pool_math import Q96, get_sqrt_ratio_at_tick
+from models.pool_state import PoolState
+from pancakeswap import Pancakeswap
+
+TOKEN0 = "0x0000000000000000000000000000000000000001"
+TOKEN1 = "0x0000000000000000000000000000000000000002"
+TICK_SPACING = 60
+MIN_USABLE_TICK = -887220
+MAX_USABLE_TICK = 887220
+
+
+def make_full_range_pool():
+    """
+    The pool of the v3-periphery Quoter spec: a 0.3% pool at price 1 with one
+    full range position of 1000000 of each token.
+    """
+    pool_state = PoolState(
+        address="0x00000000000000000000000000000000000000aa",
+        token0=TOKEN0,
+        token1=TOKEN1,
+        fee=3000,
+        tick_spacing=TICK_SPACING,
+        sqrt_price_x96=Q96,
+        tick=0,
+        liquidity=1000000,
+        updated_at=0,
+    )
+    # the swap walks every bitmap word between the current tick and the position
+    lower_word = (MIN_USABLE_TICK // TICK_SPACING) >> 8
+    upper_word = (MAX_USABLE_TICK // TICK_SPACING) >> 8
+    pool_state.tick_bitmap = {word: 0 for word in range(lower_word, upper_word + 1)}
+    for tick, liquidity_net in (
+        (MIN_USABLE_TICK, pool_state.liquidity),
+        (MAX_USABLE_TICK, -pool_state.liquidity),
+    ):
+        compressed = tick // TICK_SPACING
+        pool_state.tick_bitmap[compressed >> 8] |= 1 << (compressed & 0xFF)
+        pool_state.liquidity_net[tick] = liquidity_net
+    assert get_sqrt_ratio_at_tick(pool_state.tick) == pool_state.sqrt_price_x96
+    return pool_state
+
+
+def make_local_quoter(client):
+    dex_client_wrapper = DexClientWrapper.__new__(DexClientWrapper)
+    dex_client_wrapper.client = client
+    local_quoter = LocalQuoter(None, dex_client_wrapper, None)
+    pool_state = make_full_range_pool()
+
+    async def get_pool_state(token_in, token_out, fee):
+        return pool_state
+
+    local_quoter.get_pool_state = get_pool_state
+    return local_quoter
+
+
+# (token_in, token_out, amount, Quoter result) of the v3-periphery Quoter spec
+EXACT_INPUT_QUOTES = [(TOKEN0, TOKEN1, 3, 1), (TOKEN1, TOKEN0, 3, 1)]
+EXACT_OUTPUT_QUOTES = [(TOKEN0, TOKEN1, 1, 3), (TOKEN1, TOKEN0, 1, 3)]
+
+
+@pytest.mark.parametrize("token_in, token_out, amount, quote", EXACT_INPUT_QUOTES)
+def test_uniswap_price_input_is_exact_input(token_in, token_out, amount, quote):
+    local_quoter = make_local_quoter(object())
+
+    assert (
+        asyncio.run(local_quoter.get_price_input(token_in, token_out, amount, 3000))
+        == quote
+    )
+
+
+@pytest.mark.parametrize("token_in, token_out, amount, quote", EXACT_OUTPUT_QUOTES)
+def test_uniswap_price_output_is_exact_output(token_in, token_out, amount, quote):
+    local_quoter = make_local_quoter(object())
+
+    assert (
+        asyncio.run(local_quoter.get_price_output(token_in, token_out, amount, 3000))
+        == quote
+    )
+
+
+@pytest.mark.parametrize("token_in, token_out, amount, quote", EXACT_OUTPUT_QUOTES)
+def test_pancakeswap_price_input_is_exact_output(token_in, token_out, amount, quote):
+    local_quoter = make_local_quoter(Pancakeswap.__new__(Pancakeswap))
+
+    assert (
+        asyncio.run(local_quoter.get_price_input(token_in, token_out, amount, 3000))
+        == quote
+    )
+
+
+@pytest.mark.parametrize("token_in, token_out, amount, quote", EXACT_INPUT_QUOTES)
+def test_pancakeswap_price_output_is_exact_input(token_in, token_out, amount, quote):
+    local_quoter = make_local_quoter(Pancakeswap.__new__(Pancakeswap))
+
+    assert (
+        asyncio.run(local_quoter.get_price_output(token_in, token_out, amount, 3000))
+        == quote
+    )
+
+
+def test_pool_states_drop_the_least_recently_quoted_pool():
+    class PoolFinder:
+        def get_pool_address(self, token_in, token_out, fee):
+            return token_in
+
+    local_quoter = LocalQuoter(None, None, PoolFinder(), max_pool_states=2)
+    reads = []
+
+    async def read_pool_state(pool_address, fee):
+        reads.append(pool_address)
+        pool_state = make_full_range_pool()
+        pool_state.updated_at = time.time()
+        return pool_state
+
+    local_quoter.read_pool_state = read_pool_state
+
+    async def quote_pools(pool_addresses):
+        for pool_address in pool_addresses:
+            await local_quoter.get_pool_state(pool_address, TOKEN1, 3000)
+
+    asyncio.run(quote_pools(["0xa", "0xb", "0xa", "0xc", "0xa", "0xb"]))
+
+    assert reads == ["0xa", "0xb", "0xc", "0xb"]
+    assert list(local_quoter.pool_states) == ["0xa", "0xb"]
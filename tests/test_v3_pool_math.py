@@ -0,0 +1,190 @@
+"""Vectors from the Uniswap v3-core TickMath and SwapMath specs."""
+import math
+
+import pytest
+
+from defi.v3_pool_math import (
+    MAX_SQRT_RATIO,
+    MAX_TICK,
+    MIN_SQRT_RATIO,
+    MIN_TICK,
+    Q96,
+    compute_swap_step,
+    get_sqrt_ratio_at_tick,
+    get_tick_at_sqrt_ratio,
+)
+
+
+def encode_price_sqrt(reserve1, reserve0):
+    return math.isqrt(reserve1 * Q96 * Q96 // reserve0)
+
+
+def expand_to_18_decimals(amount):
+    return amount * 10**18
+
+
+@pytest.mark.parametrize(
+    "tick, sqrt_ratio",
+    [
+        (MIN_TICK, MIN_SQRT_RATIO),
+        (MIN_TICK + 1, 4295343490),
+        (0, Q96),
+        (MAX_TICK - 1, 1461373636630004318706518188784493106690254656249),
+        (MAX_TICK, MAX_SQRT_RATIO),
+    ],
+)
+def test_get_sqrt_ratio_at_tick(tick, sqrt_ratio):
+    assert get_sqrt_ratio_at_tick(tick) == sqrt_ratio
+
+
+@pytest.mark.parametrize("tick", [MIN_TICK - 1, MAX_TICK + 1])
+def test_get_sqrt_ratio_at_tick_out_of_range(tick):
+    with pytest.raises(ValueError):
+        get_sqrt_ratio_at_tick(tick)
+
+
+@pytest.mark.parametrize(
+    "sqrt_ratio, tick",
+    [
+        (MIN_SQRT_RATIO, MIN_TICK),
+        (4295343490, MIN_TICK + 1),
+        (1461373636630004318706518188784493106690254656249, MAX_TICK - 1),
+        (MAX_SQRT_RATIO - 1, MAX_TICK - 1),
+    ],
+)
+def test_get_tick_at_sqrt_ratio(sqrt_ratio, tick):
+    assert get_tick_at_sqrt_ratio(sqrt_ratio) == tick
+
+
+@pytest.mark.parametrize("sqrt_ratio", [MIN_SQRT_RATIO - 1, MAX_SQRT_RATIO])
+def test_get_tick_at_sqrt_ratio_out_of_range(sqrt_ratio):
+    with pytest.raises(ValueError):
+        get_tick_at_sqrt_ratio(sqrt_ratio)
+
+
+@pytest.mark.parametrize(
+    "tick", [MIN_TICK + 1, -500000, -60, -1, 0, 1, 60, 123456, MAX_TICK - 1]
+)
+def test_tick_sqrt_ratio_round_trip(tick):
+    sqrt_ratio = get_sqrt_ratio_at_tick(tick)
+    assert get_tick_at_sqrt_ratio(sqrt_ratio) == tick
+    assert get_tick_at_sqrt_ratio(sqrt_ratio - 1) == tick - 1
+
+
+def test_exact_in_capped_at_price_target_one_for_zero():
+    price_target = encode_price_sqrt(101, 100)
+    sqrt_q, amount_in, amount_out, fee_amount = compute_swap_step(
+        encode_price_sqrt(1, 1),
+        price_target,
+        expand_to_18_decimals(2),
+        expand_to_18_decimals(1),
+        600,
+    )
+
+    assert amount_in == 9975124224178055
+    assert fee_amount == 5988667735148
+    assert amount_out == 9925619580021728
+    assert amount_in + fee_amount < expand_to_18_decimals(1)
+    assert sqrt_q == price_target
+
+
+def test_exact_out_capped_at_price_target_one_for_zero():
+    price_target = encode_price_sqrt(101, 100)
+    sqrt_q, amount_in, amount_out, fee_amount = compute_swap_step(
+        encode_price_sqrt(1, 1),
+        price_target,
+        expand_to_18_decimals(2),
+        -expand_to_18_decimals(1),
+        600,
+    )
+
+    assert amount_in == 9975124224178055
+    assert fee_amount == 5988667735148
+    assert amount_out == 9925619580021728
+    assert amount_out < expand_to_18_decimals(1)
+    assert sqrt_q == price_target
+
+
+def test_exact_in_fully_spent_one_for_zero():
+    price_target = encode_price_sqrt(1000, 100)
+    sqrt_q, amount_in, amount_out, fee_amount = compute_swap_step(
+        encode_price_sqrt(1, 1),
+        price_target,
+        expand_to_18_decimals(2),
+        expand_to_18_decimals(1),
+        600,
+    )
+
+    assert amount_in == 999400000000000000
+    assert fee_amount == 600000000000000
+    assert amount_out == 666399946655997866
+    assert amount_in + fee_amount == expand_to_18_decimals(1)
+    assert sqrt_q < price_target
+
+
+def test_exact_out_fully_received_one_for_zero():
+    price_target = encode_price_sqrt(10000, 100)
+    sqrt_q, amount_in, amount_out, fee_amount = compute_swap_step(
+        encode_price_sqrt(1, 1),
+        price_target,
+        expand_to_18_decimals(2),
+        -expand_to_18_decimals(1),
+        600,
+    )
+
+    assert amount_in == 2000000000000000000
+    assert fee_amount == 1200720432259356
+    assert amount_out == expand_to_18_decimals(1)
+    assert sqrt_q < price_target
+
+
+def test_amount_out_capped_at_desired_amount_out():
+    assert compute_swap_step(
+        417332158212080721273783715441582,
+        1452870262520218020823638996,
+        159344665391607089467575320103,
+        -1,
+        1,
+    ) == (417332158212080721273783715441581, 1, 1, 1)
+
+
+def test_target_price_of_1_uses_partial_input_amount():
+    sqrt_q, amount_in, amount_out, fee_amount = compute_swap_step(
+        2, 1, 1, 3915081100057732413702495386755767, 1
+    )
+
+    assert amount_in == 39614081257132168796771975168
+    assert fee_amount == 39614120871253040049813
+    assert amount_in + fee_amount <= 3915081100057732413702495386755767
+    assert amount_out == 0
+    assert sqrt_q == 1
+
+
+def test_entire_input_amount_taken_as_fee():
+    assert compute_swap_step(
+        2413, 79887613182836312, 1985041575832132834610021537970, 10, 1872
+    ) == (2413, 0, 0, 10)
+
+
+def test_intermediate_insufficient_liquidity_zero_for_one_exact_output():
+    sqrt_p = 20282409603651670423947251286016
+    sqrt_p_target = sqrt_p * 11 // 10
+
+    assert compute_swap_step(sqrt_p, sqrt_p_target, 1024, -4, 3000) == (
+        sqrt_p_target,
+        26215,
+        0,
+        79,
+    )
+
+
+def test_intermediate_insufficient_liquidity_one_for_zero_exact_output():
+    sqrt_p = 20282409603651670423947251286016
+    sqrt_p_target = sqrt_p * 9 // 10
+
+    assert compute_swap_step(sqrt_p, sqrt_p_target, 1024, -263000, 3000) == (
+        sqrt_p_target,
+        1,
+        26214,
+        1,
+    )
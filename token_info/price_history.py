@@ -0,0 +1,191 @@
+import math
+import time
+from array import array
+from collections import OrderedDict
+
+from models.trade_action import TradeAction
+
+
+class PriceSeries:
+    """
+    The latest CAPACITY quotes of one token in one pool in one direction, as
+    native token per token, with the pool's USD volume at the time of each quote. Samples live
+    in fixed size arrays used as a ring buffer, so appending is O(1) and a
+    series never grows past CAPACITY samples.
+    """
+
+    CAPACITY = 256
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.timestamps = array("d", [0.0]) * capacity
+        self.prices = array("d", [0.0]) * capacity
+        self.volumes = array("d", [0.0]) * capacity
+        self.start = 0
+        self.count = 0
+        self.volume_usd = math.nan  # latest known pool volume, nan if never read
+
+    def __len__(self):
+        return self.count
+
+    def append(self, price, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.count < self.capacity:
+            index = (self.start + self.count) % self.capacity
+            self.count += 1
+        else:
+            # full, overwrite the oldest sample
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.timestamps[index] = timestamp
+        self.prices[index] = price
+        self.volumes[index] = self.volume_usd
+
+    def set_volume(self, volume_usd):
+        self.volume_usd = volume_usd
+
+    def indexes(self, window=None):
+        """Buffer indexes of the samples of the last window seconds, oldest first."""
+        indexes = [
+            (self.start + offset) % self.capacity for offset in range(self.count)
+        ]
+        if window is None or not indexes:
+            return indexes
+        since = self.timestamps[indexes[-1]] - window
+        first = 0
+        while self.timestamps[indexes[first]] < since:
+            first += 1
+        return indexes[first:]
+
+    def latest(self):
+        """(timestamp, price) of the newest sample, None if there is none."""
+        if not self.count:
+            return None
+        index = (self.start + self.count - 1) % self.capacity
+        return self.timestamps[index], self.prices[index]
+
+    def min_price(self, window=None):
+        indexes = self.indexes(window)
+        return min(self.prices[index] for index in indexes) if indexes else None
+
+    def max_price(self, window=None):
+        indexes = self.indexes(window)
+        return max(self.prices[index] for index in indexes) if indexes else None
+
+    def price_return(self, window=None):
+        """Relative price change over the window, None with fewer than 2 samples."""
+        indexes = self.indexes(window)
+        if len(indexes) < 2 or self.prices[indexes[0]] <= 0:
+            return None
+        return self.prices[indexes[-1]] / self.prices[indexes[0]] - 1
+
+    def volume_change(self, window=None):
+        """Relative pool volume change over the window, None if unknown."""
+        volumes = [
+            self.volumes[index]
+            for index in self.indexes(window)
+            if not math.isnan(self.volumes[index])
+        ]
+        if len(volumes) < 2 or volumes[0] <= 0:
+            return None
+        return volumes[-1] / volumes[0] - 1
+
+    def ema(self, half_life, window=None):
+        """
+        Exponential moving average of the price. Samples are weighted by the
+        time since the previous one, so irregular quoting does not skew it.
+        """
+        indexes = self.indexes(window)
+        if not indexes:
+            return None
+        average = self.prices[indexes[0]]
+        previous_timestamp = self.timestamps[indexes[0]]
+        for index in indexes[1:]:
+            elapsed = self.timestamps[index] - previous_timestamp
+            weight = 1 - 0.5 ** (elapsed / half_life) if half_life > 0 else 1
+            average += weight * (self.prices[index] - average)
+            previous_timestamp = self.timestamps[index]
+        return average
+
+    def get_stats(self, window, half_life=None):
+        if half_life is None:
+            half_life = window / 4
+        return {
+            "samples": len(self.indexes(window)),
+            "min": self.min_price(window),
+            "max": self.max_price(window),
+            "return": self.price_return(window),
+            "ema": self.ema(half_life, window),
+            "volume_change": self.volume_change(window),
+        }
+
+
+class PriceHistory:
+    """
+    Price series of every (chain, token, fee, side) the bot quotes; a token
+    and a fee tier identify its pool against the native token. Buy quotes
+    (native for token) and sell quotes (token for native) go into separate
+    series, since their prices differ by the pool fee, slippage and the price
+    impact of their sizes. Series are kept in least recently used order and
+    the oldest is dropped past MAX_SERIES, so the whole store has a fixed
+    upper bound on memory.
+    """
+
+    MAX_SERIES = 2048  # a buy and a sell series for 1024 pools
+
+    def __init__(self, max_series=MAX_SERIES, capacity=PriceSeries.CAPACITY):
+        self.max_series = max_series
+        self.capacity = capacity
+        self.series = OrderedDict()
+
+    def __len__(self):
+        return len(self.series)
+
+    def make_key(self, chain_name, token_address, fee, side: TradeAction):
+        return chain_name, token_address.lower(), int(fee), side
+
+    def get(self, chain_name, token_address, fee, side: TradeAction):
+        """The series of a token's pool, None if it was never quoted that way."""
+        return self.series.get(self.make_key(chain_name, token_address, fee, side))
+
+    def get_or_create(
+        self, chain_name, token_address, fee, side: TradeAction
+    ) -> PriceSeries:
+        key = self.make_key(chain_name, token_address, fee, side)
+        price_series = self.series.get(key)
+        if price_series is None:
+            price_series = PriceSeries(self.capacity)
+            self.series[key] = price_series
+            if len(self.series) > self.max_series:
+                self.series.popitem(last=False)
+        else:
+            self.series.move_to_end(key)
+        return price_series
+
+    def record_quote(
+        self,
+        chain_name,
+        token_address,
+        fee,
+        side: TradeAction,
+        native_amount,
+        token_amount,
+    ):
+        """
+        Records a quote exchanging native_amount for token_amount, buying the
+        token or selling it.
+        """
+        if native_amount <= 0 or token_amount <= 0:
+            return  # failed quotes are -1
+        self.get_or_create(chain_name, token_address, fee, side).append(
+            native_amount / token_amount
+        )
+
+    def record_volume(self, chain_name, token_address, fee, volume_usd):
+        # the pool volume is the same whichever way it is quoted, pools never
+        # quoted get no series for it
+        for side in TradeAction:
+            price_series = self.get(chain_name, token_address, fee, side)
+            if price_series is not None:
+                price_series.set_volume(float(volume_usd))
@@ -0,0 +1,107 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+from logger_config import logger
+from models.sampling_job import SamplingJob
+
+
+class SamplingScheduler:
+    """
+    Owns every candidate's "sample now, sample again after the window"
+    schedule in one heap, instead of one task sleeping through the window
+    per candidate. A single loop wakes for the earliest due sample and takes
+    every sample due within TICK of it at once, so their quotes share one
+    multicall batch and their pool lookups one subgraph query.
+
+    add() returns a future resolving with evaluate(first, second), or with
+    the exception a sample or evaluate raised.
+    """
+
+    TICK = 1  # seconds, samples due this close together are taken together
+
+    def __init__(self):
+        self.schedule = []  # heap of (due_at, sequence, SamplingJob)
+        self.sequence = itertools.count()
+        self.wakeup = asyncio.Event()
+        self.loop_task = None
+        self.batch_tasks = set()
+        self.batches = 0
+        self.samples = 0
+
+    def add(self, take_sample, window, evaluate) -> asyncio.Future:
+        job = SamplingJob(
+            take_sample, window, evaluate, asyncio.get_running_loop().create_future()
+        )
+        # waiting one tick lets candidates added together share the first batch
+        self.push(time.monotonic() + self.TICK, job)
+        return job.result
+
+    def push(self, due_at, job: SamplingJob):
+        heapq.heappush(self.schedule, (due_at, next(self.sequence), job))
+        self.wakeup.set()
+        if self.loop_task is None or self.loop_task.done():
+            self.loop_task = asyncio.ensure_future(self.run())
+
+    async def run(self):
+        while self.schedule:
+            delay = self.schedule[0][0] - time.monotonic()
+            if delay > 0:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            horizon = time.monotonic() + self.TICK
+            batch = []
+            while self.schedule and self.schedule[0][0] <= horizon:
+                _, _, job = heapq.heappop(self.schedule)
+                if not job.result.done():  # skip jobs whose caller went away
+                    batch.append(job)
+            if not batch:
+                continue
+
+            task = asyncio.ensure_future(self.take_samples(batch))
+            # keep a reference so the task is not garbage collected while running
+            self.batch_tasks.add(task)
+            task.add_done_callback(self.batch_tasks.discard)
+
+    async def take_samples(self, batch):
+        logger.info(f"Taking {len(batch)} due samples in one batch")
+        self.batches += 1
+        self.samples += len(batch)
+        samples = await asyncio.gather(
+            *[job.take_sample(job.first_sample) for job in batch],
+            return_exceptions=True,
+        )
+        sampled_at = time.monotonic()
+        for job, sample in zip(batch, samples):
+            if job.result.done():
+                continue
+            if isinstance(sample, Exception):
+                job.result.set_exception(sample)
+            elif not job.sampled_once:
+                job.first_sample = sample
+                job.sampled_once = True
+                self.push(sampled_at + job.window, job)
+            else:
+                try:
+                    job.result.set_result(job.evaluate(job.first_sample, sample))
+                except Exception as error:
+                    job.result.set_exception(error)
+
+    def get_stats(self):
+        return {
+            "pending": len(self.schedule),
+            "batches": self.batches,
+            "samples": self.samples,
+            "samples_per_batch": self.samples / self.batches if self.batches else 0,
+        }
+
+    def log_and_reset_stats(self):
+        logger.info(f"Sampling scheduler stats: {self.get_stats()}")
+        self.batches = 0
+        self.samples = 0
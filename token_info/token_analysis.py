@@ -9,6 +9,8 @@ from managers.blockchain_manager import BlockchainManager
 from managers.data_management import DataManagement
 from managers.tokensniffer_scaper import TokensnifferScraper
 from managers.wallet_manager import WalletManager
+from models.price_sample import PriceSample
+from token_info.sampling_scheduler import SamplingScheduler
 
 
 class TokenAnalysis:
@@ -27,41 +29,60 @@ class TokenAnalysis:
         self.tokensniffer_scraper = TokensnifferScraper(
             data_manager, blockchain_manager
         )
+        # one schedule for the price samples of every candidate
+        self.sampling_scheduler = SamplingScheduler()
 
     async def is_token_price_increase(self, token, fee, pool):
-        trade_amount = int(
-            self.wallet_manager.get_native_token_balance_percentage(
-                self.data_manager.config["trade_amount_percentage"]
-            )
-        )
         try:
-            logger.info("starting is_token_price_increase start_amount")
-            start_amount = await self.protocol_manager.get_min_token_for_native(
-                token.id,
-                trade_amount,
-                fee.basis_points,
-            )
-
-            start_pool_data = await self.protocol_manager.get_pool_data(pool.id)
-            if start_pool_data:
-                start_volume_usd = start_pool_data.volumeUSD
-            else:
-                start_volume_usd = -1
+            return await self.schedule_price_check(token, fee, pool)
+        except Exception as e:
+            logger.error(f"Error in is_token_price_increase: {e}")
+            return False, 0
 
-            await asyncio.sleep(self.data_manager.config["monitor_timeframe"] * 60)
+    def schedule_price_check(self, token, fee, pool) -> asyncio.Future:
+        """
+        Samples the token price and pool volume now and again after
+        monitor_timeframe minutes. The returned future resolves with
+        (price_has_increased, start_amount).
+        """
+        return self.sampling_scheduler.add(
+            lambda start_sample: self.take_price_sample(token, fee, pool, start_sample),
+            self.data_manager.config["monitor_timeframe"] * 60,
+            self.evaluate_price_samples,
+        )
 
-            logger.info("starting is_token_price_increase end_amount")
-            end_amount = await self.protocol_manager.get_min_token_for_native(
+    async def take_price_sample(
+        self, token, fee, pool, start_sample: PriceSample = None
+    ) -> PriceSample:
+        if start_sample is not None:
+            trade_amount = start_sample.trade_amount
+        else:
+            trade_amount = int(
+                await self.wallet_manager.get_native_token_balance_percentage(
+                    self.data_manager.config["trade_amount_percentage"]
+                )
+            )
+        logger.info(f"Sampling price of token {token.id}")
+        # the quote and the pool lookup join the batches of the other samples
+        token_amount, pool_data = await asyncio.gather(
+            self.protocol_manager.get_min_token_for_native(
                 token.id,
                 trade_amount,
                 fee.basis_points,
-            )
+            ),
+            self.protocol_manager.get_pool_data(pool.id),
+        )
+        volume_usd = pool_data.volumeUSD if pool_data else -1
+        return PriceSample(trade_amount, token_amount, volume_usd)
 
-            end_pool_data = await self.protocol_manager.get_pool_data(pool.id)
-            if end_pool_data:
-                end_volume_usd = end_pool_data.volumeUSD
-            else:
-                end_volume_usd = -1
+    def evaluate_price_samples(
+        self, start_sample: PriceSample, end_sample: PriceSample
+    ):
+        try:
+            start_amount = start_sample.token_amount
+            end_amount = end_sample.token_amount
+            start_volume_usd = start_sample.volume_usd
+            end_volume_usd = end_sample.volume_usd
 
             if (
                 start_amount == -1
@@ -102,7 +123,7 @@ class TokenAnalysis:
             return False, start_amount
 
         except Exception as e:
-            logger.error(f"Error in is_token_price_increase: {e}")
+            logger.error(f"Error in evaluate_price_samples: {e}")
             return False, 0
 
     async def has_exploits(self, token_address):
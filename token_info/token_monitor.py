@@ -84,7 +84,7 @@ class TokenMonitor:
             )
 
             # update the token balance due to slippage, fees, etc
-            actual_token_balance = self.wallet_manager.get_token_balance(
+            actual_token_balance = await self.wallet_manager.get_token_balance(
                 potential_trade.token_address.lower()
             )
             monitored_tokens[token_pool_id] = {
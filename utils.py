@@ -1,4 +1,15 @@
 from decimal import Decimal
+from functools import lru_cache
+
+from eth_typing import ChecksumAddress
+from web3 import Web3
+
+
+@lru_cache(maxsize=4096)
+def to_checksum_address(address) -> ChecksumAddress:
+    # checksumming hashes the address with Keccak, and the bot sees the same
+    # few hundred addresses over and over
+    return Web3.to_checksum_address(address)
 
 
 def has_value_increased(token_amount_start, token_amount_end):
@@ -17,15 +17,23 @@ class NewTokenWorker(ChainWorker):
             stdscr.addstr(20, 0, f"Working on chain: {current_bot_chain.name}")
             stdscr.refresh()
             try:
-                new_tokens = await self.get_new_tokens()
-                logger.info(f"New tokens: {new_tokens}")
+                price_check_tasks_with_params = []
+                # each subgraph page is checked while the next one downloads
+                async for new_tokens in self.stream_new_tokens():
+                    logger.info(f"New tokens: {new_tokens}")
 
-                (
-                    tasks_only,
-                    price_check_tasks_with_params,
-                ) = await self.perform_token_checks(new_tokens)
+                    (
+                        tasks_only,
+                        page_tasks_with_params,
+                    ) = await self.perform_token_checks(new_tokens)
 
-                all_tasks.update(tasks_only)
+                    all_tasks.update(tasks_only)
+                    price_check_tasks_with_params.extend(page_tasks_with_params)
+
+                await self.wait_for_price_checks(
+                    [task for task, _, _, _ in price_check_tasks_with_params]
+                )
+                self.token_status_manager.log_and_reset_stats()
 
                 update_task, monitor_trades_task = await self.update_and_monitor_trades(
                     all_tasks, price_check_tasks_with_params
@@ -73,10 +81,15 @@ class NewTokenWorker(ChainWorker):
         ) = await self.token_status_manager.create_token_check_tasks(new_tokens)
 
         logger.info(f"Price check tasks: {price_check_tasks_with_params}")
-        logger.info(f"Tokens with check tasks: {tokens_with_check_tasks}")
+        logger.info(f"Tokens with check tasks: {len(tokens_with_check_tasks)}")
 
         tasks_only = [task for task, _, _, _ in price_check_tasks_with_params]
 
+        # the analyses run on the status manager's workers while the next
+        # page is discovered; they are awaited in wait_for_price_checks
+        return tasks_only, price_check_tasks_with_params
+
+    async def wait_for_price_checks(self, tasks_only):
         # Wait for all price check tasks to complete
         results = await asyncio.gather(*tasks_only, return_exceptions=True)
 
@@ -86,9 +99,6 @@ class NewTokenWorker(ChainWorker):
             else:
                 logger.info(f"Successful task result: {task_result}")
 
-        # Now tasks_with_params contains the tasks together with their parameters
-        return tasks_only, price_check_tasks_with_params
-
     async def update_and_monitor_trades(self, all_tasks, price_check_tasks_with_params):
         update_task = asyncio.create_task(
             self.watchlist.update(price_check_tasks_with_params)
@@ -121,6 +131,13 @@ class NewTokenWorker(ChainWorker):
             #     logger.info("monitor_trades task completed successfully")
 
     async def get_new_tokens(self):
+        new_tokens = []
+        async for page_tokens in self.stream_new_tokens():
+            new_tokens.extend(page_tokens)
+        # logger.info(f'###GETTING NEW TOKENS###: {new_tokens}')
+        return new_tokens
+
+    async def stream_new_tokens(self):
         # Set the ratio
         tvl_to_volume_ratio = 4  # Example ratio
 
@@ -130,11 +147,10 @@ class NewTokenWorker(ChainWorker):
             / tvl_to_volume_ratio
         )
 
-        new_tokens = await self.bot_controller.protocol_manager.get_tokens(
+        async for new_tokens in self.bot_controller.protocol_manager.stream_tokens(
             self.bot_controller.data_manager.config["max_created_threshold"],
             self.bot_controller.data_manager.config["min_liquidity_usd"],
             self.bot_controller.data_manager.config["max_liquidity_usd"],
             min_volume_usd,
-        )
-        # logger.info(f'###GETTING NEW TOKENS###: {new_tokens}')
-        return new_tokens
+        ):
+            yield new_tokens